@@ -0,0 +1,98 @@
+"""Group source files into batches that can share one clang-tidy process."""
+
+import json
+import math
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.compile_db import command_arguments
+from cpp_linter_hooks.util import COMPILE_DB_FILE
+
+CONFIG_FILE = ".clang-tidy"
+# Aim for several batches per worker so a slow batch does not idle the rest.
+BATCHES_PER_JOB = 4
+MAX_BATCH_SIZE = 16
+# Compiler options that only name outputs and so never affect diagnostics.
+_OUTPUT_OPTIONS = ("-o", "-MF", "-MT", "-MQ")
+
+
+@lru_cache(maxsize=None)
+def _config_for_dir(directory: str) -> Optional[str]:
+    """Return the .clang-tidy file that applies to files in a directory."""
+    path = os.path.join(directory, CONFIG_FILE)
+    if os.path.isfile(path):
+        return path
+    parent = os.path.dirname(directory)
+    return None if parent == directory else _config_for_dir(parent)
+
+
+def forget_configs() -> None:
+    """Forget where .clang-tidy files are, after one was added or removed."""
+    _config_for_dir.cache_clear()
+
+
+def nearest_config(source_file: str) -> Optional[str]:
+    """Return the closest .clang-tidy file above a source file, if any."""
+    return _config_for_dir(os.path.dirname(os.path.abspath(source_file)))
+
+
+def _normalized_flags(entry: Dict[str, str]) -> Tuple[str, ...]:
+    """Reduce a compile command to the options that influence diagnostics."""
+    directory = entry.get("directory", "")
+    arguments = command_arguments(entry)
+    source = os.path.normpath(os.path.join(directory, entry.get("file", "")))
+    flags: List[str] = [directory]
+    skip_next = False
+    for arg in arguments[1:]:
+        if skip_next:
+            skip_next = False
+        elif arg in _OUTPUT_OPTIONS:
+            skip_next = True
+        elif arg == "-c" or arg.startswith(_OUTPUT_OPTIONS):
+            continue
+        elif os.path.normpath(os.path.join(directory, arg)) != source:
+            flags.append(arg)
+    return tuple(flags)
+
+
+def load_compile_flags(compile_db: str) -> Dict[str, Tuple[str, ...]]:
+    """Map each file in compile_commands.json to its normalized flags."""
+    try:
+        entries = json.loads(
+            (Path(compile_db) / COMPILE_DB_FILE).read_text(encoding="utf-8")
+        )
+    except (OSError, ValueError):
+        return {}
+    flags = {}
+    for entry in entries if isinstance(entries, list) else []:
+        directory = entry.get("directory", "")
+        source = os.path.normpath(os.path.join(directory, entry.get("file", "")))
+        flags[source] = _normalized_flags(entry)
+    return flags
+
+
+def plan_batches(
+    source_files: Sequence[str], jobs: int, compile_db: Optional[str] = None
+) -> List[List[int]]:
+    """Split file indices into batches of files with the same config and flags.
+
+    Batch size grows with the number of files per worker, up to
+    ``MAX_BATCH_SIZE``, so small runs still spread across every worker.
+    Batches are returned in the order of their first file.
+    """
+    flags = load_compile_flags(compile_db) if compile_db else {}
+    groups: Dict[Hashable, List[int]] = {}
+    for idx, source_file in enumerate(source_files):
+        source = os.path.normpath(os.path.abspath(source_file))
+        key = (nearest_config(source_file), flags.get(source))
+        groups.setdefault(key, []).append(idx)
+    size = math.ceil(len(source_files) / (jobs * BATCHES_PER_JOB))
+    size = min(MAX_BATCH_SIZE, max(1, size))
+    batches = [
+        group[start : start + size]
+        for group in groups.values()
+        for start in range(0, len(group), size)
+    ]
+    return sorted(batches, key=lambda batch: batch[0])
@@ -0,0 +1,273 @@
+"""Result caches for clang tool runs, with an optional shared remote tier."""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tarfile
+import urllib.error
+import urllib.request
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.history import cache_dir
+from cpp_linter_hooks.util import atomic_write
+
+RESULTS_DIR = "results"
+READ_ONLY = "read-only"
+WRITE_THROUGH = "write-through"
+HTTP_TIMEOUT = 5.0
+# Placeholder for the project root, so entries can move between checkouts.
+ROOT_PLACEHOLDER = "${ROOT}"
+_ENTRY_RE = re.compile(r"^[a-z]+/[0-9a-f]{2}/[0-9a-f]{64}\.json$")
+
+
+def make_key(kind: str, parts: Iterable[Any]) -> str:
+    """Hash key material into a ``<kind>/<sha256>`` cache key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else json.dumps(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return f"{kind}/{digest.hexdigest()}"
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Return the SHA-256 of a file's content, or None if it cannot be read."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def config_chain(path: str, names: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+    """Return (path, digest) of each named config file above a source file.
+
+    Every level is included, since configs may inherit from their parents.
+    """
+    configs = []
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        for name in names:
+            candidate = os.path.join(directory, name)
+            if os.path.isfile(candidate):
+                configs.append((candidate, file_digest(candidate)))
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return configs
+        directory = parent
+
+
+def portable(text: str, root: str) -> str:
+    """Replace the project root in text so it does not depend on the checkout.
+
+    Only the whole root is replaced, so a sibling such as ``/src/project2``
+    for the root ``/src/proj`` is left alone.
+    """
+    root = root.rstrip("/\\") or root
+    return re.sub(re.escape(root) + r"(?![\w.-])", lambda _: ROOT_PLACEHOLDER, text)
+
+
+def localize(text: str, root: str) -> str:
+    """Undo portable() for the current checkout."""
+    return text.replace(ROOT_PLACEHOLDER, root)
+
+
+class DirectoryStore:
+    """Cache entries stored as JSON files, e.g. locally or on a shared mount."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        """Return the file holding an entry, fanned out by hash prefix."""
+        kind, digest = key.split("/", 1)
+        return self.root / kind / digest[:2] / f"{digest}.json"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return an entry's raw data, or None if it is missing."""
+        try:
+            return self._path(key).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Atomically store an entry, ignoring I/O failures."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, data)
+        except OSError:
+            pass
+
+
+class HttpStore:
+    """Cache entries served by a plain HTTP GET/PUT server under a base URL."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.failed = False
+
+    def _request(self, key: str, data: Optional[bytes] = None) -> Optional[bytes]:
+        """Send a GET (or a PUT with data), giving up after the first error."""
+        if self.failed:
+            return None
+        request = urllib.request.Request(
+            f"{self.url}/{key}", data=data, method="GET" if data is None else "PUT"
+        )
+        token = os.environ.get("CPP_LINTER_HOOKS_CACHE_TOKEN")
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                self.failed = True
+        except (OSError, ValueError):
+            # An unreachable server should not slow down every later lookup.
+            self.failed = True
+        return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return an entry's raw data, or None if it is missing."""
+        return self._request(key)
+
+    def put(self, key: str, data: bytes) -> None:
+        """Upload an entry, ignoring server errors."""
+        self._request(key, data)
+
+
+def open_store(location: str):
+    """Return the store for an http(s) URL or a directory path."""
+    if location.startswith(("http://", "https://")):
+        return HttpStore(location)
+    return DirectoryStore(Path(location))
+
+
+class ResultCache:
+    """Two-tier cache: a local directory backed by an optional remote store.
+
+    Remote hits are copied into the local tier.  New entries always go to
+    the local tier and, in write-through mode, to the remote store as well.
+    """
+
+    def __init__(self, local, remote=None, mode: str = READ_ONLY):
+        self.local = local
+        self.remote = remote
+        self.mode = mode
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached entry, or None on a miss."""
+        data = self.local.get(key)
+        if data is None and self.remote is not None:
+            data = self.remote.get(key)
+            if data is not None:
+                self.local.put(key, data)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+        except ValueError:
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry locally and, in write-through mode, remotely."""
+        data = json.dumps(entry).encode("utf-8")
+        self.local.put(key, data)
+        if self.remote is not None and self.mode == WRITE_THROUGH:
+            self.remote.put(key, data)
+
+
+def add_cache_arguments(parser: ArgumentParser) -> None:
+    """Add the result cache options shared by the hooks."""
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse results of earlier runs on unchanged inputs",
+    )
+    parser.add_argument(
+        "--cache-remote",
+        default=os.environ.get("CPP_LINTER_HOOKS_CACHE_REMOTE"),
+        dest="cache_remote",
+        help="Shared cache directory or http(s) URL (implies --cache)",
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=(READ_ONLY, WRITE_THROUGH),
+        default=os.environ.get("CPP_LINTER_HOOKS_CACHE_MODE", READ_ONLY),
+        dest="cache_mode",
+        help="Whether new results are also uploaded to the remote cache",
+    )
+
+
+def cache_from_args(hook_args) -> Optional[ResultCache]:
+    """Build the result cache requested on the command line, if any."""
+    if not (hook_args.cache or hook_args.cache_remote):
+        return None
+    remote = open_store(hook_args.cache_remote) if hook_args.cache_remote else None
+    return ResultCache(
+        DirectoryStore(cache_dir() / RESULTS_DIR), remote, hook_args.cache_mode
+    )
+
+
+def export_bundle(path: str, local_dir: Optional[Path] = None) -> int:
+    """Write every local cache entry into a gzipped tar bundle."""
+    local_dir = local_dir or cache_dir() / RESULTS_DIR
+    count = 0
+    with tarfile.open(path, "w:gz") as bundle:
+        for entry in sorted(local_dir.rglob("*.json")):
+            name = entry.relative_to(local_dir).as_posix()
+            if _ENTRY_RE.match(name):
+                bundle.add(entry, arcname=name, recursive=False)
+                count += 1
+    return count
+
+
+def import_bundle(path: str, local_dir: Optional[Path] = None) -> int:
+    """Copy the entries of a bundle into the local cache.
+
+    Only regular files with cache entry names are read, so a bundle cannot
+    write outside the cache directory.
+    """
+    store = DirectoryStore(local_dir or cache_dir() / RESULTS_DIR)
+    count = 0
+    with tarfile.open(path, "r:*") as bundle:
+        for member in bundle.getmembers():
+            if not member.isfile() or not _ENTRY_RE.match(member.name):
+                continue
+            source = bundle.extractfile(member)
+            if source is None:
+                continue
+            kind, _, digest = member.name[: -len(".json")].split("/")
+            with source:
+                store.put(f"{kind}/{digest}", source.read())
+            count += 1
+    return count
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Export or import cache bundles: ``python -m cpp_linter_hooks.cache``."""
+    parser = ArgumentParser(prog="python -m cpp_linter_hooks.cache")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("bundle")
+    args = parser.parse_args(argv)
+    try:
+        if args.action == "export":
+            count = export_bundle(args.bundle)
+        else:
+            count = import_bundle(args.bundle)
+    except (OSError, tarfile.TarError) as e:
+        print(f"Could not {args.action} cache bundle: {e}", file=sys.stderr)
+        return 1
+    verb = "Exported" if args.action == "export" else "Imported"
+    print(f"{verb} {count} cache entries.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
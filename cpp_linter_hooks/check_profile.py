@@ -0,0 +1,95 @@
+"""Aggregate clang-tidy --store-check-profile output into a ranked report."""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple
+
+# Number of checks listed in the text report; the JSON report has all of them.
+TOP_CHECKS = 20
+_TIMER_RE = re.compile(r"^time\.clang-tidy\.(?P<check>.+)\.(?P<kind>wall|user|sys)$")
+
+
+class CheckTiming(NamedTuple):
+    """Seconds spent in one check, summed over every profiled file."""
+
+    check: str
+    wall: float
+    user: float
+    sys: float
+
+
+class CheckProfile:
+    """Per-check timings collected from clang-tidy profile files."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self._times: Dict[str, Dict[str, float]] = {}
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        """Add the timers of one translation unit's profile."""
+        self.files += 1
+        for key, seconds in profile.get("profile", {}).items():
+            match = _TIMER_RE.match(key)
+            if match and isinstance(seconds, (int, float)):
+                times = self._times.setdefault(match.group("check"), {})
+                kind = match.group("kind")
+                times[kind] = times.get(kind, 0.0) + seconds
+
+    def load_dir(self, directory: Path) -> None:
+        """Add every profile file clang-tidy stored under a directory."""
+        for path in sorted(directory.rglob("*.json")):
+            try:
+                profile = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if isinstance(profile, dict):
+                self.add(profile)
+
+    def ranked(self) -> List[CheckTiming]:
+        """Return the checks ordered from most to least wall-clock time."""
+        timings = [
+            CheckTiming(
+                check,
+                times.get("wall", 0.0),
+                times.get("user", 0.0),
+                times.get("sys", 0.0),
+            )
+            for check, times in self._times.items()
+        ]
+        return sorted(timings, key=lambda timing: (-timing.wall, timing.check))
+
+    @property
+    def total(self) -> float:
+        """Return the wall-clock time spent in all checks."""
+        return sum(times.get("wall", 0.0) for times in self._times.values())
+
+    def render(self, limit: int = TOP_CHECKS) -> str:
+        """Format the most expensive checks as a table with percentages."""
+        total = self.total
+        ranked = self.ranked()
+        lines = [
+            f"clang-tidy check profile: {len(ranked)} checks, {self.files} files, "
+            f"{total:.3f}s total"
+        ]
+        for timing in ranked[:limit]:
+            percent = 100 * timing.wall / total if total else 0.0
+            lines.append(f"  {timing.wall:9.3f}s {percent:5.1f}%  {timing.check}")
+        if len(ranked) > limit:
+            lines.append(f"  ... {len(ranked) - limit} more checks")
+        return "\n".join(lines)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Return the full report as JSON-serialisable data."""
+        total = self.total
+        return {
+            "files": self.files,
+            "total_wall": total,
+            "checks": [
+                dict(
+                    timing._asdict(),
+                    percent=100 * timing.wall / total if total else 0.0,
+                )
+                for timing in self.ranked()
+            ],
+        }
@@ -0,0 +1,326 @@
+"""The checks clang-tidy enables for a file, and its output split by check.
+
+``--list-checks`` and ``--dump-config`` cost clang-tidy no parsing, so
+asking once per config is cheap compared to re-running every check when
+only some of them changed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from cpp_linter_hooks.batching import CONFIG_FILE
+from cpp_linter_hooks.cache import config_chain
+from cpp_linter_hooks.diagnostics import Diagnostic, parse_output
+from cpp_linter_hooks.process import run_process
+
+# Options that change which checks run or how they are configured.
+CONFIG_OPTIONS = (
+    "checks",
+    "config",
+    "config-file",
+    "warnings-as-errors",
+    "header-filter",
+    "exclude-header-filter",
+    "system-headers",
+)
+# Compiler warnings are not listed by --list-checks but follow these globs.
+DIAGNOSTIC_PREFIX = "clang-diagnostic-"
+_DIAGNOSTIC_PATTERNS = ("warning:", "error:")
+
+
+def _option_name(arg: str) -> Optional[str]:
+    """Return the name of a ``-name=value`` or ``--name`` option, if any."""
+    if not arg.startswith("-") or arg == "--":
+        return None
+    return arg.lstrip("-").split("=", 1)[0]
+
+
+def config_args(args: Sequence[str]) -> List[str]:
+    """Return the arguments that affect the clang-tidy config of a file."""
+    return [arg for arg in args if _option_name(arg) in CONFIG_OPTIONS]
+
+
+def without_checks(args: Sequence[str]) -> List[str]:
+    """Return clang-tidy arguments without their ``--checks`` option."""
+    if "--" in args:
+        separator = list(args).index("--")
+        return without_checks(args[:separator]) + list(args[separator:])
+    return [arg for arg in args if _option_name(arg) != "checks"]
+
+
+def restrict(
+    command: List[str], checks: Sequence[str], diagnostics: Sequence[str] = ()
+) -> List[str]:
+    """Return a clang-tidy command that only runs the given checks.
+
+    ``diagnostics`` are Checks glob terms for compiler warnings to keep, as
+    returned by ``diagnostic_globs``; without them ``-*`` turns those off too.
+    """
+    glob = ",".join(["-*", *diagnostics, *checks])
+    return [command[0], f"--checks={glob}", *without_checks(command[1:])]
+
+
+def owners(diagnostic: Diagnostic) -> Tuple[str, ...]:
+    """Return the checks that reported a diagnostic (aliases share one)."""
+    return tuple(diagnostic.check.split(",")) if diagnostic.check else ()
+
+
+def _digest(data) -> str:
+    """Return a short, stable digest of JSON-serialisable data."""
+    text = json.dumps(data, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_check_list(output: str) -> Optional[List[str]]:
+    """Return the checks ``--list-checks`` printed, or None without a list."""
+    lines = output.splitlines()
+    if "Enabled checks:" not in lines:
+        return None
+    checks = []
+    for line in lines[lines.index("Enabled checks:") + 1 :]:
+        if not line.startswith((" ", "\t")) or not line.strip():
+            break
+        checks.append(line.strip())
+    return checks
+
+
+def parse_dump(output: str) -> Optional[Tuple[str, Dict[str, str], List[str]]]:
+    """Split ``--dump-config`` output into its Checks glob, check options
+    and the remaining lines, or return None if it holds no config.
+
+    Check options are ``name.Option: value`` lines; older clang-tidy
+    versions write them as ``- key:``/``value:`` pairs instead.
+    """
+    lines = output.splitlines()
+    if "---" not in lines:
+        return None
+    glob = ""
+    options: Dict[str, str] = {}
+    rest: List[str] = []
+    in_options = False
+    key = None
+    for line in lines[lines.index("---") + 1 :]:
+        if line == "...":
+            break
+        if not line.startswith(" "):
+            # clang-tidy prints "CheckOptions: {}" when no check has options.
+            in_options = line.startswith("CheckOptions:")
+            if line.startswith("Checks:"):
+                glob = line.split(":", 1)[1].strip().strip("'\"")
+            elif not in_options:
+                rest.append(line)
+            continue
+        if not in_options:
+            rest.append(line)
+            continue
+        item = line.strip()
+        if item.startswith("- key:"):
+            key = item.split(":", 1)[1].strip()
+        elif item.startswith("value:") and key is not None:
+            options[key] = item.split(":", 1)[1].strip()
+            key = None
+        elif ":" in item:
+            name, _, value = item.partition(":")
+            options[name.strip()] = value.strip()
+    return glob, options, rest
+
+
+def diagnostic_globs(glob: str) -> List[str]:
+    """Return the terms of a Checks glob that can match compiler warnings."""
+    terms = []
+    for term in glob.split(","):
+        term = term.strip()
+        prefix = term.lstrip("-").split("*", 1)[0]
+        if term and (
+            DIAGNOSTIC_PREFIX.startswith(prefix) or prefix.startswith(DIAGNOSTIC_PREFIX)
+        ):
+            terms.append(term)
+    return terms
+
+
+class CheckConfig(NamedTuple):
+    """What clang-tidy will check in a file.
+
+    ``checks`` maps each enabled check to a digest of its options, and
+    ``settings`` digests everything else in the config, which applies to all
+    checks at once.  ``diagnostics`` are the Checks glob terms that select
+    compiler warnings.
+    """
+
+    checks: Dict[str, str]
+    settings: str
+    diagnostics: Tuple[str, ...] = ()
+
+
+class CheckLister:
+    """Ask clang-tidy which checks apply to files, once per distinct config."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._configs: Dict[Tuple[str, ...], Optional[CheckConfig]] = {}
+
+    def _query(self, command: List[str]) -> Optional[CheckConfig]:
+        """Run --list-checks and --dump-config for one file."""
+        tool, *rest = command
+        try:
+            _, listed = run_process([tool, "--list-checks", *rest])
+            _, dumped = run_process([tool, "--dump-config", *rest])
+        except OSError:
+            return None
+        check_list = parse_check_list(listed)
+        dump = parse_dump(dumped)
+        if check_list is None or dump is None:
+            return None
+        glob, options, rest_lines = dump
+        per_check: Dict[str, Dict[str, str]] = {name: {} for name in check_list}
+        shared: Dict[str, str] = {}
+        for key, value in options.items():
+            name = key.rsplit(".", 1)[0]
+            if name in per_check:
+                per_check[name][key] = value
+            else:
+                shared[key] = value
+        diagnostics = diagnostic_globs(glob)
+        return CheckConfig(
+            {name: _digest(opts) for name, opts in per_check.items()},
+            _digest([rest_lines, shared, diagnostics]),
+            tuple(diagnostics),
+        )
+
+    def config(
+        self, tool: str, args: Sequence[str], source: str, configs: Sequence[str]
+    ) -> Optional[CheckConfig]:
+        """Return the config clang-tidy uses for a source file, or None.
+
+        ``configs`` are the .clang-tidy files that apply to the file; files
+        sharing them and the config arguments share one answer.
+        """
+        command = [tool, *config_args(args), source]
+        group = (tool, *config_args(args), "", *configs)
+        with self._lock:
+            if group not in self._configs:
+                self._configs[group] = self._query(command)
+            return self._configs[group]
+
+
+class CheckResults(NamedTuple):
+    """One file's clang-tidy output, split into blocks owned by checks.
+
+    Blocks without an owner among ``checks`` (compiler errors and warnings,
+    other text) do not depend on which checks run and are always kept.
+    ``failed`` records a failure that left no diagnostic, such as a crash.
+    """
+
+    checks: Dict[str, str]
+    blocks: Tuple[Tuple[Tuple[str, ...], str], ...]
+    failed: bool
+
+    @classmethod
+    def from_output(cls, checks: Dict[str, str], result: Tuple[int, str]):
+        """Split a finished job's (retval, output)."""
+        retval, output = result
+        blocks = tuple(
+            (owners(entry), entry.render())
+            if isinstance(entry, Diagnostic)
+            else ((), entry)
+            for entry in parse_output(output)
+        )
+        failed = retval != 0 and not any(
+            pattern in output for pattern in _DIAGNOSTIC_PATTERNS
+        )
+        return cls(checks, blocks, failed)
+
+    def select(self, checks: Dict[str, str]) -> "CheckResults":
+        """Drop the results of checks that are gone or configured differently."""
+        kept = {
+            name: opts for name, opts in self.checks.items() if checks.get(name) == opts
+        }
+        blocks = tuple(
+            (names, text)
+            for names, text in self.blocks
+            if not self._owned(names) or any(name in kept for name in names)
+        )
+        return self._replace(checks=kept, blocks=blocks)
+
+    def _owned(self, names: Tuple[str, ...]) -> bool:
+        """Return whether a block came from one of the checks that ran."""
+        return any(name in self.checks for name in names)
+
+    def missing(self, checks: Dict[str, str]) -> List[str]:
+        """Return the enabled checks these results do not cover."""
+        return sorted(name for name in checks if name not in self.checks)
+
+    def merge(self, other: "CheckResults") -> "CheckResults":
+        """Add the results of a run restricted to other checks."""
+        seen: Set[str] = {text for _, text in self.blocks}
+        blocks = self.blocks + tuple(
+            (names, text)
+            for names, text in other.blocks
+            if other._owned(names) and text not in seen
+        )
+        return CheckResults(
+            {**self.checks, **other.checks}, blocks, self.failed or other.failed
+        )
+
+    def result(self) -> Tuple[int, str]:
+        """Return the (retval, output) of a job with these results."""
+        output = "\n".join(text for _, text in self.blocks)
+        found = any(pattern in output for pattern in _DIAGNOSTIC_PATTERNS)
+        return (1 if self.failed or found else 0), output
+
+
+def partition(checks: Sequence[str], groups: int) -> List[List[str]]:
+    """Deal sorted checks into at most ``groups`` disjoint, non-empty groups.
+
+    Dealing spreads the checks of one module, which tend to cost alike, over
+    every group.
+    """
+    ordered = sorted(checks)
+    return [ordered[idx::groups] for idx in range(min(groups, len(ordered)))]
+
+
+class CheckSplitter:
+    """Spread the checks of expensive files over several clang-tidy processes.
+
+    Each process parses the file again, so this only pays off for files
+    whose checks take much longer than parsing.
+    """
+
+    def __init__(self, groups: int, files: Iterable[str], lister: CheckLister):
+        self.groups = groups
+        self.files = {os.path.abspath(path) for path in files}
+        self.lister = lister
+
+    def commands(
+        self, command: List[str], checks: Optional[Sequence[str]] = None
+    ) -> Optional[List[List[str]]]:
+        """Return one command per check group, or None to run ``command`` whole.
+
+        ``checks`` limits the groups to these checks instead of every
+        enabled one.  The first group also reports the compiler warnings the
+        config enables, so they are not lost to the split.
+        """
+        end = command.index("--") if "--" in command else len(command)
+        source = next(
+            (arg for arg in command[1:end] if os.path.abspath(arg) in self.files),
+            None,
+        )
+        if source is None:
+            return None
+        configs = [path for path, _ in config_chain(source, (CONFIG_FILE,))]
+        args = [arg for arg in command[1:end] if arg != source]
+        config = self.lister.config(command[0], args, source, configs)
+        if config is None:
+            return None
+        groups = partition(
+            list(config.checks) if checks is None else checks, self.groups
+        )
+        if len(groups) < 2:
+            return None
+        return [
+            restrict(command, group, config.diagnostics if idx == 0 else ())
+            for idx, group in enumerate(groups)
+        ]
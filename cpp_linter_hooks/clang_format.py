@@ -1,18 +1,87 @@
 """Pre-commit hook wrapper for clang-format."""
 
-import subprocess
+import os
 import sys
 from argparse import ArgumentParser
-from typing import Tuple
-
-from cpp_linter_hooks.util import resolve_install_with_diagnostics
+from typing import List, Optional, Tuple
+
+from cpp_linter_hooks.cache import (
+    ResultCache,
+    add_cache_arguments,
+    cache_from_args,
+    config_chain,
+    file_digest,
+    make_key,
+    portable,
+)
+from cpp_linter_hooks.files import add_file_list_arguments, listed_files
+from cpp_linter_hooks.generated import add_generated_arguments, skip_files
+from cpp_linter_hooks.output import add_output_arguments
+from cpp_linter_hooks.process import run_process
+from cpp_linter_hooks.util import resolve_install_with_diagnostics, tool_version
 
+STYLE_FILES = (".clang-format", "_clang-format")
+# Files per clang-format process, to stay within command line length limits.
+MAX_FILES_PER_RUN = 1000
 
 parser = ArgumentParser()
 parser.add_argument("--version", default=None)
 parser.add_argument(
     "-v", "--verbose", action="store_true", help="Enable verbose output"
 )
+add_cache_arguments(parser)
+add_output_arguments(parser)
+add_generated_arguments(parser)
+add_file_list_arguments(parser)
+
+
+def split_files(args: List[str]) -> Tuple[List[str], List[str]]:
+    """Split clang-format options from the trailing file arguments."""
+    split_idx = len(args)
+    while split_idx > 0 and os.path.isfile(args[split_idx - 1]):
+        split_idx -= 1
+    return args[:split_idx], args[split_idx:]
+
+
+def _format_key(version: str, options: List[str], path: str) -> Optional[str]:
+    """Return the cache key for formatting one file's current content."""
+    digest = file_digest(path)
+    if digest is None:
+        return None
+    root = os.getcwd()
+    style_files = [
+        file_digest(option.split(":", 1)[1])
+        for option in options
+        if option.startswith("--style=file:")
+    ]
+    configs = [
+        (portable(config, root), config_digest)
+        for config, config_digest in config_chain(path, STYLE_FILES)
+    ]
+    options = [portable(option, root) for option in options]
+    return make_key("format", [version, options, digest, configs, style_files])
+
+
+def _uncached_files(
+    cache: ResultCache, version: str, options: List[str], files: List[str]
+) -> List[str]:
+    """Return the files not already known to be formatted."""
+    uncached = []
+    for path in files:
+        key = _format_key(version, options, path)
+        if key is None or cache.get(key) is None:
+            uncached.append(path)
+    return uncached
+
+
+def _remember_formatted(
+    cache: ResultCache, version: str, options: List[str], files: List[str]
+) -> None:
+    """Record that the current content of files is correctly formatted."""
+    for path in files:
+        key = _format_key(version, options, path)
+        if key is not None:
+            cache.put(key, {"formatted": True})
 
 
 def run_clang_format(args=None) -> Tuple[int, str]:
@@ -23,41 +92,79 @@ def run_clang_format(args=None) -> Tuple[int, str]:
     )
     if version_error is not None:
         return 1, version_error
-    command = ["clang-format", "-i"]
-
-    # Add verbose flag if requested
-    if hook_args.verbose:
-        command.append("--verbose")
 
-    command.extend(other_args)
-
-    # Auto-inject --Werror when --dry-run is used, so clang-format returns
-    # non-zero when formatting changes are needed (mirrors-clang-format behavior).
-    if "--dry-run" in command and "--Werror" not in command:
-        command.append("--Werror")
+    return format_files(hook_args, other_args)
+
+
+def format_files(hook_args, other_args: List[str]) -> Tuple[int, str]:
+    """Run clang-format on already resolved hook arguments.
+
+    Hooks that format file after file parse their arguments and resolve
+    clang-format once, then call this for each group of files.
+    """
+    options, files = split_files(other_args)
+    extra_files, error = listed_files(hook_args)
+    if error is not None:
+        return 1, error
+    if hook_args.files_from is not None or hook_args.all_files:
+        files = list(dict.fromkeys(files + extra_files))
+        if not files:
+            return 0, ""
+        other_args = options + files
+    if files:
+        files = skip_files(hook_args, files)
+        if not files:
+            return 0, ""
+        other_args = options + files
+
+    # Files whose exact content was formatted cleanly before are skipped.
+    cache = cache_from_args(hook_args)
+    version = tool_version("clang-format") if cache is not None else None
+    if cache is None or version is None:
+        files = []
+    else:
+        files = _uncached_files(cache, version, options, files)
+        if not files and len(options) < len(other_args):
+            return 0, ""
+        other_args = options + files
+
+    targets = other_args[len(options) :]
+    uncached = set(files)
+    retval, outputs = 0, []
+    for start in range(0, max(len(targets), 1), MAX_FILES_PER_RUN):
+        chunk = targets[start : start + MAX_FILES_PER_RUN]
+        command = ["clang-format", "-i"]
+
+        # Add verbose flag if requested
+        if hook_args.verbose:
+            command.append("--verbose")
 
-    try:
-        # Run the clang-format command with captured output
-        sp = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            encoding="utf-8",
-        )
+        command.extend(options + chunk)
 
-        # Combine stdout and stderr for complete output
-        output = (sp.stdout or "") + (sp.stderr or "")
+        # Auto-inject --Werror when --dry-run is used, so clang-format returns
+        # non-zero when formatting changes are needed (mirrors-clang-format
+        # behavior).
+        if "--dry-run" in command and "--Werror" not in command:
+            command.append("--Werror")
 
-        retval = sp.returncode
+        try:
+            # Run the clang-format command, capturing stdout followed by stderr
+            chunk_retval, output = run_process(command, max_output=hook_args.max_output)
+        except FileNotFoundError as e:
+            return 1, str(e)
 
         # Print verbose information if requested
         if hook_args.verbose:
-            _print_verbose_info(command, retval, output)
+            _print_verbose_info(command, chunk_retval, output)
 
-        return retval, output
+        if chunk_retval == 0 and uncached:
+            _remember_formatted(
+                cache, version, options, [path for path in chunk if path in uncached]
+            )
+        retval = max(retval, chunk_retval)
+        outputs.append(output)
 
-    except FileNotFoundError as e:
-        return 1, str(e)
+    return retval, "".join(outputs)
 
 
 def _print_verbose_info(command: list, retval: int, output: str) -> None:
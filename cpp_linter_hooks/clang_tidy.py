@@ -1,35 +1,111 @@
 """Pre-commit hook wrapper for clang-tidy."""
 
-from concurrent.futures import ThreadPoolExecutor
-import subprocess
+import json
+import os
+import shutil
 import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
 from argparse import ArgumentParser, ArgumentTypeError
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
-from cpp_linter_hooks.util import resolve_install_with_diagnostics
+from cpp_linter_hooks.batching import CONFIG_FILE, load_compile_flags, plan_batches
+from cpp_linter_hooks.cache import (
+    ResultCache,
+    add_cache_arguments,
+    cache_from_args,
+    config_chain,
+    file_digest,
+    localize,
+    make_key,
+    portable,
+)
+from cpp_linter_hooks.check_profile import CheckProfile
+from cpp_linter_hooks.checks import (
+    CheckLister,
+    CheckResults,
+    CheckSplitter,
+    config_args,
+    restrict,
+    without_checks,
+)
+from cpp_linter_hooks.compile_db import route_files
+from cpp_linter_hooks.coordinator import Coordinator, join, run_group
+from cpp_linter_hooks.diagnostics import DiagnosticCollector
+from cpp_linter_hooks.diff import line_filter, parse_diff
+from cpp_linter_hooks.files import (
+    add_file_list_arguments,
+    is_source_file,
+    listed_files,
+)
+from cpp_linter_hooks.fixes import apply_fixes, format_style, parse_export_fixes
+from cpp_linter_hooks.generated import add_generated_arguments, skip_files
+from cpp_linter_hooks.git import staged_diff, staged_files, toplevel
+from cpp_linter_hooks.history import RunHistory
+from cpp_linter_hooks.includes import HeaderScanner, include_dirs
+from cpp_linter_hooks.interpolate import infer_commands
+from cpp_linter_hooks.jobs import (
+    AdaptiveLimiter,
+    auto_jobs,
+    child_peak_rss,
+    cpu_jobs,
+)
+from cpp_linter_hooks.jobserver import JobServer
+from cpp_linter_hooks.limits import JobLimitExceeded, ResourceLimits, supported
+from cpp_linter_hooks.lint_db import LintRules, lint_view
+from cpp_linter_hooks.output import (
+    PatternScanner,
+    add_output_arguments,
+    size_value,
+    truncate,
+    truncation_note,
+)
+from cpp_linter_hooks.pch import (
+    COMPILER,
+    PchBuilder,
+    discard,
+    pch_failed,
+    pch_path,
+    without_pch,
+)
+from cpp_linter_hooks.process import CancelScope, JobTimedOut, run_process
+from cpp_linter_hooks.scheduler import COMPLETION, ORDERED, Progress, iter_results
+from cpp_linter_hooks.shard import parse_shard, select_shard, write_report
+from cpp_linter_hooks.util import (
+    COMPILE_DB_FILE,
+    resolve_install_with_diagnostics,
+    tool_version,
+)
 
 COMPILE_DB_SEARCH_DIRS = ["build", "out", "cmake-build-debug", "_build"]
-SOURCE_FILE_SUFFIXES = {
-    ".c",
-    ".cc",
-    ".cp",
-    ".cpp",
-    ".cxx",
-    ".c++",
-    ".cu",
-    ".cuh",
-    ".h",
-    ".hh",
-    ".hpp",
-    ".hxx",
-    ".h++",
-    ".ipp",
-    ".inl",
-    ".ixx",
-    ".tpp",
-    ".txx",
-}
+# --compile-commands value that routes each file to its own compile database.
+AUTO_COMPILE_DB = "auto"
+FIX_ARGS = ("-fix", "-fix-errors")
+# Exit status when files were skipped or timed out, matching timeout(1).
+TIMEOUT_RETVAL = 124
+# Pseudo return codes for jobs that were killed or never started.
+_TIMED_OUT = -1
+_NOT_STARTED = -2
+_LIMIT_EXCEEDED = -3
+# Default seconds a file must have taken for --split-checks to split it.
+SPLIT_THRESHOLD = 60.0
 COMPILE_COMMANDS_HINT = """\
 Generate compile_commands.json with one of:
   CMake: cmake -S . -B build -DCMAKE_EXPORT_COMPILE_COMMANDS=ON
@@ -45,28 +121,214 @@ Windows/MSVC clang-tidy hints:
 
 
 def _positive_int(value: str) -> int:
-    """Parse a positive integer for the --jobs option."""
-    jobs = int(value)
-    if jobs < 1:
-        raise ArgumentTypeError("--jobs must be greater than 0")
-    return jobs
+    """Parse a positive integer for options such as --jobs."""
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError("value must be greater than 0")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    """Parse a positive number of seconds for --timeout and --time-budget."""
+    number = float(value)
+    if not number > 0:
+        raise ArgumentTypeError("value must be greater than 0")
+    return number
+
+
+def _jobs_value(value: str) -> Union[int, str]:
+    """Parse --jobs as a positive integer, "auto" or "adaptive"."""
+    if value in ("auto", "adaptive"):
+        return value
+    try:
+        return _positive_int(value)
+    except ValueError:
+        raise ArgumentTypeError(
+            f"--jobs must be a positive integer, 'auto' or 'adaptive', not '{value}'"
+        )
 
 
 parser = ArgumentParser()
 parser.add_argument("--version", default=None)
-parser.add_argument("--compile-commands", default=None, dest="compile_commands")
+parser.add_argument(
+    "--compile-commands",
+    default=None,
+    dest="compile_commands",
+    help="Directory containing compile_commands.json, or 'auto' to find every "
+    "compile database in the tree and use the right one for each file",
+)
 parser.add_argument(
     "--no-compile-commands", action="store_true", dest="no_compile_commands"
 )
-parser.add_argument("-j", "--jobs", type=_positive_int, default=1)
+parser.add_argument("-j", "--jobs", type=_jobs_value, default=1)
 parser.add_argument("-v", "--verbose", action="store_true")
 parser.add_argument("--fix", action="store_true", help="Apply fixes in place (-fix)")
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="Print each file's diagnostics as soon as its job finishes",
+)
+parser.add_argument(
+    "--stream-order",
+    choices=(ORDERED, COMPLETION),
+    default=COMPLETION,
+    dest="stream_order",
+    help="Report streamed results in input order or as jobs complete",
+)
+parser.add_argument(
+    "--fail-fast",
+    action="store_true",
+    dest="fail_fast",
+    help="Stop checking further files as soon as one file fails",
+)
+parser.add_argument(
+    "--max-failures",
+    type=_positive_int,
+    default=None,
+    dest="max_failures",
+    help="Stop checking further files once this many files have failed",
+)
+parser.add_argument(
+    "--timeout",
+    type=_positive_float,
+    default=None,
+    help="Kill clang-tidy on a file that takes longer than this many seconds",
+)
+parser.add_argument(
+    "--memory-limit",
+    type=size_value,
+    default=None,
+    dest="memory_limit",
+    help="Stop a clang-tidy job whose address space grows past this size (e.g. 4G)",
+)
+parser.add_argument(
+    "--cpu-limit",
+    type=_positive_int,
+    default=None,
+    dest="cpu_limit",
+    help="Stop a clang-tidy job after this many seconds of CPU time",
+)
+parser.add_argument(
+    "--time-budget",
+    type=_positive_float,
+    default=None,
+    dest="time_budget",
+    help="Stop starting new files once the whole run has taken this many seconds",
+)
+parser.add_argument(
+    "--diff",
+    action="store_true",
+    help="Only report diagnostics on lines changed in the git index",
+)
+parser.add_argument(
+    "--diff-base",
+    default=None,
+    dest="diff_base",
+    help="Compare the git index against this revision instead of HEAD",
+)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Profile clang-tidy checks and print the most expensive ones",
+)
+parser.add_argument(
+    "--profile-json",
+    default=None,
+    dest="profile_json",
+    help="Also write the check profile to this JSON file (implies --profile)",
+)
+parser.add_argument(
+    "--shard",
+    type=parse_shard,
+    default=None,
+    help="Only check shard K of N (K/N) of the files, for CI matrices",
+)
+parser.add_argument(
+    "--shard-history",
+    default=None,
+    dest="shard_history",
+    help="History file with per-file durations used to balance shards",
+)
+parser.add_argument(
+    "--shard-report",
+    default=None,
+    dest="shard_report",
+    help="Write this shard's result to a JSON file for merging",
+)
+parser.add_argument(
+    "--batch",
+    action="store_true",
+    help="Check files sharing a .clang-tidy config and compile flags in one process",
+)
+parser.add_argument(
+    "--lint-db",
+    action="store_true",
+    dest="lint_db",
+    help="Run against a copy of the compile database without codegen-only flags",
+)
+parser.add_argument(
+    "--lint-db-rules",
+    default=None,
+    dest="lint_db_rules",
+    help="JSON file with flag strip/rewrite rules for --lint-db (implies it)",
+)
+parser.add_argument(
+    "--infer-commands",
+    action="store_true",
+    dest="infer_commands",
+    help="Check headers and files missing from the compile database with flags "
+    "borrowed from the closest listed file",
+)
+parser.add_argument(
+    "--pch",
+    action="store_true",
+    help="Precompile the system headers shared by files with the same compile "
+    "flags (needs clang of clang-tidy's version)",
+)
+parser.add_argument(
+    "--pch-header",
+    default=None,
+    dest="pch_header",
+    help="Header to precompile for every group of files (implies --pch)",
+)
+parser.add_argument(
+    "--no-jobserver",
+    action="store_false",
+    dest="jobserver",
+    help="Ignore the GNU make jobserver advertised in MAKEFLAGS",
+)
+parser.add_argument(
+    "--no-coordinate",
+    action="store_false",
+    dest="coordinate",
+    help="Do not share one --jobs pool with the other hook processes of a "
+    "pre-commit run",
+)
+parser.add_argument(
+    "--split-checks",
+    type=_positive_int,
+    default=None,
+    dest="split_checks",
+    help="Spread the checks of files slower than --split-threshold over this "
+    "many clang-tidy processes",
+)
+parser.add_argument(
+    "--split-threshold",
+    type=_positive_float,
+    default=SPLIT_THRESHOLD,
+    dest="split_threshold",
+    help="Seconds a file took last time for --split-checks to split it",
+)
+add_cache_arguments(parser)
+add_output_arguments(parser)
+add_generated_arguments(parser)
+add_file_list_arguments(parser)
 
 
 def _find_compile_commands() -> Optional[str]:
     """Return the first common directory containing compile_commands.json."""
     for d in COMPILE_DB_SEARCH_DIRS:
-        if (Path(d) / "compile_commands.json").exists():
+        if (Path(d) / COMPILE_DB_FILE).exists():
             return d
     return None
 
@@ -103,8 +365,11 @@ def _resolve_compile_db(
                 file=sys.stderr,
             )
             return None, None
+        if hook_args.compile_commands == AUTO_COMPILE_DB:
+            # Resolved per file once the source files are known.
+            return None, None
         p = Path(hook_args.compile_commands)
-        if not p.is_dir() or not (p / "compile_commands.json").exists():
+        if not p.is_dir() or not (p / COMPILE_DB_FILE).exists():
             return None, (
                 1,
                 _compile_commands_not_found_message(hook_args.compile_commands),
@@ -117,56 +382,96 @@ def _resolve_compile_db(
     return None, None
 
 
-def _looks_like_compile_db_error(output: str) -> bool:
-    """Return whether clang-tidy output indicates a compile database problem."""
-    lower_output = output.lower()
-    compile_db_error = "compile_commands.json" in lower_output and any(
-        pattern in lower_output
-        for pattern in (
-            "not found",
-            "no such file",
-            "missing",
-            "error",
-            "could not",
-        )
-    )
-    return compile_db_error or any(
-        pattern in lower_output
-        for pattern in (
-            "error while trying to load a compilation database",
-            "could not auto-detect compilation database",
-            "no compilation database found",
-        )
-    )
+def _compile_db_arg(args: List[str]) -> Optional[str]:
+    """Return the value of a -p option in clang-tidy arguments, if any."""
+    for idx, arg in enumerate(args):
+        if arg == "-p" and idx + 1 < len(args):
+            return args[idx + 1]
+        if arg.startswith("-p="):
+            return arg[len("-p=") :]
+    return None
+
+
+def _map_compile_db_arg(args: List[str], convert: Callable[[str], str]) -> List[str]:
+    """Return clang-tidy arguments with the -p directory passed through convert."""
+    mapped = list(args)
+    for idx, arg in enumerate(mapped):
+        if arg == "-p" and idx + 1 < len(mapped):
+            mapped[idx + 1] = convert(mapped[idx + 1])
+            break
+        if arg.startswith("-p="):
+            mapped[idx] = "-p=" + convert(arg[len("-p=") :])
+            break
+    return mapped
+
+
+# Output patterns (matched case-insensitively) that call for guidance.
+_COMPILE_DB_CONTEXT = ("not found", "no such file", "missing", "error", "could not")
+_COMPILE_DB_ERRORS = (
+    "error while trying to load a compilation database",
+    "could not auto-detect compilation database",
+    "no compilation database found",
+)
+_CL_DRIVER_ERRORS = ("not found", "doesn't exist", "unable to execute")
+_MSVC_ERRORS = (
+    "unable to find a visual studio installation",
+    "visual studio installation",
+    "vcruntime.h",
+    "windows.h' file not found",
+    "sal.h' file not found",
+    "msvc",
+    "unknown argument: '/",
+    "unsupported option '/",
+    "argument unused during compilation: '/",
+)
+_GUIDANCE_PATTERNS = (
+    (COMPILE_DB_FILE, "cl.exe", COMPILE_COMMANDS_HINT, MSVC_HINT)
+    + _COMPILE_DB_CONTEXT
+    + _COMPILE_DB_ERRORS
+    + _CL_DRIVER_ERRORS
+    + _MSVC_ERRORS
+)
+_DIAGNOSTIC_PATTERNS = ("warning:", "error:")
+
+
+def _guidance_scanner() -> PatternScanner:
+    """Return a scanner for the output patterns that trigger guidance."""
+    return PatternScanner(_GUIDANCE_PATTERNS, ignore_case=True)
 
 
-def _looks_like_msvc_error(output: str) -> bool:
-    """Return whether clang-tidy output indicates an MSVC setup problem."""
-    lower_output = output.lower()
-    cl_driver_error = "cl.exe" in lower_output and any(
-        pattern in lower_output
-        for pattern in ("not found", "doesn't exist", "unable to execute")
+def _looks_like_compile_db_error(found: Set[str]) -> bool:
+    """Return whether scanned output indicates a compile database problem."""
+    compile_db_error = COMPILE_DB_FILE in found and any(
+        pattern in found for pattern in _COMPILE_DB_CONTEXT
     )
-    msvc_patterns = (
-        "unable to find a visual studio installation",
-        "visual studio installation",
-        "vcruntime.h",
-        "windows.h' file not found",
-        "sal.h' file not found",
-        "msvc",
-        "unknown argument: '/",
-        "unsupported option '/",
-        "argument unused during compilation: '/",
+    return compile_db_error or any(pattern in found for pattern in _COMPILE_DB_ERRORS)
+
+
+def _looks_like_msvc_error(found: Set[str]) -> bool:
+    """Return whether scanned output indicates an MSVC setup problem."""
+    cl_driver_error = "cl.exe" in found and any(
+        pattern in found for pattern in _CL_DRIVER_ERRORS
     )
-    return cl_driver_error or any(pattern in lower_output for pattern in msvc_patterns)
+    return cl_driver_error or any(pattern in found for pattern in _MSVC_ERRORS)
 
 
-def _append_guidance(output: str) -> str:
-    """Append troubleshooting guidance when clang-tidy output matches known errors."""
+def _append_guidance(output: str, found: Optional[Set[str]] = None) -> str:
+    """Append troubleshooting guidance when clang-tidy output matches known errors.
+
+    ``found`` holds the patterns a _guidance_scanner() saw in the output; it
+    is computed from ``output`` when not given.
+    """
+    if found is None:
+        scanner = _guidance_scanner()
+        scanner.feed(output)
+        found = scanner.found
     hints: List[str] = []
-    if _looks_like_compile_db_error(output) and COMPILE_COMMANDS_HINT not in output:
+    if (
+        _looks_like_compile_db_error(found)
+        and COMPILE_COMMANDS_HINT.lower() not in found
+    ):
         hints.append(COMPILE_COMMANDS_HINT)
-    if _looks_like_msvc_error(output) and MSVC_HINT not in output:
+    if _looks_like_msvc_error(found) and MSVC_HINT.lower() not in found:
         hints.append(MSVC_HINT)
     if not hints:
         return output
@@ -174,25 +479,57 @@ def _append_guidance(output: str) -> str:
     return output.rstrip("\n") + separator + "\n\n".join(hints)
 
 
-def _exec_clang_tidy(command) -> Tuple[int, str]:
-    """Run clang-tidy and return (retval, output)."""
+def _exec_clang_tidy(
+    command,
+    scope: Optional[CancelScope] = None,
+    timeout: Optional[float] = None,
+    max_output: Optional[int] = None,
+    limits: Optional[ResourceLimits] = None,
+) -> Tuple[int, str]:
+    """Run clang-tidy and return (retval, output).
+
+    Known errors and diagnostics are detected while the output streams in,
+    so they count even past the ``max_output`` bytes that are returned.
+    Raises JobTimedOut if clang-tidy runs for longer than ``timeout`` seconds
+    and JobLimitExceeded if it is stopped by ``limits``.
+    """
+    guidance = _guidance_scanner()
+    diagnostics = PatternScanner(_DIAGNOSTIC_PATTERNS)
     try:
-        sp = subprocess.run(
-            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding="utf-8"
-        )
-        output = (sp.stdout or "") + (sp.stderr or "")
-        output = _append_guidance(output)
-        retval = (
-            1 if sp.returncode != 0 or "warning:" in output or "error:" in output else 0
+        returncode, output = run_process(
+            command, scope, timeout, max_output, (guidance, diagnostics), limits
         )
+        output = _append_guidance(output, guidance.found)
+        retval = 1 if returncode != 0 or diagnostics.found else 0
         return retval, output
     except FileNotFoundError as e:
         return 1, str(e)
 
 
-def _looks_like_source_file(path: str) -> bool:
-    """Return whether a path has a recognized C or C++ source suffix."""
-    return Path(path).suffix.lower() in SOURCE_FILE_SUFFIXES
+def _exec_split(
+    commands: List[List[str]], slot: Callable[[], ContextManager[None]], **kwargs: Any
+) -> Tuple[Tuple[int, str], float]:
+    """Run clang-tidy commands for disjoint check groups of one file at once.
+
+    Each command holds its own ``slot`` of the run's job limits while it
+    runs.  Returns the merged (retval, output) and the summed wall-clock
+    time of the commands, which is what checking the file in one process
+    costs.  Output reported by several commands is kept once.
+    """
+
+    def run(command: List[str]) -> Tuple[Tuple[int, str], float]:
+        """Run one check group in a slot of its own, timing it."""
+        with slot():
+            start = time.monotonic()
+            result = _exec_clang_tidy(command, **kwargs)
+            return result, time.monotonic() - start
+
+    results = sorted(iter_results(run, commands, len(commands), COMPLETION))
+    collector = DiagnosticCollector()
+    for _, ((_, output), _) in results:
+        collector.add(output)
+    retval = max(result[0] for _, (result, _) in results)
+    return (retval, collector.render()), sum(cost for _, (_, cost) in results)
 
 
 def _split_source_files(args: List[str]) -> Tuple[List[str], List[str]]:
@@ -200,43 +537,966 @@ def _split_source_files(args: List[str]) -> Tuple[List[str], List[str]]:
     split_idx = len(args)
     source_files: List[str] = []
     for idx in range(len(args) - 1, -1, -1):
-        if not _looks_like_source_file(args[idx]):
+        if not is_source_file(args[idx]):
             break
         source_files.append(args[idx])
         split_idx = idx
     return args[:split_idx], list(reversed(source_files))
 
 
-def _combine_outputs(results: List[Tuple[int, str]]) -> str:
-    """Join non-empty clang-tidy outputs from multiple executions."""
-    return "\n".join(output.rstrip("\n") for _, output in results if output)
+class _Reporter:
+    """Fold job results into one retval and deduplicated output.
+
+    In streaming mode each job's new findings are printed as soon as the job
+    finishes, with a progress line on interactive terminals, and nothing is
+    left over to return at the end.  Files that timed out, hit a resource
+    limit, were skipped by the time budget or were dropped by fail-fast are
+    listed once the run ends.
+    """
+
+    def __init__(
+        self,
+        source_files: Sequence[str] = (),
+        stream: bool = False,
+        max_output: Optional[int] = None,
+    ):
+        self.source_files = source_files
+        self.retval = 0
+        self.collector = DiagnosticCollector()
+        self.max_output = max_output
+        # Bytes of unique output collected so far, and bytes left out.
+        self.shown = 0
+        self.omitted = 0
+        self.progress = Progress(len(source_files)) if stream else None
+        self.checked: Set[int] = set()
+        self.failed: Set[int] = set()
+        self.timed_out: List[int] = []
+        self.not_started: List[int] = []
+        # Description of the limit that stopped each such job.
+        self.limit_exceeded: Dict[int, str] = {}
+        # Whether a whole serial run was stopped by the time or resource limits.
+        self.stopped = False
+
+    def add(self, retval: int, output: str, idx: Optional[int] = None) -> bool:
+        """Record one job's result, returning whether the job ran to the end."""
+        if idx is not None:
+            if self.progress is not None:
+                self.progress.advance()
+            if retval == _TIMED_OUT:
+                self.timed_out.append(idx)
+                return False
+            if retval == _NOT_STARTED:
+                self.not_started.append(idx)
+                return False
+            if retval == _LIMIT_EXCEEDED:
+                self.limit_exceeded[idx] = output
+                return False
+            self.checked.add(idx)
+            if retval != 0:
+                self.failed.add(idx)
+        elif retval == TIMEOUT_RETVAL:
+            self.stopped = True
+        if retval != 0:
+            self.retval = 1
+        self._collect(output)
+        return True
+
+    def _collect(self, output: str, capped: bool = True) -> None:
+        """Deduplicate output, printing it at once in streaming mode.
+
+        Once ``max_output`` bytes have been collected, further output is
+        only counted, so a noisy run does not pile up in memory.
+        """
+        if capped and self.max_output is not None and self.shown >= self.max_output:
+            self.omitted += len(output.encode("utf-8", "replace"))
+            return
+        new_output = self.collector.add(output)
+        if self.progress is None or not new_output:
+            self.shown += len(new_output.encode("utf-8", "replace"))
+            return
+        if capped and self.max_output is not None:
+            new_output, omitted = truncate(new_output, self.max_output - self.shown)
+            self.omitted += omitted
+        self.shown += len(new_output.encode("utf-8", "replace"))
+        if new_output:
+            self.progress.clear()
+            print(new_output.rstrip("\n"), flush=True)
+            self.progress.draw()
+
+    def _file_list(self, header: str, indices: Iterable[int]) -> List[str]:
+        """Format a header plus one indented line per source file."""
+        files = [self.source_files[idx] for idx in sorted(indices)]
+        if not files:
+            return []
+        return [header.format(count=len(files))] + [f"  {f}" for f in files]
+
+    def incomplete_summary(self) -> str:
+        """Describe the files whose checks did not run to completion."""
+        skipped = (
+            set(self.timed_out)
+            | set(self.not_started)
+            | set(self.limit_exceeded)
+            | self.checked
+        )
+        dropped = [idx for idx in range(len(self.source_files)) if idx not in skipped]
+        limited = self._file_list(
+            "{count} files exceeded a per-job resource limit and were not fully "
+            "checked:",
+            self.limit_exceeded,
+        )
+        limited[1:] = [
+            f"{line}: {self.limit_exceeded[idx]}"
+            for line, idx in zip(limited[1:], sorted(self.limit_exceeded))
+        ]
+        return "\n".join(
+            self._file_list(
+                "{count} files timed out and were not fully checked:",
+                self.timed_out,
+            )
+            + limited
+            + self._file_list(
+                "Time budget exhausted; {count} files were not checked:",
+                self.not_started,
+            )
+            + self._file_list(
+                "Stopped early (--fail-fast); {count} files were not checked:",
+                dropped,
+            )
+        )
+
+    def finish(self) -> Tuple[int, str]:
+        """Return (retval, output not yet printed)."""
+        retval = self.retval
+        if self.timed_out or self.not_started or self.limit_exceeded or self.stopped:
+            retval = TIMEOUT_RETVAL
+        summary = self.incomplete_summary()
+        if self.progress is not None:
+            if self.omitted:
+                self._collect(truncation_note(self.omitted), capped=False)
+            self._collect(summary, capped=False)
+            self.progress.finish()
+            return retval, ""
+        output, omitted = truncate(self.collector.render(), self.max_output)
+        omitted += self.omitted
+        notes = [truncation_note(omitted)] if omitted else []
+        if summary:
+            notes.append(summary)
+        return retval, "\n".join([output.rstrip("\n")] + notes).strip("\n")
+
+
+def _combine_outputs(
+    results: Iterable[Tuple[int, str]], reporter: Optional[_Reporter] = None
+) -> Tuple[int, str]:
+    """Merge clang-tidy results, reporting each unique finding only once.
+
+    Results are consumed one at a time so that only the deduplicated findings,
+    not every job's raw output, are held in memory.
+    """
+    reporter = reporter or _Reporter()
+    for job_retval, output in results:
+        reporter.add(job_retval, output)
+    return reporter.finish()
+
+
+def _resolve_jobs(
+    jobs: Union[int, str], verbose: bool = False
+) -> Tuple[int, Optional[AdaptiveLimiter]]:
+    """Turn the --jobs value into a worker count and an optional limiter."""
+    if isinstance(jobs, int):
+        return jobs, None
+    peak_rss = RunHistory.load().peak_rss
+    initial = auto_jobs(peak_rss)
+    limiter = None
+    workers = initial
+    if jobs == "adaptive":
+        # Start from the auto estimate but allow growth up to one job per CPU.
+        workers = max(initial, cpu_jobs())
+        limiter = AdaptiveLimiter(workers, initial=initial, peak_rss=peak_rss)
+    if verbose:
+        print(f"Using {initial} clang-tidy jobs (--jobs={jobs})", file=sys.stderr)
+    return workers, limiter
+
+
+def _resource_limits(hook_args) -> Optional[ResourceLimits]:
+    """Return the per-job limits requested on the command line, if any."""
+    if hook_args.memory_limit is None and hook_args.cpu_limit is None:
+        return None
+    if not supported():
+        print(
+            "Warning: --memory-limit and --cpu-limit are not supported on this "
+            "platform and are ignored",
+            file=sys.stderr,
+        )
+        return None
+    return ResourceLimits(hook_args.memory_limit, hook_args.cpu_limit)
+
+
+def _connect_jobserver(
+    jobs: int, enabled: bool = True, verbose: bool = False
+) -> Optional[JobServer]:
+    """Return the make jobserver to take job tokens from, if one is running."""
+    if jobs < 2 or not enabled:
+        return None
+    jobserver = JobServer.from_environment()
+    if jobserver is not None and verbose:
+        print(f"Sharing make's jobserver ({jobserver.description})", file=sys.stderr)
+    return jobserver
+
+
+def _join_coordinator(
+    jobs: int, enabled: bool = True, verbose: bool = False
+) -> Optional[Coordinator]:
+    """Return the job pool shared by the partitions of this pre-commit run."""
+    # pre-commit sets PRE_COMMIT=1 for the hooks it runs.
+    if jobs < 2 or not enabled or os.environ.get("PRE_COMMIT") != "1":
+        return None
+    coordinator = join(run_group("clang-tidy"), jobs)
+    if coordinator is not None and verbose:
+        if coordinator.leader:
+            message = f"Serving a {jobs}-job pool to this pre-commit run"
+        else:
+            message = "Sharing the job pool of another hook process"
+        print(message, file=sys.stderr)
+    return coordinator
+
+
+def _record_peak_rss() -> None:
+    """Store this run's per-job peak RSS for future --jobs=auto estimates."""
+    peak_rss = child_peak_rss()
+    if peak_rss is None:
+        return
+    history = RunHistory.load()
+    history.record_peak_rss(peak_rss)
+    history.save()
+
+
+class _TidyCache:
+    """Per-file clang-tidy results keyed by everything that can change them.
+
+    The key covers the clang-tidy version and arguments, the file and the
+    project headers it includes, its compile flags and the effective
+    clang-tidy config apart from its check list.  Results are stored per
+    check, so when the enabled checks change only the new ones are run and
+    the output of removed ones is dropped.  If clang-tidy cannot report its
+    config, every .clang-tidy above the file is part of the key instead.
+    Paths under the project root are stored relative to it, so entries can
+    be shared between checkouts and machines.
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        version: str,
+        compile_dbs: Iterable[Optional[str]] = (),
+    ):
+        self.cache = cache
+        self.version = version
+        self.root = os.getcwd()
+        self.flags: Dict[str, Tuple[str, ...]] = {}
+        for compile_db in sorted({db for db in compile_dbs if db}):
+            self.flags.update(load_compile_flags(compile_db))
+        self.scanner = HeaderScanner()
+        self.lister = CheckLister()
+
+    def _portable_files(self, paths: Iterable[str]) -> List[Tuple[str, Any]]:
+        """Return (portable path, content digest) pairs."""
+        return [(portable(path, self.root), file_digest(path)) for path in paths]
+
+    def key(self, command: List[str]) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return the cache key and enabled checks of a single-file command."""
+        # Inferred compiler flags follow "--" and replace the database's.
+        fixed_flags: Optional[Tuple[str, ...]] = None
+        if "--" in command:
+            separator = command.index("--")
+            fixed_flags = (self.root, *command[separator + 1 :])
+            command = command[:separator]
+        args, files = _split_source_files(command[1:])
+        if len(files) != 1:
+            return None
+        source = os.path.normpath(os.path.abspath(files[0]))
+        digest = file_digest(source)
+        if digest is None:
+            return None
+        flags = fixed_flags or self.flags.get(source, ())
+        quote_dirs, dirs = include_dirs(flags[1:], flags[0] if flags else "")
+        configs = [path for path, _ in config_chain(source, (CONFIG_FILE,))]
+        config = self.lister.config(command[0], args, files[0], configs)
+        if config is not None:
+            checks, settings = config.checks, [config.settings]
+            args = without_checks(args)
+        else:
+            checks = {}
+            settings = [
+                self._portable_files(configs),
+                [
+                    file_digest(arg.split("=", 1)[1])
+                    for arg in args
+                    if arg.startswith("--config-file=")
+                ],
+            ]
+        key = make_key(
+            "tidy",
+            [
+                self.version,
+                [portable(arg, self.root) for arg in args],
+                portable(source, self.root),
+                digest,
+                [portable(flag, self.root) for flag in flags],
+                settings,
+                self._portable_files(
+                    self.scanner.dependencies(source, quote_dirs, dirs)
+                ),
+            ],
+        )
+        return key, checks
+
+    def get(self, key: str) -> Optional[CheckResults]:
+        """Return the cached results of a file, or None on a miss."""
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        try:
+            return CheckResults(
+                dict(entry["checks"]),
+                tuple(
+                    (tuple(names), localize(text, self.root))
+                    for names, text in entry["blocks"]
+                ),
+                bool(entry["failed"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def put(self, key: str, results: CheckResults) -> None:
+        """Store a file's results."""
+        self.cache.put(
+            key,
+            {
+                "checks": results.checks,
+                "blocks": [
+                    [list(names), portable(text, self.root)]
+                    for names, text in results.blocks
+                ],
+                "failed": results.failed,
+            },
+        )
+
+
+class _RunOptions(NamedTuple):
+    """Settings shared by every clang-tidy job of one hook run."""
+
+    jobs: int = 1
+    limiter: Optional[AdaptiveLimiter] = None
+    stream: Optional[str] = None
+    max_failures: Optional[int] = None
+    timeout: Optional[float] = None
+    # time.monotonic() value after which no further jobs are started.
+    deadline: Optional[float] = None
+    history: Optional[RunHistory] = None
+    batch: bool = False
+    compile_db: Optional[str] = None
+    # Compile database of each source file, when they use several.
+    compile_dbs: Optional[Dict[str, Optional[str]]] = None
+    # Compiler flags inferred for files missing from their compile database.
+    inferred: Optional[Dict[str, List[str]]] = None
+    # clang-tidy arguments that load a precompiled header, per file.
+    pch: Optional[Dict[str, List[str]]] = None
+    cache: Optional["_TidyCache"] = None
+    max_output: Optional[int] = None
+    limits: Optional[ResourceLimits] = None
+    jobserver: Optional[JobServer] = None
+    # Job pool shared with the other partitions of a pre-commit run.
+    coordinator: Optional[Coordinator] = None
+    splitter: Optional[CheckSplitter] = None
+    # Called with a job's source files before clang-tidy sees them.
+    prepare: Optional[Callable[[List[str]], None]] = None
+
+    def job_timeout(self) -> Optional[float]:
+        """Return the timeout for a job starting now, capped by the deadline."""
+        if self.deadline is None:
+            return self.timeout
+        remaining = self.deadline - time.monotonic()
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+
+
+def _configured_format_style(
+    clang_tidy_args: List[str], source_files: List[str]
+) -> bool:
+    """Return whether the config of any file asks to format applied fixes.
+
+    ``--dump-config`` runs once per distinct chain of .clang-tidy files.
+    """
+    seen: Set[Tuple[str, ...]] = set()
+    for source_file in source_files:
+        configs = tuple(path for path, _ in config_chain(source_file, (CONFIG_FILE,)))
+        if configs in seen:
+            continue
+        seen.add(configs)
+        command = ["clang-tidy", "--dump-config", *config_args(clang_tidy_args)]
+        try:
+            _, output = run_process(command + [source_file])
+        except OSError:
+            continue
+        if format_style(output) not in (None, "none"):
+            return True
+    return False
+
+
+def _prioritize(source_files: List[str], history: RunHistory) -> List[str]:
+    """Order files so staged and recently failing ones are checked first."""
+    staged = set(staged_files())
+
+    def priority(item: Tuple[int, str]) -> Tuple[bool, int, int]:
+        idx, source_file = item
+        failures = history.file_stats(source_file).get("failures", 0)
+        return os.path.abspath(source_file) not in staged, -failures, idx
+
+    return [
+        source_file for _, source_file in sorted(enumerate(source_files), key=priority)
+    ]
+
+
+def _record_file_history(
+    history: RunHistory,
+    source_files: List[str],
+    reporter: _Reporter,
+    durations: Dict[int, float],
+) -> None:
+    """Store per-file durations and failures for later prioritisation."""
+    for idx, duration in durations.items():
+        failed = (
+            idx in reporter.failed
+            or idx in reporter.timed_out
+            or idx in reporter.limit_exceeded
+        )
+        history.record_file(source_files[idx], duration, failed)
+    history.save()
+
+
+def _run_parallel(
+    commands: List[List[str]],
+    options: _RunOptions,
+    durations: Optional[Dict[int, float]] = None,
+) -> Iterator[Tuple[int, Tuple[int, str]]]:
+    """Run clang-tidy commands in parallel, yielding (index, result) pairs.
+
+    With ``max_failures``, queued jobs are dropped and running clang-tidy
+    process groups are terminated once that many jobs have failed; only the
+    jobs that finished are yielded.  Jobs killed by their timeout yield
+    ``_TIMED_OUT``, jobs stopped by a resource limit yield ``_LIMIT_EXCEEDED``
+    and jobs left over when the deadline passes yield ``_NOT_STARTED``.
+    Wall-clock time per job is stored in ``durations``.
+    """
+    scope = CancelScope() if options.max_failures else None
+    failures = 0
+    lock = threading.Lock()
+    # Check groups of a split file run beside the other jobs, so --jobs is
+    # enforced per process rather than by the number of worker threads.
+    processes = threading.BoundedSemaphore(options.jobs)
+
+    def cancelled() -> bool:
+        """Return whether outstanding jobs were cancelled."""
+        return scope is not None and scope.cancelled
+
+    @contextmanager
+    def job_slot() -> Iterator[None]:
+        """Hold a slot of every job limit while one clang-tidy process runs."""
+        with ExitStack() as stack:
+            stack.enter_context(processes)
+            if options.limiter is not None:
+                stack.enter_context(options.limiter)
+            if options.coordinator is not None:
+                stack.enter_context(options.coordinator.slot(cancelled))
+            if options.jobserver is not None:
+                stack.enter_context(options.jobserver.slot(cancelled))
+            yield
+
+    def exec_command(idx: int, command: List[str], held: ExitStack) -> Tuple[int, str]:
+        """Run one clang-tidy command within the time limits.
+
+        ``held`` holds the job's slot; it is released early when the checks
+        are split, since every check group then takes a slot of its own.
+        """
+        if options.prepare is not None:
+            end = command.index("--") if "--" in command else len(command)
+            options.prepare(_split_source_files(command[1:end])[1])
+        kwargs: Dict[str, Any] = {}
+        if scope is not None:
+            kwargs["scope"] = scope
+        timeout = options.job_timeout()
+        if timeout is not None:
+            if timeout <= 0:
+                return _NOT_STARTED, ""
+            kwargs["timeout"] = timeout
+        if options.max_output is not None:
+            kwargs["max_output"] = options.max_output
+        if options.limits is not None:
+            kwargs["limits"] = options.limits
+        lookup = cached = None
+        missing: List[str] = []
+        unrestricted = command
+        if options.cache is not None:
+            # A PCH only speeds parsing up, so it is not part of the key.
+            lookup = options.cache.key(without_pch(command))
+        if lookup is not None:
+            key, checks = lookup
+            cached = options.cache.get(key)
+        if cached is not None:
+            cached = cached.select(checks)
+            missing = cached.missing(checks)
+            if not missing:
+                return cached.result()
+            # Only the newly enabled checks need to run.
+            command = restrict(command, missing)
+        start = time.monotonic()
+        cost = None
+        try:
+            parts = None
+            if options.splitter is not None:
+                # Only the checks still to run are split, when they are known.
+                known = missing or (list(checks) if lookup is not None else [])
+                parts = options.splitter.commands(unrestricted, known or None)
+            if parts is not None:
+                held.close()
+                result, cost = _exec_split(parts, job_slot, **kwargs)
+            else:
+                result = _exec_clang_tidy(command, **kwargs)
+            pch = pch_path(command)
+            if result[0] != 0 and pch is not None and pch_failed(result[1]):
+                # Fall back to parsing everything, and rebuild the PCH next run.
+                discard(pch)
+                with job_slot() if parts is not None else ExitStack():
+                    result = _exec_clang_tidy(without_pch(command), **kwargs)
+        except JobTimedOut:
+            return _TIMED_OUT, ""
+        except JobLimitExceeded as e:
+            return _LIMIT_EXCEEDED, e.describe()
+        finally:
+            if durations is not None:
+                # A split file keeps its whole cost, so it is split again.
+                durations[idx] = cost or time.monotonic() - start
+        if lookup is not None:
+            results = CheckResults.from_output(
+                {name: checks[name] for name in missing} if cached else checks,
+                result,
+            )
+            if cached is not None:
+                results = cached.merge(results)
+            options.cache.put(key, results)
+            if cached is not None:
+                return results.result()
+        return result
+
+    def run_command(item: Tuple[int, List[str]]) -> Tuple[int, str]:
+        """Run one clang-tidy command, honouring the limiter and jobserver."""
+        nonlocal failures
+        with ExitStack() as held:
+            held.enter_context(job_slot())
+            result = exec_command(*item, held)
+        # Count failures as jobs finish, not as results are yielded, so an
+        # ordered consumer waiting on a slow file does not delay cancellation.
+        if scope is not None and result[0] not in (0, _NOT_STARTED):
+            with lock:
+                failures += 1
+                if failures >= options.max_failures:
+                    scope.cancel()
+        return result
+
+    try:
+        yield from iter_results(
+            run_command,
+            list(enumerate(commands)),
+            options.jobs,
+            options.stream or ORDERED,
+            scope,
+        )
+    finally:
+        # Never leave clang-tidy children behind, e.g. after Ctrl-C.
+        if scope is not None:
+            scope.cancel()
+
+
+def _with_compile_db(command: List[str], compile_db: Optional[str]) -> List[str]:
+    """Insert ``-p compile_db`` after the program name, if there is one."""
+    if compile_db is None:
+        return command
+    return command[:1] + ["-p", compile_db] + command[1:]
+
+
+def _db_groups(
+    source_files: Sequence[str], compile_dbs: Dict[str, Optional[str]]
+) -> List[Tuple[Optional[str], List[int]]]:
+    """Group file indices by compile database, in order of first appearance."""
+    groups: Dict[Optional[str], List[int]] = {}
+    for idx, source_file in enumerate(source_files):
+        groups.setdefault(compile_dbs[source_file], []).append(idx)
+    return list(groups.items())
+
+
+def _route_compile_dbs(
+    source_files: List[str], verbose: bool = False
+) -> Tuple[Optional[str], Optional[Dict[str, Optional[str]]]]:
+    """Pick the compile database of each file for --compile-commands=auto.
+
+    Returns the one database to pass as -p when a single one applies, or
+    the database of every file when they need several.
+    """
+    dbs, routes = route_files(source_files)
+    if verbose:
+        print(
+            f"Found {len(dbs)} compile databases: " + " ".join(dbs),
+            file=sys.stderr,
+        )
+        unrouted = [f for f, db in routes.items() if db is None]
+        if unrouted:
+            print("No compile database for: " + " ".join(unrouted), file=sys.stderr)
+    used = set(routes.values())
+    if len(used) == 1:
+        return used.pop(), None
+    # Files without a database are checked without -p, as before.
+    return None, routes
+
+
+def _infer_commands(
+    source_files: List[str],
+    compile_dbs: Dict[str, Optional[str]],
+    verbose: bool = False,
+) -> Dict[str, List[str]]:
+    """Infer flags for the files their compile database does not list."""
+    inferred: Dict[str, List[str]] = {}
+    for compile_db, group in _db_groups(source_files, compile_dbs):
+        if compile_db is None:
+            continue
+        files = [source_files[idx] for idx in group]
+        for source_file, (donor, flags) in infer_commands(files, compile_db).items():
+            inferred[source_file] = flags
+            if verbose:
+                print(
+                    f"Inferred compile flags for {source_file} from {donor}",
+                    file=sys.stderr,
+                )
+    return inferred
+
+
+def _prepare_pch(
+    source_files: List[str], options: _RunOptions, header: Optional[str], verbose: bool
+) -> Dict[str, List[str]]:
+    """Build or reuse the precompiled headers of --pch for each file."""
+    version = tool_version(COMPILER)
+    if version is None or version != tool_version("clang-tidy"):
+        if verbose:
+            print(
+                f"Precompiled headers disabled: {COMPILER} {version or 'not found'} "
+                "does not match clang-tidy",
+                file=sys.stderr,
+            )
+        return {}
+    builder = PchBuilder(version, header, options.jobs)
+    compile_dbs = options.compile_dbs or {f: options.compile_db for f in source_files}
+    inferred = options.inferred or {}
+    pch: Dict[str, List[str]] = {}
+    for compile_db, group in _db_groups(source_files, compile_dbs):
+        files = [source_files[idx] for idx in group]
+        if compile_db is not None:
+            pch.update(
+                builder.prepare([f for f in files if f not in inferred], compile_db)
+            )
+    if verbose:
+        for message in builder.messages:
+            print(message, file=sys.stderr)
+        print(
+            f"Using precompiled headers for {len(pch)} of {len(source_files)} files",
+            file=sys.stderr,
+        )
+    return pch
+
+
+def _run_batches(
+    make_command: Callable[[int, List[str]], List[str]],
+    source_files: List[str],
+    options: _RunOptions,
+    durations: Dict[int, float],
+) -> Iterator[Tuple[int, List[int], Tuple[int, str]]]:
+    """Run one clang-tidy job per batch of files.
+
+    Yields ``(batch index, file indices, result)``.  Without ``options.batch``
+    every batch holds a single file.  Each file is credited with an equal
+    share of its batch's wall-clock time in ``durations``.
+    """
+    if not options.batch:
+        batches = [[idx] for idx in range(len(source_files))]
+    elif options.compile_dbs is None:
+        batches = plan_batches(source_files, options.jobs, options.compile_db)
+    else:
+        # Never mix files of different compile databases in one batch.
+        batches = []
+        for compile_db, group in _db_groups(source_files, options.compile_dbs):
+            batches += [
+                [group[idx] for idx in batch]
+                for batch in plan_batches(
+                    [source_files[idx] for idx in group], options.jobs, compile_db
+                )
+            ]
+        batches.sort()
+    inferred = options.inferred or {}
+    if inferred:
+        # Files with inferred flags are checked on their own.
+        batches = [
+            split
+            for batch in batches
+            for split in (
+                [[idx] for idx in batch]
+                if any(source_files[idx] in inferred for idx in batch)
+                else [batch]
+            )
+        ]
+    commands = [
+        make_command(batch_idx, [source_files[idx] for idx in batch])
+        for batch_idx, batch in enumerate(batches)
+    ]
+    commands = [
+        command + ["--"] + inferred[source_files[batch[0]]]
+        if source_files[batch[0]] in inferred
+        else command
+        for command, batch in zip(commands, batches)
+    ]
+    pch = options.pch or {}
+    commands = [
+        command[:1] + pch[source_files[batch[0]]] + command[1:]
+        if source_files[batch[0]] in pch
+        else command
+        for command, batch in zip(commands, batches)
+    ]
+    if options.compile_dbs is not None:
+        commands = [
+            _with_compile_db(command, options.compile_dbs[source_files[batch[0]]])
+            for command, batch in zip(commands, batches)
+        ]
+    batch_durations: Dict[int, float] = {}
+    for batch_idx, result in _run_parallel(commands, options, batch_durations):
+        yield batch_idx, batches[batch_idx], result
+    for batch_idx, duration in batch_durations.items():
+        for idx in batches[batch_idx]:
+            durations[idx] = duration / len(batches[batch_idx])
 
 
 def _exec_parallel_clang_tidy(
-    command_prefix: List[str], source_files: List[str], jobs: int
+    command_prefix: List[str], source_files: List[str], options: _RunOptions
 ) -> Tuple[int, str]:
-    """Run clang-tidy over source files in parallel and combine the results."""
+    """Run clang-tidy over source files in parallel and combine the results.
 
-    def run_file(source_file: str) -> Tuple[int, str]:
-        """Run clang-tidy for a single source file."""
-        return _exec_clang_tidy(command_prefix + [source_file])
+    ``options.stream`` ("ordered" or "completion") prints each file's findings
+    as soon as they are available instead of after the slowest job.
+    """
+    reporter = _Reporter(source_files, options.stream is not None, options.max_output)
+    durations: Dict[int, float] = {}
+    for _, batch, (retval, output) in _run_batches(
+        lambda _, files: command_prefix + files, source_files, options, durations
+    ):
+        for idx in batch:
+            # A batch's output is added once per file; duplicates are dropped.
+            reporter.add(retval, output, idx)
+    if options.history is not None:
+        _record_file_history(options.history, source_files, reporter, durations)
+    return reporter.finish()
 
-    with ThreadPoolExecutor(max_workers=min(jobs, len(source_files))) as executor:
-        results = list(executor.map(run_file, source_files))
 
-    retval = 1 if any(retval != 0 for retval, _ in results) else 0
-    return retval, _combine_outputs(results)
+def _exec_parallel_fix(
+    clang_tidy_args: List[str], source_files: List[str], options: _RunOptions
+) -> Tuple[int, str]:
+    """Run clang-tidy fixes in parallel, then merge and apply them in one pass.
 
+    Each job exports its fixes to a private file instead of editing sources,
+    so a header shared by several translation units is only rewritten once.
+    """
+    fix_errors = "-fix-errors" in clang_tidy_args
+    base_args = [arg for arg in clang_tidy_args if arg not in FIX_ARGS]
+    replacement_groups = []
+    # The content each file had when clang-tidy read it, so fixes are never
+    # applied at stale offsets.  Headers are first seen in an export.
+    digests = {
+        os.path.normpath(os.path.abspath(f)): file_digest(f) for f in source_files
+    }
+    skipped: List[str] = []
+    reporter = _Reporter(source_files, options.stream is not None, options.max_output)
+    durations: Dict[int, float] = {}
+    with tempfile.TemporaryDirectory(prefix="cpp-linter-hooks-fixes-") as tmp_dir:
 
-def run_clang_tidy(args=None) -> Tuple[int, str]:
-    """Run clang-tidy with hook-specific argument handling."""
+        def export_path(batch_idx: int) -> Path:
+            """Return the private export-fixes file of one job."""
+            return Path(tmp_dir) / f"{batch_idx}.yaml"
+
+        def make_command(batch_idx: int, files: List[str]) -> List[str]:
+            """Build a clang-tidy command that exports instead of applying fixes."""
+            export_fixes = f"--export-fixes={export_path(batch_idx)}"
+            return ["clang-tidy"] + base_args + [export_fixes] + files
+
+        for batch_idx, batch, (job_retval, output) in _run_batches(
+            make_command, source_files, options, durations
+        ):
+            completed = [reporter.add(job_retval, output, idx) for idx in batch]
+            if not all(completed):
+                continue
+            # Match clang-tidy -fix, which refuses to touch a file that does
+            # not compile unless -fix-errors was given.
+            if not fix_errors and "clang-diagnostic-error" in output:
+                skipped.extend(source_files[idx] for idx in batch)
+                continue
+            if export_path(batch_idx).exists():
+                replacements = parse_export_fixes(
+                    export_path(batch_idx).read_text(encoding="utf-8")
+                )
+                for replacement in replacements:
+                    if replacement.file_path not in digests:
+                        digests[replacement.file_path] = file_digest(
+                            replacement.file_path
+                        )
+                replacement_groups.append(replacements)
+
+    if options.history is not None:
+        _record_file_history(options.history, source_files, reporter, durations)
+    fix_retval, fix_output = apply_fixes(replacement_groups, digests)
+    for source_file in skipped:
+        fix_output += (
+            f"\nFound compiler errors in {source_file}, but -fix-errors was not "
+            "specified. Fixes have NOT been applied."
+        )
+    return _combine_outputs([(fix_retval, fix_output.strip())], reporter)
+
+
+def _exec_serial(command: List[str], options: _RunOptions) -> Tuple[int, str]:
+    """Run a single clang-tidy command over every file, within the time limits."""
+    kwargs: Dict[str, Any] = {}
+    if options.max_output is not None:
+        kwargs["max_output"] = options.max_output
+    if options.limits is not None:
+        kwargs["limits"] = options.limits
+    reporter = _Reporter(max_output=options.max_output)
+    timeout = options.job_timeout()
+    if timeout is not None and timeout <= 0:
+        return TIMEOUT_RETVAL, "Time budget exhausted before clang-tidy could run."
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    try:
+        return _combine_outputs([_exec_clang_tidy(command, **kwargs)], reporter)
+    except JobTimedOut:
+        return TIMEOUT_RETVAL, f"clang-tidy timed out after {timeout:.1f}s."
+    except JobLimitExceeded as e:
+        return TIMEOUT_RETVAL, f"clang-tidy was stopped: {e.describe()}."
+
+
+def _report_profile(profile_dir: Path, json_path: Optional[str] = None) -> None:
+    """Print the ranked per-check profile and optionally save it as JSON."""
+    profile = CheckProfile()
+    profile.load_dir(profile_dir)
+    print(profile.render(), file=sys.stderr)
+    if json_path is None:
+        return
+    try:
+        Path(json_path).write_text(
+            json.dumps(profile.to_json(), indent=2) + "\n", encoding="utf-8"
+        )
+    except OSError as e:
+        print(f"Warning: could not write --profile-json: {e}", file=sys.stderr)
+
+
+def _shard_result(
+    hook_args,
+    history: Optional[RunHistory],
+    source_files: List[str],
+    result: Tuple[int, str],
+) -> Tuple[int, str]:
+    """Write the --shard-report for this run, then pass its result through."""
+    if hook_args.shard is None or not hook_args.shard_report:
+        return result
+    durations = {}
+    if history is not None:
+        for source_file in source_files:
+            duration = history.file_stats(source_file).get("duration")
+            if duration is not None:
+                durations[history.file_key(source_file)] = duration
+    try:
+        write_report(hook_args.shard_report, hook_args.shard, result, durations)
+    except OSError as e:
+        print(f"Warning: could not write --shard-report: {e}", file=sys.stderr)
+    return result
+
+
+def _check_splitter(
+    source_files: List[str],
+    history: RunHistory,
+    cache: Optional[_TidyCache],
+    groups: int,
+    threshold: float,
+) -> Optional[CheckSplitter]:
+    """Return a splitter for the files that took ``threshold`` seconds or more."""
+    slow = [
+        source_file
+        for source_file in source_files
+        if history.file_stats(source_file).get("duration", 0) >= threshold
+    ]
+    if not slow:
+        return None
+    lister = cache.lister if cache is not None else CheckLister()
+    return CheckSplitter(groups, slow, lister)
+
+
+def _restrict_to_diff(
+    source_files: List[str], base: Optional[str], verbose: bool = False
+) -> Optional[Tuple[List[str], str]]:
+    """Limit a run to the lines changed in the index relative to ``base``.
+
+    Returns the files to check and a ``--line-filter`` argument, or None when
+    the diff cannot be computed, in which case every line is checked.
+    """
+    root = toplevel()
+    diff_text = staged_diff(base) if root is not None else None
+    if diff_text is None:
+        print(
+            "Warning: --diff ignored; could not compute the git diff", file=sys.stderr
+        )
+        return None
+    kept, filters, skipped = line_filter(source_files, parse_diff(diff_text), root)
+    if verbose and skipped:
+        print(
+            "Skipping files without code changes: " + " ".join(skipped),
+            file=sys.stderr,
+        )
+    return kept, f"--line-filter={filters}"
+
+
+def run_clang_tidy(
+    args=None, prepare: Optional[Callable[[List[str]], None]] = None
+) -> Tuple[int, str]:
+    """Run clang-tidy with hook-specific argument handling.
+
+    ``prepare`` is called with the files of each job right before clang-tidy
+    checks them, within the job's slot; see cpp_linter_hooks.format_tidy.
+    """
+    start = time.monotonic()
     hook_args, other_args = parser.parse_known_args(args)
     _, version_error = resolve_install_with_diagnostics(
         "clang-tidy", hook_args.version, hook_args.verbose
     )
     if version_error is not None:
         return 1, version_error
+    return check_files(hook_args, other_args, prepare, start)
+
 
+def check_files(
+    hook_args,
+    other_args: List[str],
+    prepare: Optional[Callable[[List[str]], None]] = None,
+    start: Optional[float] = None,
+) -> Tuple[int, str]:
+    """Run clang-tidy on already resolved hook arguments.
+
+    Long-running callers parse their arguments and resolve clang-tidy once,
+    then call this for each group of files.  ``start`` is when the run began,
+    for --time-budget.
+    """
+    if start is None:
+        start = time.monotonic()
     compile_db_path, error = _resolve_compile_db(hook_args, other_args)
     if error is not None:
         return error
@@ -247,12 +1507,97 @@ def run_clang_tidy(args=None) -> Tuple[int, str]:
                 f"Using compile_commands.json from: {compile_db_path}", file=sys.stderr
             )
         other_args = ["-p", compile_db_path] + other_args
-    elif hook_args.verbose and not hook_args.no_compile_commands:
+    elif (
+        hook_args.verbose
+        and not hook_args.no_compile_commands
+        and hook_args.compile_commands != AUTO_COMPILE_DB
+    ):
         has_p = any(a == "-p" or a.startswith("-p=") for a in other_args)
         if not has_p:
             print(_compile_commands_not_found_message(), file=sys.stderr)
 
     clang_tidy_args, source_files = _split_source_files(other_args)
+    extra_files, error = listed_files(hook_args)
+    if error is not None:
+        return 1, error
+    listed = hook_args.files_from is not None or hook_args.all_files
+    if listed:
+        extra_files = [path for path in extra_files if is_source_file(path)]
+        source_files = list(dict.fromkeys(source_files + extra_files))
+        if not source_files:
+            return 0, ""
+    if source_files:
+        source_files = skip_files(hook_args, source_files)
+        if not source_files:
+            return 0, ""
+
+    # Per-file history orders files under a time budget and balances shards.
+    # A sharded run never saves it: the other shards must split the files
+    # with the same history, and its durations reach the merge via reports.
+    history = None
+    if (
+        hook_args.shard is not None
+        or hook_args.time_budget is not None
+        or hook_args.split_checks is not None
+    ):
+        history = RunHistory.load(
+            Path(hook_args.shard_history) if hook_args.shard_history else None,
+            read_only=hook_args.shard is not None,
+        )
+    if hook_args.shard is not None:
+        # Only a shared history is the same on every runner; without one the
+        # files are split by count.
+        source_files = select_shard(
+            source_files, hook_args.shard, history if hook_args.shard_history else None
+        )
+        if hook_args.verbose:
+            print(
+                f"Shard {hook_args.shard[0]}/{hook_args.shard[1]}: "
+                f"{len(source_files)} files",
+                file=sys.stderr,
+            )
+        if not source_files:
+            return _shard_result(hook_args, history, source_files, (0, ""))
+
+    if hook_args.diff or hook_args.diff_base:
+        diff_result = _restrict_to_diff(
+            source_files, hook_args.diff_base, hook_args.verbose
+        )
+        if diff_result is not None:
+            source_files, filter_arg = diff_result
+            if not source_files:
+                return 0, ""
+            clang_tidy_args.append(filter_arg)
+
+    compile_dbs = None
+    if (
+        hook_args.compile_commands == AUTO_COMPILE_DB
+        and not hook_args.no_compile_commands
+        and _compile_db_arg(clang_tidy_args) is None
+    ):
+        single_db, compile_dbs = _route_compile_dbs(source_files, hook_args.verbose)
+        if single_db is not None:
+            clang_tidy_args = ["-p", single_db] + clang_tidy_args
+
+    if hook_args.lint_db or hook_args.lint_db_rules:
+        try:
+            rules = LintRules.load(hook_args.lint_db_rules)
+        except (OSError, ValueError, TypeError) as e:
+            return 1, f"--lint-db-rules: could not read rules: {e}"
+        clang_tidy_args = _map_compile_db_arg(
+            clang_tidy_args, lambda db: lint_view(db, rules)
+        )
+        if compile_dbs is not None:
+            views = {db: lint_view(db, rules) for db in set(compile_dbs.values()) if db}
+            compile_dbs = {f: views.get(db) for f, db in compile_dbs.items()}
+
+    inferred = None
+    if hook_args.infer_commands:
+        inferred = _infer_commands(
+            source_files,
+            compile_dbs or {f: _compile_db_arg(clang_tidy_args) for f in source_files},
+            hook_args.verbose,
+        )
 
     if (
         hook_args.fix
@@ -262,28 +1607,160 @@ def run_clang_tidy(args=None) -> Tuple[int, str]:
         clang_tidy_args.append("-fix")
 
     # Parallel execution is unsafe when arguments include flags that write to a
-    # shared output path (e.g., --export-fixes fixes.yaml) or that apply in-place
-    # fixes (-fix, -fix-errors), since multiple clang-tidy processes may attempt
-    # to modify the same header file concurrently.
+    # shared output path (e.g., --export-fixes fixes.yaml).  In-place fixes
+    # (-fix, -fix-errors) run in parallel by exporting per-job fixes that are
+    # merged afterwards, except with a format style (--format-style or
+    # FormatStyle in .clang-tidy), whose reformatting of the fixed code only
+    # clang-tidy itself can apply.
+    fix_mode = any(arg in FIX_ARGS for arg in clang_tidy_args)
     unsafe_parallel = any(
         arg == "--export-fixes"
         or arg.startswith("--export-fixes=")
-        or arg in ("-fix", "-fix-errors")
+        or (fix_mode and arg.lstrip("-").startswith("format-style"))
         for arg in clang_tidy_args
     )
+    if fix_mode and not unsafe_parallel:
+        unsafe_parallel = _configured_format_style(clang_tidy_args, source_files)
 
-    if hook_args.jobs > 1 and len(source_files) > 1 and not unsafe_parallel:
-        return _exec_parallel_clang_tidy(
-            ["clang-tidy"] + clang_tidy_args, source_files, hook_args.jobs
+    jobs, limiter = _resolve_jobs(hook_args.jobs, hook_args.verbose)
+    profiling = bool(hook_args.profile or hook_args.profile_json)
+    if hook_args.time_budget is not None:
+        source_files = _prioritize(source_files, history)
+    options = _RunOptions(
+        jobs=jobs,
+        limiter=limiter,
+        stream=hook_args.stream_order if hook_args.stream else None,
+        max_failures=hook_args.max_failures or (1 if hook_args.fail_fast else None),
+        timeout=hook_args.timeout,
+        deadline=(
+            None if hook_args.time_budget is None else start + hook_args.time_budget
+        ),
+        history=history,
+        batch=hook_args.batch,
+        compile_db=_compile_db_arg(clang_tidy_args),
+        compile_dbs=compile_dbs,
+        inferred=inferred,
+        max_output=hook_args.max_output,
+        limits=_resource_limits(hook_args),
+        jobserver=_connect_jobserver(jobs, hook_args.jobserver, hook_args.verbose),
+        coordinator=_join_coordinator(jobs, hook_args.coordinate, hook_args.verbose),
+        prepare=prepare,
+    )
+    result_cache = cache_from_args(hook_args)
+    if result_cache is not None and not (fix_mode or profiling or hook_args.batch):
+        version = tool_version("clang-tidy")
+        if version is not None:
+            options = options._replace(
+                cache=_TidyCache(
+                    result_cache,
+                    version,
+                    [options.compile_db, *(compile_dbs or {}).values()],
+                )
+            )
+        elif hook_args.verbose:
+            print("Result cache disabled: clang-tidy version unknown", file=sys.stderr)
+    # Split jobs would share one --export-fixes file, so fixes are not split.
+    if history is not None and hook_args.split_checks is not None and not fix_mode:
+        options = options._replace(
+            splitter=_check_splitter(
+                source_files,
+                history,
+                options.cache,
+                hook_args.split_checks,
+                hook_args.split_threshold,
+            )
+        )
+    if hook_args.pch or hook_args.pch_header:
+        options = options._replace(
+            pch=_prepare_pch(
+                source_files, options, hook_args.pch_header, hook_args.verbose
+            )
         )
+    timed = options.timeout is not None or options.deadline is not None
+    # Streaming, fail-fast, time limits, per-file history, the result cache,
+    # per-file compile databases and formatting each file just before it is
+    # checked need one job per file, so they use the per-file path even with a
+    # single worker.  So do file lists, which may not fit on one command line.
+    per_file = (
+        (
+            jobs > 1
+            or options.stream is not None
+            or options.max_failures is not None
+            or timed
+            or history is not None
+            or options.cache is not None
+            or options.compile_dbs is not None
+            or bool(options.inferred)
+            or bool(options.pch)
+            or prepare is not None
+            or listed
+        )
+        and len(source_files)
+        > (
+            0
+            if timed
+            or history is not None
+            or options.cache
+            or options.splitter
+            or prepare
+            else 1
+        )
+        and not unsafe_parallel
+    )
+
+    profile_dir = None
+    if profiling:
+        profile_dir = tempfile.mkdtemp(prefix="cpp-linter-hooks-profile-")
+        clang_tidy_args += [
+            "--enable-check-profile",
+            f"--store-check-profile={profile_dir}",
+        ]
+    if prepare is not None and not per_file:
+        prepare(source_files)
+    try:
+        if per_file and fix_mode:
+            result = _exec_parallel_fix(clang_tidy_args, source_files, options)
+        elif per_file:
+            result = _exec_parallel_clang_tidy(
+                ["clang-tidy"] + clang_tidy_args, source_files, options
+            )
+        elif options.compile_dbs is not None:
+            result = _combine_outputs(
+                _exec_serial(
+                    _with_compile_db(
+                        ["clang-tidy"]
+                        + clang_tidy_args
+                        + [source_files[idx] for idx in group],
+                        compile_db,
+                    ),
+                    options,
+                )
+                for compile_db, group in _db_groups(source_files, options.compile_dbs)
+            )
+        else:
+            result = _exec_serial(
+                ["clang-tidy"] + clang_tidy_args + source_files, options
+            )
+        if profile_dir is not None:
+            _report_profile(Path(profile_dir), hook_args.profile_json)
+    finally:
+        if profile_dir is not None:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        if options.jobserver is not None:
+            options.jobserver.close()
+        if options.coordinator is not None:
+            options.coordinator.close()
 
-    return _exec_clang_tidy(["clang-tidy"] + clang_tidy_args + source_files)
+    if not isinstance(hook_args.jobs, int):
+        _record_peak_rss()
+    return _shard_result(hook_args, history, source_files, result)
 
 
 def main() -> int:
     """Run clang-tidy as a command-line entry point."""
     retval, output = run_clang_tidy()
-    if retval != 0:
+    # Streamed runs have already printed their output.
+    if retval != 0 and output.strip():
         print(output)
     return retval
 
@@ -0,0 +1,216 @@
+"""Find the compile databases of a source tree and route files to them."""
+
+import json
+import os
+import shlex
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.history import cache_dir
+from cpp_linter_hooks.util import COMPILE_DB_FILE, atomic_write
+
+DISCOVERY_FILE = "compile-dbs.json"
+# How deep below the root build directories are looked for.
+MAX_DEPTH = 4
+_SKIP_DIRS = {"node_modules", "__pycache__", "venv"}
+
+
+def _split_windows(command: str) -> List[str]:
+    """Split a command line the way Windows programs parse their arguments.
+
+    Backslashes are literal unless they precede a double quote: ``2n``
+    backslashes and a quote give ``n`` backslashes and toggle quoting,
+    ``2n+1`` give ``n`` backslashes and a literal quote.
+    """
+    arguments: List[str] = []
+    current: List[str] = []
+    in_word = in_quotes = False
+    idx = 0
+    while idx < len(command):
+        char = command[idx]
+        if char == "\\":
+            end = idx
+            while end < len(command) and command[end] == "\\":
+                end += 1
+            count = end - idx
+            if end < len(command) and command[end] == '"':
+                current.append("\\" * (count // 2))
+                if count % 2:
+                    current.append('"')
+                    end += 1
+            else:
+                current.append("\\" * count)
+            in_word = True
+            idx = end
+            continue
+        if char == '"':
+            if in_quotes and command[idx + 1 : idx + 2] == '"':
+                # A doubled quote inside quotes is a literal quote.
+                current.append('"')
+                idx += 1
+            else:
+                in_quotes = not in_quotes
+            in_word = True
+        elif char in " \t" and not in_quotes:
+            if in_word:
+                arguments.append("".join(current))
+                current, in_word = [], False
+        else:
+            current.append(char)
+            in_word = True
+        idx += 1
+    if in_word:
+        arguments.append("".join(current))
+    return arguments
+
+
+def split_command(command: str, windows: Optional[bool] = None) -> List[str]:
+    """Split a compile database ``command`` string into its arguments.
+
+    Windows commands (the default on Windows) keep backslashes in paths and
+    use cmd-style quoting, unlike POSIX shell words.
+    """
+    if windows if windows is not None else os.name == "nt":
+        return _split_windows(command)
+    return shlex.split(command)
+
+
+def command_arguments(entry: Dict[str, Any]) -> List[str]:
+    """Return the arguments of a compile database entry."""
+    return list(entry.get("arguments") or split_command(entry.get("command", "")))
+
+
+def _walk(root: str) -> Tuple[List[str], List[str]]:
+    """Return every directory below root holding a compile database, and the
+    other directories that were searched.
+
+    Hidden directories are skipped, and build directories are not searched
+    any further once their database has been found.  A database in root
+    itself, often a link to one build tree, does not stop the search.
+    """
+    found = []
+    searched = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        relative = os.path.relpath(dirpath, root)
+        depth = 0 if relative == os.curdir else relative.count(os.sep) + 1
+        if COMPILE_DB_FILE in filenames:
+            found.append(os.path.normpath(dirpath))
+            if depth:
+                dirnames[:] = []
+                continue
+        searched.append(os.path.normpath(dirpath))
+        if depth >= MAX_DEPTH:
+            dirnames[:] = []
+        else:
+            dirnames[:] = sorted(
+                d for d in dirnames if not d.startswith(".") and d not in _SKIP_DIRS
+            )
+    return sorted(found), searched
+
+
+def _mtime(path: str) -> Optional[float]:
+    """Return the modification time of a file or directory, or None."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _db_mtime(directory: str) -> Optional[float]:
+    """Return the modification time of a directory's compile database."""
+    return _mtime(os.path.join(directory, COMPILE_DB_FILE))
+
+
+def discover(root: str, refresh: bool = False) -> List[str]:
+    """Return the absolute directories of the compile databases under root.
+
+    The result is cached per root and reused while every database it lists
+    and every directory searched for more is unchanged; a new build tree
+    changes the mtime of the directory it was created in.  Pass ``refresh``
+    to search the tree again.
+    """
+    root = os.path.abspath(root)
+    path = cache_dir() / DISCOVERY_FILE
+    try:
+        cached = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cached = {}
+    if not isinstance(cached, dict):
+        cached = {}
+    entry = cached.get(root)
+    if (
+        not refresh
+        and isinstance(entry, dict)
+        and isinstance(entry.get("dbs"), dict)
+        and isinstance(entry.get("dirs"), dict)
+        and all(_db_mtime(db) == mtime for db, mtime in entry["dbs"].items())
+        and all(_mtime(d) == mtime for d, mtime in entry["dirs"].items())
+    ):
+        return sorted(entry["dbs"])
+    dbs, searched = _walk(root)
+    cached[root] = {
+        "dbs": {db: _db_mtime(db) for db in dbs},
+        "dirs": {d: _mtime(d) for d in searched},
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, json.dumps(cached, indent=2))
+    except OSError:
+        pass
+    return dbs
+
+
+class CompileDbIndex:
+    """Map files to the compile database that builds them.
+
+    A file listed in a database belongs to it.  Any other file, such as a
+    header, belongs to the database with the most specific common directory
+    of sources that contains it.
+    """
+
+    def __init__(self, dbs: Sequence[str]):
+        self.owner: Dict[str, str] = {}
+        self.roots: List[Tuple[str, str]] = []
+        for db in dbs:
+            sources = self._load(db)
+            for source in sources:
+                self.owner.setdefault(source, db)
+            if sources:
+                directories = {os.path.dirname(source) for source in sources}
+                self.roots.append((os.path.commonpath(directories), db))
+        # Longest (most specific) source roots first.
+        self.roots.sort(key=lambda item: -len(item[0]))
+
+    @staticmethod
+    def _load(db: str) -> List[str]:
+        """Return the absolute paths of the files in a compile database."""
+        try:
+            entries = json.loads(Path(db, COMPILE_DB_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        return [
+            os.path.normpath(
+                os.path.join(db, entry.get("directory", ""), entry.get("file", ""))
+            )
+            for entry in (entries if isinstance(entries, list) else [])
+            if isinstance(entry, dict)
+        ]
+
+    def route(self, path: str) -> Optional[str]:
+        """Return the database directory for a file, or None."""
+        path = os.path.normpath(os.path.abspath(path))
+        if path in self.owner:
+            return self.owner[path]
+        for root, db in self.roots:
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return db
+        return None
+
+
+def route_files(
+    source_files: Sequence[str], root: str = os.curdir
+) -> Tuple[List[str], Dict[str, Optional[str]]]:
+    """Return (databases, file -> database) for files under root."""
+    dbs = discover(root)
+    index = CompileDbIndex(dbs)
+    return dbs, {f: index.route(f) for f in source_files}
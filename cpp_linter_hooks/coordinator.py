@@ -0,0 +1,273 @@
+"""Share one job limit between the hook processes of a pre-commit run.
+
+pre-commit splits long file lists into partitions and runs a hook process
+for each at the same time.  The processes of one run elect a leader with a
+lock file; the leader serves job slots from a single pool over a Unix
+socket, so ``--jobs`` bounds clang-tidy processes across all partitions.
+"""
+
+import hashlib
+import os
+import select
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple
+
+from cpp_linter_hooks.process import JobCancelled
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+# Seconds between checks for a free slot, a closed connection or cancellation.
+POLL_INTERVAL = 0.1
+# Attempts to become the leader or join it while a leader is shutting down.
+JOIN_ATTEMPTS = 20
+_MEMBER = b"m"
+_SLOT = b"s"
+_GRANTED = b"+"
+
+
+def run_group(tool: str) -> str:
+    """Return a name shared by the hook processes of one pre-commit run."""
+    # pre-commit starts every partition of a hook from the same process.
+    return f"{os.getppid()}\0{os.path.abspath(os.curdir)}\0{tool}"
+
+
+def _paths(group: str, directory: Optional[str] = None) -> Tuple[str, str]:
+    """Return the lock file and socket paths of a group."""
+    digest = hashlib.sha256(group.encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(
+        directory or tempfile.gettempdir(),
+        f"cpp-linter-hooks-{os.getuid()}-{digest}",
+    )
+    return base + ".lock", base + ".sock"
+
+
+def _closed(conn: socket.socket) -> bool:
+    """Return whether the peer closed a connection that sends nothing else."""
+    readable, _, _ = select.select([conn], [], [], 0)
+    if not readable:
+        return False
+    try:
+        return conn.recv(1) == b""
+    except OSError:
+        return True
+
+
+class _Server:
+    """The leader's side: a pool of slots served to followers."""
+
+    def __init__(self, lock_fd: int, socket_path: str, limit: int):
+        self.lock_fd = lock_fd
+        self.socket_path = socket_path
+        self.slots = threading.BoundedSemaphore(limit)
+        self.members = 0
+        self.closing = False
+        self.cond = threading.Condition()
+        if os.path.exists(socket_path):
+            # Left behind by a leader that crashed; the lock proves it is gone.
+            os.unlink(socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(socket_path)
+        self.listener.listen(64)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def acquire(self, cancelled: Callable[[], bool]) -> None:
+        """Wait for a slot, raising JobCancelled once ``cancelled()`` is true."""
+        while not self.slots.acquire(timeout=POLL_INTERVAL):
+            if cancelled():
+                raise JobCancelled()
+
+    def _accept(self) -> None:
+        """Accept connections until the leader shuts down."""
+        while True:
+            try:
+                readable, _, _ = select.select([self.listener], [], [], POLL_INTERVAL)
+                if self.closing:
+                    return
+                if not readable:
+                    continue
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        """Handle one membership or slot connection until the peer closes it."""
+        with conn:
+            try:
+                kind = conn.recv(1)
+                if kind == _MEMBER:
+                    self._serve_member(conn)
+                elif kind == _SLOT:
+                    self._serve_slot(conn)
+            except OSError:
+                pass
+
+    def _serve_member(self, conn: socket.socket) -> None:
+        """Keep the leader alive for as long as a follower is connected."""
+        with self.cond:
+            if self.closing:
+                return
+            self.members += 1
+        try:
+            conn.sendall(_GRANTED)
+            while conn.recv(1):
+                pass
+        finally:
+            with self.cond:
+                self.members -= 1
+                self.cond.notify_all()
+
+    def _serve_slot(self, conn: socket.socket) -> None:
+        """Grant a slot, held until the follower closes the connection."""
+        try:
+            self.acquire(lambda: _closed(conn))
+        except JobCancelled:
+            return
+        try:
+            conn.sendall(_GRANTED)
+            while conn.recv(1):
+                pass
+        finally:
+            self.slots.release()
+
+    def close(self) -> None:
+        """Wait for every follower to leave, then give up leadership."""
+        with self.cond:
+            while self.members:
+                self.cond.wait()
+            self.closing = True
+        self.listener.close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        # Closing the descriptor releases the lock for the next leader.
+        os.close(self.lock_fd)
+
+
+class Coordinator:
+    """A hook process's membership in the shared job pool of its run.
+
+    The leader takes slots from the pool directly.  A follower opens one
+    connection per job and gives the slot back by closing it, so the slots
+    of a follower that crashes are returned as well.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        server: Optional[_Server] = None,
+        member: Optional[socket.socket] = None,
+    ):
+        self.socket_path = socket_path
+        self._server = server
+        self._member = member
+
+    @property
+    def leader(self) -> bool:
+        """Return whether this process serves the pool."""
+        return self._server is not None
+
+    def _request(self, cancelled: Callable[[], bool]) -> Optional[socket.socket]:
+        """Ask the leader for a slot, returning the connection that holds it.
+
+        Returns None if the leader cannot be reached, so the job runs
+        without waiting rather than not at all.
+        """
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.socket_path)
+            conn.sendall(_SLOT)
+            while True:
+                readable, _, _ = select.select([conn], [], [], POLL_INTERVAL)
+                if readable:
+                    if conn.recv(1) == _GRANTED:
+                        return conn
+                    break
+                if cancelled():
+                    conn.close()
+                    raise JobCancelled()
+        except OSError:
+            pass
+        conn.close()
+        return None
+
+    @contextmanager
+    def slot(self, cancelled: Optional[Callable[[], bool]] = None) -> Iterator[None]:
+        """Hold a slot of the shared pool for the duration of a job."""
+        check = cancelled or (lambda: False)
+        if self._server is not None:
+            self._server.acquire(check)
+            try:
+                yield
+            finally:
+                self._server.slots.release()
+            return
+        conn = self._request(check)
+        try:
+            yield
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def close(self) -> None:
+        """Leave the pool; the leader first waits for its followers."""
+        if self._server is not None:
+            self._server.close()
+        if self._member is not None:
+            self._member.close()
+
+
+def _join_leader(socket_path: str) -> Optional[socket.socket]:
+    """Register as a follower, returning the membership connection."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+        conn.sendall(_MEMBER)
+        if conn.recv(1) == _GRANTED:
+            return conn
+    except OSError:
+        pass
+    conn.close()
+    return None
+
+
+def join(
+    group: str, limit: int, directory: Optional[str] = None
+) -> Optional[Coordinator]:
+    """Become the leader of a group's pool of ``limit`` slots, or join it.
+
+    A follower uses the leader's limit.  Returns None where Unix sockets or
+    file locks are unavailable, or if no leader could be joined.
+    """
+    if fcntl is None or not hasattr(socket, "AF_UNIX"):
+        return None
+    lock_path, socket_path = _paths(group, directory)
+    for _ in range(JOIN_ATTEMPTS):
+        try:
+            lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            return None
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(lock_fd)
+            member = _join_leader(socket_path)
+            if member is not None:
+                return Coordinator(socket_path, member=member)
+            # The leader is starting up or shutting down; try again.
+            time.sleep(POLL_INTERVAL)
+            continue
+        try:
+            return Coordinator(socket_path, server=_Server(lock_fd, socket_path, limit))
+        except OSError:
+            os.close(lock_fd)
+            return None
+    return None
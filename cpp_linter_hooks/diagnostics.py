@@ -0,0 +1,133 @@
+"""Parse clang-tidy output into compact, deduplicated diagnostic records."""
+
+import re
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+_DIAGNOSTIC_RE = re.compile(
+    r"^(?P<file>.+?):(?P<line>\d+):(?P<column>\d+): "
+    r"(?P<severity>warning|error|fatal error|note|remark): "
+    r"(?P<message>.*?)(?: \[(?P<check>[^\[\]]+)\])?$"
+)
+# Per-translation-unit summary lines that carry no finding of their own.
+_BOILERPLATE_RE = re.compile(
+    r"^(?:\d+ (?:warnings?|errors?)(?: and \d+ errors?)? generated\."
+    r"|Suppressed \d+ warnings? \(.*\)\."
+    r"|Use -header-filter=.*"
+    r"|Use -system-headers .*)$"
+)
+
+
+class Diagnostic(NamedTuple):
+    """One clang-tidy finding plus its source snippet and attached notes."""
+
+    file: str
+    line: int
+    column: int
+    severity: str
+    message: str
+    check: Optional[str]
+    details: Tuple[str, ...] = ()
+
+    @property
+    def key(self) -> Tuple[str, int, int, str]:
+        """Identity used to drop the same finding reported by several TUs."""
+        return self.file, self.line, self.column, self.check or self.message
+
+    def render(self) -> str:
+        """Format the diagnostic the way clang-tidy prints it."""
+        header = f"{self.file}:{self.line}:{self.column}: {self.severity}: "
+        header += self.message
+        if self.check:
+            header += f" [{self.check}]"
+        return "\n".join((header,) + self.details)
+
+
+def parse_output(output: str) -> Iterator[Union[Diagnostic, str]]:
+    """Split clang-tidy output into diagnostics and blocks of other text.
+
+    Lines following a diagnostic header (source snippet, caret, fix-it hint
+    and notes) are attached to it until the next header, a blank line or a
+    summary line.  Summary lines such as "N warnings generated." are dropped.
+    """
+    current: Optional[Diagnostic] = None
+    details: List[str] = []
+    text: List[str] = []
+
+    def flush() -> Iterator[Union[Diagnostic, str]]:
+        """Yield whatever diagnostic or text block is being accumulated."""
+        nonlocal current
+        if current is not None:
+            yield current._replace(details=tuple(details))
+            current = None
+            details.clear()
+        if text:
+            yield "\n".join(text)
+            text.clear()
+
+    for line in output.splitlines():
+        if not line.strip() or _BOILERPLATE_RE.match(line):
+            yield from flush()
+            continue
+        match = _DIAGNOSTIC_RE.match(line)
+        if match and (match.group("severity") != "note" or current is None):
+            yield from flush()
+            current = Diagnostic(
+                match.group("file"),
+                int(match.group("line")),
+                int(match.group("column")),
+                match.group("severity"),
+                match.group("message"),
+                match.group("check"),
+            )
+        elif current is not None:
+            details.append(line)
+        else:
+            text.append(line)
+    yield from flush()
+
+
+def _render(entries: Iterable[Union[Diagnostic, str]]) -> str:
+    """Join diagnostics and text blocks back into printable output."""
+    return "\n".join(
+        entry.render() if isinstance(entry, Diagnostic) else entry for entry in entries
+    )
+
+
+class DiagnosticCollector:
+    """Accumulate output from many clang-tidy jobs, keeping each finding once.
+
+    Memory grows with the number of unique findings: raw job output can be
+    discarded as soon as it has been added.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, Union[Diagnostic, str]] = {}
+
+    def add(self, output: str) -> str:
+        """Merge one job's output, returning the entries not seen before."""
+        new_entries: List[Union[Diagnostic, str]] = []
+        for entry in parse_output(output):
+            key = entry.key if isinstance(entry, Diagnostic) else entry
+            if key not in self._entries:
+                self._entries[key] = entry
+                new_entries.append(entry)
+        return _render(new_entries)
+
+    @property
+    def diagnostics(self) -> List[Diagnostic]:
+        """Return the unique diagnostics in first-seen order."""
+        return [e for e in self._entries.values() if isinstance(e, Diagnostic)]
+
+    def render(self) -> str:
+        """Return the combined, deduplicated output."""
+        return _render(self._entries.values())
@@ -0,0 +1,111 @@
+"""Turn git hunks into clang-tidy line filters for diff-restricted runs."""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+_FILE_RE = re.compile(r"^\+\+\+ (?:b/)?(?P<path>.+)$")
+_HUNK_RE = re.compile(
+    r"^@@ -\d+(?:,(?P<old>\d+))? \+(?P<start>\d+)(?:,(?P<new>\d+))? @@"
+)
+
+
+class Hunk(NamedTuple):
+    """Lines changed in one place of the new version of a file."""
+
+    start: int
+    count: int
+    # Text of removed and added lines, without the leading "-" or "+".
+    lines: Tuple[str, ...]
+
+    @property
+    def line_range(self) -> List[int]:
+        """Return the [first, last] new-file lines touched by this hunk."""
+        if self.count:
+            return [self.start, self.start + self.count - 1]
+        # A pure deletion sits between two lines; report both neighbours.
+        return [max(self.start, 1), self.start + 1]
+
+
+def parse_diff(text: str) -> Dict[str, List[Hunk]]:
+    """Parse zero-context ``git diff`` output into hunks per new file path."""
+    hunks: Dict[str, List[Hunk]] = {}
+    path = None
+    remaining = 0
+    start = count = 0
+    lines: List[str] = []
+    for line in text.splitlines():
+        if remaining > 0:
+            if line.startswith(("+", "-")):
+                lines.append(line[1:])
+                remaining -= 1
+                if remaining == 0 and path is not None:
+                    hunks[path].append(Hunk(start, count, tuple(lines)))
+            continue
+        file_match = _FILE_RE.match(line)
+        if file_match:
+            path = file_match.group("path")
+            path = None if path == "/dev/null" else path
+            if path is not None:
+                hunks.setdefault(path, [])
+            continue
+        hunk_match = _HUNK_RE.match(line)
+        if hunk_match and path is not None:
+            old = int(hunk_match.group("old") or "1")
+            start = int(hunk_match.group("start"))
+            count = int(hunk_match.group("new") or "1")
+            remaining = old + count
+            lines = []
+            if remaining == 0:
+                hunks[path].append(Hunk(start, count, ()))
+    return hunks
+
+
+def only_comments(lines: Iterable[str]) -> bool:
+    """Return whether every line is blank or part of a C/C++ comment.
+
+    Only comments that start within the given lines are recognised, so a
+    change inside a block comment opened elsewhere counts as code.
+    """
+    in_block = False
+    for line in lines:
+        text = line.strip()
+        while text:
+            if in_block:
+                end = text.find("*/")
+                if end == -1:
+                    break
+                in_block = False
+                text = text[end + 2 :].strip()
+            elif text.startswith("//"):
+                break
+            elif text.startswith("/*"):
+                in_block = True
+                text = text[2:]
+            else:
+                return False
+    return True
+
+
+def line_filter(
+    source_files: Iterable[str], hunks: Dict[str, List[Hunk]], root: str
+) -> Tuple[List[str], str, List[str]]:
+    """Restrict source files to their changed lines.
+
+    Returns the files that still need checking, a ``--line-filter`` JSON value
+    covering their changed lines, and the files that were skipped because
+    they had no changes or only changed comments.
+    """
+    kept: List[str] = []
+    skipped: List[str] = []
+    filters = []
+    for source_file in source_files:
+        name = os.path.relpath(os.path.abspath(source_file), root).replace(os.sep, "/")
+        file_hunks = [h for h in hunks.get(name, []) if not only_comments(h.lines)]
+        if not file_hunks:
+            skipped.append(source_file)
+            continue
+        kept.append(source_file)
+        filters.append({"name": name, "lines": [h.line_range for h in file_hunks]})
+    return kept, json.dumps(filters, separators=(",", ":")), skipped
@@ -0,0 +1,89 @@
+"""File lists read from a file or stdin, or enumerated from git.
+
+Long lists then reach a hook without going through the command line, so a
+whole repository can be handled by one process instead of many argv-sized
+partitions.
+"""
+
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from cpp_linter_hooks.git import tracked_files
+
+SOURCE_FILE_SUFFIXES = {
+    ".c",
+    ".cc",
+    ".cp",
+    ".cpp",
+    ".cxx",
+    ".c++",
+    ".cu",
+    ".cuh",
+    ".h",
+    ".hh",
+    ".hpp",
+    ".hxx",
+    ".h++",
+    ".ipp",
+    ".inl",
+    ".ixx",
+    ".tpp",
+    ".txx",
+}
+# --files-from value that reads the list from stdin.
+STDIN = "-"
+
+
+def is_source_file(path: str) -> bool:
+    """Return whether a path has a recognized C or C++ source suffix."""
+    return Path(path).suffix.lower() in SOURCE_FILE_SUFFIXES
+
+
+def add_file_list_arguments(parser: ArgumentParser) -> None:
+    """Add the options that pass files other than as arguments."""
+    parser.add_argument(
+        "--files-from",
+        default=None,
+        dest="files_from",
+        help="Also check the NUL-separated files listed in this file (- for stdin)",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        dest="all_files",
+        help="Also check every file tracked by git with a C or C++ suffix",
+    )
+
+
+def read_file_list(source: str) -> List[str]:
+    """Return the paths in a NUL-separated list file, or on stdin for "-".
+
+    A list without any NUL is split into lines instead.  Raises OSError if
+    the file cannot be read.
+    """
+    if source == STDIN:
+        data = sys.stdin.buffer.read()
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    text = data.decode("utf-8", errors="surrogateescape")
+    paths = text.split("\0") if "\0" in text else text.splitlines()
+    return [path for path in paths if path]
+
+
+def listed_files(hook_args) -> Tuple[List[str], Optional[str]]:
+    """Return the files named by --files-from and --all, or a user-facing error."""
+    files: List[str] = []
+    if hook_args.files_from is not None:
+        try:
+            files += read_file_list(hook_args.files_from)
+        except OSError as e:
+            return [], f"--files-from: could not read the file list: {e}"
+    if hook_args.all_files:
+        tracked = tracked_files()
+        if tracked is None:
+            return [], "--all: could not list files; not in a git repository"
+        files += [path for path in tracked if is_source_file(path)]
+    return list(dict.fromkeys(files)), None
@@ -0,0 +1,273 @@
+"""Merge and apply clang-tidy ``--export-fixes`` files from parallel jobs.
+
+This mirrors what ``clang-apply-replacements`` does for ``run-clang-tidy``:
+replacements from every job are collected, identical edits (typically the
+same header fix reported by several translation units) are dropped,
+overlapping edits are reported as conflicts and the remaining edits are
+written out in a single pass.
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from cpp_linter_hooks.util import atomic_write
+
+
+class Replacement(NamedTuple):
+    """A single byte-range edit from a clang-tidy fix."""
+
+    file_path: str
+    offset: int
+    length: int
+    text: str
+
+
+_DOUBLE_QUOTED_ESCAPES = {
+    "0": "\0",
+    "a": "\a",
+    "b": "\b",
+    "t": "\t",
+    "\t": "\t",
+    "n": "\n",
+    "v": "\v",
+    "f": "\f",
+    "r": "\r",
+    "e": "\x1b",
+    " ": " ",
+    '"': '"',
+    "/": "/",
+    "\\": "\\",
+    "N": "\x85",
+    "_": "\xa0",
+    "L": "\u2028",
+    "P": "\u2029",
+}
+_ESCAPE_RE = re.compile(r"\\(x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+
+
+def _unescape_double_quoted(value: str) -> str:
+    """Decode the escape sequences of a YAML double-quoted scalar."""
+
+    def replace(match: "re.Match[str]") -> str:
+        escape = match.group(1)
+        if len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return _DOUBLE_QUOTED_ESCAPES.get(escape, escape)
+
+    return _ESCAPE_RE.sub(replace, value)
+
+
+def _parse_scalar(value: str) -> str:
+    """Decode a plain, single-quoted or double-quoted YAML scalar."""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1].replace("''", "'")
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return _unescape_double_quoted(value[1:-1])
+    return value
+
+
+def _split_key(line: str) -> Tuple[int, str, str]:
+    """Split a YAML mapping line into (indent, key, raw value)."""
+    stripped = line.lstrip(" ")
+    indent = len(line) - len(stripped)
+    if stripped.startswith("- "):
+        stripped = stripped[2:]
+        indent += 2
+    key, _, value = stripped.partition(":")
+    return indent, key.strip(), value
+
+
+def parse_export_fixes(text: str) -> List[Replacement]:
+    """Extract the replacements of each diagnostic from an export-fixes file.
+
+    Only the ``DiagnosticMessage`` fixes are collected; fix-its attached to
+    notes are alternatives that clang-tidy does not apply either.  Relative
+    ``FilePath`` values are resolved against the diagnostic's
+    ``BuildDirectory``.
+    """
+    replacements: List[Replacement] = []
+    pending: List[Dict[str, str]] = []
+    build_dir: Optional[str] = None
+    message_indent: Optional[int] = None
+    replacements_indent: Optional[int] = None
+    current: Optional[Dict[str, str]] = None
+
+    def flush_diagnostic() -> None:
+        """Turn the buffered replacements of one diagnostic into tuples."""
+        for item in pending:
+            path = item.get("FilePath", "")
+            if not path:
+                continue
+            if not os.path.isabs(path) and build_dir:
+                path = os.path.join(build_dir, path)
+            replacements.append(
+                Replacement(
+                    os.path.normpath(os.path.abspath(path)),
+                    int(item.get("Offset", "0")),
+                    int(item.get("Length", "0")),
+                    item.get("ReplacementText", ""),
+                )
+            )
+        pending.clear()
+
+    for line in text.splitlines():
+        if not line.strip() or line.startswith(("---", "...")):
+            continue
+        indent, key, value = _split_key(line)
+        is_new_item = line.lstrip(" ").startswith("- ")
+
+        if key == "DiagnosticName" and is_new_item:
+            flush_diagnostic()
+            build_dir = None
+            message_indent = replacements_indent = None
+            current = None
+            continue
+        if key == "BuildDirectory":
+            build_dir = _parse_scalar(value)
+            continue
+        if key == "DiagnosticMessage":
+            message_indent = indent
+            continue
+        if message_indent is not None and indent <= message_indent:
+            message_indent = None
+        if replacements_indent is not None and indent <= replacements_indent:
+            replacements_indent = None
+            current = None
+        if message_indent is None:
+            continue
+        if key == "Replacements":
+            replacements_indent = indent
+            continue
+        if replacements_indent is None:
+            continue
+        if key == "FilePath" and is_new_item:
+            current = {}
+            pending.append(current)
+        if current is not None and key in (
+            "FilePath",
+            "Offset",
+            "Length",
+            "ReplacementText",
+        ):
+            current[key] = _parse_scalar(value)
+
+    flush_diagnostic()
+    return replacements
+
+
+def merge_replacements(
+    replacement_groups: Iterable[Iterable[Replacement]],
+) -> Tuple[
+    Dict[str, List[Replacement]], Dict[str, List[Tuple[Replacement, Replacement]]]
+]:
+    """Deduplicate replacements per file and find overlapping edits.
+
+    Returns ``(replacements_by_file, conflicts_by_file)``.  Files with any
+    conflict are left out of ``replacements_by_file``.
+    """
+    unique: Dict[str, Set[Replacement]] = {}
+    for group in replacement_groups:
+        for replacement in group:
+            unique.setdefault(replacement.file_path, set()).add(replacement)
+
+    merged: Dict[str, List[Replacement]] = {}
+    conflicts: Dict[str, List[Tuple[Replacement, Replacement]]] = {}
+    for file_path, replacements in unique.items():
+        ordered = sorted(replacements, key=lambda r: (r.offset, r.length, r.text))
+        clashes = []
+        for previous, current in zip(ordered, ordered[1:]):
+            overlaps = current.offset < previous.offset + previous.length
+            competing_inserts = (
+                previous.length == current.length == 0
+                and previous.offset == current.offset
+            )
+            if overlaps or competing_inserts:
+                clashes.append((previous, current))
+        if clashes:
+            conflicts[file_path] = clashes
+        else:
+            merged[file_path] = ordered
+    return merged, conflicts
+
+
+def _apply_to_content(content: bytes, replacements: List[Replacement]) -> bytes:
+    """Apply non-overlapping replacements, sorted by offset, to file content."""
+    pieces: List[bytes] = []
+    position = 0
+    for replacement in replacements:
+        pieces.append(content[position : replacement.offset])
+        pieces.append(replacement.text.encode("utf-8"))
+        position = replacement.offset + replacement.length
+    pieces.append(content[position:])
+    return b"".join(pieces)
+
+
+def format_style(dump_output: str) -> Optional[str]:
+    """Return the FormatStyle of ``--dump-config`` output, if it sets one."""
+    for line in dump_output.splitlines():
+        if line.startswith("FormatStyle:"):
+            return _parse_scalar(line.split(":", 1)[1]) or None
+    return None
+
+
+def apply_fixes(
+    replacement_groups: Iterable[Iterable[Replacement]],
+    digests: Optional[Dict[str, Optional[str]]] = None,
+) -> Tuple[int, str]:
+    """Merge replacements from several jobs and apply them to disk.
+
+    All new file contents are computed before anything is written, so a file
+    that cannot be read or has an out-of-range edit aborts the whole pass.
+    ``digests`` maps files to the SHA-256 of the content clang-tidy saw; a
+    file whose content differs now is left untouched, since the offsets of
+    its fixes no longer apply.  Returns ``(retval, message)`` where retval is
+    1 if any conflict or changed file was found.
+    """
+    merged, conflicts = merge_replacements(replacement_groups)
+
+    new_contents: Dict[str, bytes] = {}
+    changed: List[str] = []
+    for file_path, replacements in list(merged.items()):
+        try:
+            content = Path(file_path).read_bytes()
+        except OSError as e:
+            return 1, f"Fixes were not applied: {e}"
+        expected = (digests or {}).get(file_path)
+        if expected is not None and hashlib.sha256(content).hexdigest() != expected:
+            changed.append(file_path)
+            del merged[file_path]
+            continue
+        last = replacements[-1]
+        if last.offset + last.length > len(content):
+            return 1, (
+                f"Fixes were not applied: replacement at offset {last.offset} is "
+                f"beyond the end of {file_path}."
+            )
+        new_contents[file_path] = _apply_to_content(content, replacements)
+
+    for file_path, content in new_contents.items():
+        atomic_write(file_path, content)
+
+    lines = []
+    applied = sum(len(replacements) for replacements in merged.values())
+    if applied:
+        lines.append(f"Applied {applied} fixes to {len(merged)} files.")
+    for file_path in sorted(changed):
+        lines.append(
+            f"{file_path} changed while clang-tidy was running; no fixes were "
+            "applied to this file."
+        )
+    for file_path, clashes in sorted(conflicts.items()):
+        lines.append(
+            f"Conflicting fixes in {file_path}; no fixes were applied to this file:"
+        )
+        for previous, current in clashes:
+            lines.append(
+                f"  offset {previous.offset} (length {previous.length}) overlaps "
+                f"offset {current.offset} (length {current.length})"
+            )
+    return (1 if conflicts or changed else 0), "\n".join(lines)
@@ -0,0 +1,156 @@
+"""Pre-commit hook that runs clang-format and then clang-tidy in one process.
+
+Each file is formatted inside its clang-tidy job, right before it is
+checked, so the job pool, its --jobs limit and the jobserver are shared by
+both tools and clang-tidy starts on a file as soon as it is formatted.
+With --fix every file is formatted before clang-tidy starts instead.
+"""
+
+import threading
+from argparse import ArgumentParser
+from typing import List, Optional, Set, Tuple
+
+from cpp_linter_hooks import clang_format, clang_tidy
+from cpp_linter_hooks.files import (
+    add_file_list_arguments,
+    is_source_file,
+    listed_files,
+)
+from cpp_linter_hooks.generated import add_generated_arguments, skip_files
+from cpp_linter_hooks.util import resolve_install_with_diagnostics
+
+parser = ArgumentParser()
+parser.add_argument(
+    "--format-arg",
+    action="append",
+    default=[],
+    dest="format_args",
+    help="Argument for clang-format (repeat for several); other arguments go "
+    "to clang-tidy",
+)
+parser.add_argument(
+    "--format-version",
+    default=None,
+    dest="format_version",
+    help="clang-format version (defaults to --version)",
+)
+parser.add_argument("--version", default=None)
+parser.add_argument("-v", "--verbose", action="store_true")
+add_generated_arguments(parser)
+add_file_list_arguments(parser)
+
+
+class _Formatter:
+    """Format files on demand, each at most once, collecting the results."""
+
+    def __init__(self, format_args: List[str], verbose: bool):
+        self.hook_args, self.options = clang_format.parser.parse_known_args(
+            format_args + (["--verbose"] if verbose else [])
+        )
+        self.formatted: Set[str] = set()
+        self.results: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, files: List[str]) -> None:
+        """Format the files not formatted yet."""
+        with self._lock:
+            files = [path for path in files if path not in self.formatted]
+            self.formatted.update(files)
+        if not files:
+            return
+        result = clang_format.format_files(self.hook_args, self.options + files)
+        with self._lock:
+            self.results.append(result)
+
+    def finish(self) -> Tuple[int, str]:
+        """Return the combined (retval, output) of every clang-format run."""
+        retval = max((retval for retval, _ in self.results), default=0)
+        output = "\n".join(output for _, output in self.results if output.strip())
+        return retval, output
+
+
+def resolve_tools(
+    format_version: Optional[str], tidy_version: Optional[str], verbose: bool
+) -> Optional[str]:
+    """Resolve both tools, returning the first error, if any.
+
+    They are resolved one after the other, since installing either one may
+    write to the same environment.
+    """
+    for tool, version in (
+        ("clang-format", format_version),
+        ("clang-tidy", tidy_version),
+    ):
+        _, error = resolve_install_with_diagnostics(tool, version, verbose)
+        if error is not None:
+            return error
+    return None
+
+
+def _report(tool: str, result: Tuple[int, str]) -> str:
+    """Return a tool's output under a heading, or nothing if it passed quietly."""
+    retval, output = result
+    if retval == 0 or not output.strip():
+        return ""
+    return f"{tool}:\n{output.strip()}"
+
+
+def run_format_tidy(args=None) -> Tuple[int, str]:
+    """Format files with clang-format, then check them with clang-tidy."""
+    hook_args, other_args = parser.parse_known_args(args)
+    format_version = hook_args.format_version or hook_args.version
+    error = resolve_tools(format_version, hook_args.version, hook_args.verbose)
+    if error is not None:
+        return 1, error
+
+    tidy_args, files = clang_format.split_files(other_args)
+    extra_files, error = listed_files(hook_args)
+    if error is not None:
+        return 1, error
+    if hook_args.files_from is not None or hook_args.all_files:
+        files = list(dict.fromkeys(files + extra_files))
+        if not files:
+            return 0, ""
+    if files:
+        files = skip_files(hook_args, files)
+        if not files:
+            return 0, ""
+
+    formatter = _Formatter(hook_args.format_args, hook_args.verbose)
+    if hook_args.verbose:
+        tidy_args = ["--verbose"] + tidy_args
+    tidy_hook_args, tidy_args = clang_tidy.parser.parse_known_args(tidy_args)
+    sources = [path for path in files if is_source_file(path)]
+    prepare: Optional[_Formatter] = formatter
+    if tidy_hook_args.fix or any(arg in clang_tidy.FIX_ARGS for arg in tidy_args):
+        # Fixes are exported against the content each job sees, so a header
+        # formatted by a later job would shift their offsets: format first.
+        formatter(files)
+        prepare = None
+    tidy_result = (0, "")
+    if sources:
+        tidy_result = clang_tidy.check_files(
+            tidy_hook_args, tidy_args + sources, prepare=prepare
+        )
+    # Files clang-tidy skipped or did not get to are still formatted.
+    formatter(files)
+    format_result = formatter.finish()
+
+    retval = max(format_result[0], tidy_result[0])
+    reports = [
+        _report("clang-format", format_result),
+        _report("clang-tidy", tidy_result),
+    ]
+    return retval, "\n\n".join(report for report in reports if report)
+
+
+def main() -> int:
+    """Run clang-format and clang-tidy as a command-line entry point."""
+    retval, output = run_format_tidy()
+    if retval != 0 and output.strip():
+        print(output)
+    return retval
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
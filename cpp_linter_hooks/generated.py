@@ -0,0 +1,197 @@
+"""Skip generated and oversized files before any clang tool is started."""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.history import cache_dir
+from cpp_linter_hooks.output import size_value
+from cpp_linter_hooks.util import atomic_write
+
+DECISIONS_FILE = "generated.json"
+# Bytes at the start of a file searched for generator markers.
+HEAD_SIZE = 4096
+CHUNK_SIZE = 1 << 20
+# Case-insensitive banners written by common code generators.
+DEFAULT_MARKERS = (
+    "@generated",
+    "do not edit",
+    "generated by the protocol buffer compiler",
+    "a bison parser, made by gnu bison",
+    "a lexical scanner generated by flex",
+    "automatically generated",
+    "code generated by",
+)
+
+
+class GeneratedFilter:
+    """Decide which files to leave out, remembering decisions by file stat.
+
+    Only the first HEAD_SIZE bytes are mapped and searched for markers, and
+    lines are only counted for files that pass the size limit, so unchanged
+    files cost one stat() call on later runs.
+    """
+
+    def __init__(
+        self,
+        markers: Sequence[str] = DEFAULT_MARKERS,
+        max_size: Optional[int] = None,
+        max_lines: Optional[int] = None,
+        path: Optional[str] = None,
+    ):
+        self.markers = tuple(marker.lower().encode("utf-8") for marker in markers)
+        self.max_size = max_size
+        self.max_lines = max_lines
+        self.path = path or str(cache_dir() / DECISIONS_FILE)
+        settings = json.dumps([list(markers), max_size, max_lines])
+        self.settings = hashlib.sha256(settings.encode("utf-8")).hexdigest()
+        self._decisions: Optional[Dict[str, list]] = None
+        self._changed = False
+
+    def _scan(self, path: str, size: int) -> Optional[str]:
+        """Return why a file should be skipped, or None to keep it."""
+        if self.max_size is not None and size > self.max_size:
+            return f"{size} bytes"
+        if size == 0:
+            return None
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            head = mapped[:HEAD_SIZE].lower()
+            marker = next((m for m in self.markers if m in head), None)
+            if marker is not None:
+                return f"marker '{marker.decode('utf-8')}'"
+            if self.max_lines is None:
+                return None
+            lines = 0
+            for offset in range(0, size, CHUNK_SIZE):
+                lines += mapped[offset : offset + CHUNK_SIZE].count(b"\n")
+                if lines > self.max_lines:
+                    return f"more than {self.max_lines} lines"
+        return None
+
+    def _load(self) -> Dict[str, list]:
+        """Return the remembered decisions made with the current settings."""
+        if self._decisions is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            valid = isinstance(data, dict) and data.get("settings") == self.settings
+            files = data.get("files") if valid else None
+            self._decisions = files if isinstance(files, dict) else {}
+        return self._decisions
+
+    def reason(self, path: str) -> Optional[str]:
+        """Return why a file should be skipped, or None to check it."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.abspath(path)
+        decisions = self._load()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        cached = decisions.get(key)
+        if isinstance(cached, list) and cached[:2] == stamp:
+            return cached[2]
+        try:
+            reason = self._scan(path, stat.st_size)
+        except (OSError, ValueError):
+            return None
+        decisions[key] = stamp + [reason]
+        self._changed = True
+        return reason
+
+    def split(self, files: Sequence[str]) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Return (files to check, (skipped file, reason) pairs)."""
+        kept: List[str] = []
+        skipped: List[Tuple[str, str]] = []
+        for path in files:
+            reason = self.reason(path)
+            if reason is None:
+                kept.append(path)
+            else:
+                skipped.append((path, reason))
+        return kept, skipped
+
+    def save(self) -> None:
+        """Write new decisions back, ignoring I/O failures."""
+        if not self._changed or self._decisions is None:
+            return
+        data = {"settings": self.settings, "files": self._decisions}
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            atomic_write(self.path, json.dumps(data))
+        except OSError:
+            pass
+        self._changed = False
+
+
+def _line_count(value: str) -> int:
+    """Parse a positive number of lines for --max-lines."""
+    try:
+        lines = int(value)
+    except ValueError:
+        lines = 0
+    if lines < 1:
+        raise ArgumentTypeError(f"expected a positive number of lines, not '{value}'")
+    return lines
+
+
+def add_generated_arguments(parser: ArgumentParser) -> None:
+    """Add the generated and oversized file options shared by the hooks."""
+    parser.add_argument(
+        "--skip-generated",
+        action="store_true",
+        dest="skip_generated",
+        help="Skip files whose first lines carry a code generator marker",
+    )
+    parser.add_argument(
+        "--generated-marker",
+        action="append",
+        default=[],
+        dest="generated_markers",
+        help="Extra case-insensitive generator marker (implies --skip-generated)",
+    )
+    parser.add_argument(
+        "--max-file-size",
+        type=size_value,
+        default=None,
+        dest="max_file_size",
+        help="Skip files larger than this (e.g. 512k)",
+    )
+    parser.add_argument(
+        "--max-lines",
+        type=_line_count,
+        default=None,
+        dest="max_lines",
+        help="Skip files with more lines than this",
+    )
+
+
+def skip_files(hook_args, files: List[str]) -> List[str]:
+    """Drop the files the hook options ask to skip, reporting them if verbose."""
+    markers: Tuple[str, ...] = ()
+    if hook_args.skip_generated or hook_args.generated_markers:
+        markers = DEFAULT_MARKERS + tuple(hook_args.generated_markers)
+    if not markers and hook_args.max_file_size is None and hook_args.max_lines is None:
+        return files
+    generated_filter = GeneratedFilter(
+        markers, hook_args.max_file_size, hook_args.max_lines
+    )
+    kept, skipped = generated_filter.split(files)
+    generated_filter.save()
+    if hook_args.verbose and skipped:
+        print(
+            "Skipping generated or oversized files:\n"
+            + "\n".join(f"  {path} ({reason})" for path, reason in skipped),
+            file=sys.stderr,
+        )
+    return kept
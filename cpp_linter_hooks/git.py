@@ -0,0 +1,75 @@
+"""Small read-only helpers around the git command line."""
+
+import os
+import subprocess
+from typing import List, Optional
+
+
+def _git(args: List[str]) -> Optional[str]:
+    """Run a git command and return its stdout, or None if it fails."""
+    try:
+        result = subprocess.run(
+            ["git"] + args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def _split_z(output: str) -> List[str]:
+    """Split NUL-terminated git output into paths."""
+    return [path for path in output.split("\0") if path]
+
+
+def toplevel() -> Optional[str]:
+    """Return the root of the current work tree, or None outside a repository."""
+    output = _git(["rev-parse", "--show-toplevel"])
+    return output.strip() if output else None
+
+
+def staged_files() -> List[str]:
+    """Return absolute paths of files with staged changes."""
+    root = toplevel()
+    output = _git(["diff", "--cached", "--name-only", "-z"])
+    if root is None or output is None:
+        return []
+    return [os.path.normpath(os.path.join(root, path)) for path in _split_z(output)]
+
+
+def tracked_files() -> Optional[List[str]]:
+    """Return the files git tracks under the current directory, relative to it.
+
+    Returns None outside a repository.
+    """
+    output = _git(["ls-files", "-z"])
+    return None if output is None else _split_z(output)
+
+
+def staged_diff(base: Optional[str] = None) -> Optional[str]:
+    """Return the zero-context diff of the index against ``base`` (or HEAD).
+
+    Whitespace-only changes are left out, and paths always carry the
+    ``a/`` and ``b/`` prefixes whatever the user's diff settings.  Returns
+    None outside a repository or when ``base`` is not a valid revision.
+    """
+    args = [
+        "-c",
+        "core.quotepath=off",
+        "diff",
+        "--cached",
+        "--src-prefix=a/",
+        "--dst-prefix=b/",
+        "--unified=0",
+        "--no-color",
+        "--no-ext-diff",
+        "--ignore-all-space",
+        "--ignore-blank-lines",
+    ]
+    if base:
+        args.append(base)
+    return _git(args + ["--"])
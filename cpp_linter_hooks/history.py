@@ -0,0 +1,115 @@
+"""Persistent statistics from earlier hook runs, used to tune later runs."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from cpp_linter_hooks.git import toplevel
+from cpp_linter_hooks.util import atomic_write
+
+HISTORY_FILE = "history.json"
+PEAK_RSS_SAMPLES = 10
+# Per-file entries kept, least recently updated dropped first.
+MAX_FILE_ENTRIES = 10_000
+
+
+def cache_dir() -> Path:
+    """Return the directory used for cpp-linter-hooks state and caches."""
+    override = os.environ.get("CPP_LINTER_HOOKS_CACHE_DIR")
+    if override:
+        return Path(override)
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+    return base / "cpp-linter-hooks"
+
+
+class RunHistory:
+    """Small JSON store of measurements collected from previous runs."""
+
+    def __init__(self, path: Optional[Path] = None, read_only: bool = False):
+        self.path = path or cache_dir() / HISTORY_FILE
+        # A read-only history records measurements in memory but never saves.
+        self.read_only = read_only
+        self.data: Dict[str, Any] = {}
+        # Root of the work tree files are keyed under, found on first use.
+        self._root: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None, read_only: bool = False) -> "RunHistory":
+        """Load history from disk, starting empty if it is missing or corrupt."""
+        history = cls(path, read_only)
+        try:
+            data = json.loads(history.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return history
+        if isinstance(data, dict):
+            history.data = data
+        return history
+
+    def save(self) -> None:
+        """Atomically write history back to disk, ignoring I/O failures."""
+        if self.read_only:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.path, json.dumps(self.data))
+        except OSError:
+            pass
+
+    @property
+    def peak_rss(self) -> Optional[int]:
+        """Return the largest per-job peak RSS (bytes) among recent runs."""
+        samples: List[int] = self.data.get("peak_rss", [])
+        return max(samples) if samples else None
+
+    def record_peak_rss(self, peak_rss: int) -> None:
+        """Remember the per-job peak RSS (bytes) observed in this run."""
+        samples: List[int] = self.data.get("peak_rss", [])
+        self.data["peak_rss"] = (samples + [peak_rss])[-PEAK_RSS_SAMPLES:]
+
+    def file_key(self, path: str) -> str:
+        """Return the key a source file's entry is stored under.
+
+        Files in the git work tree are keyed by their path in it, so a
+        history shared between checkouts in different places still matches.
+        Other files are keyed by their absolute path.
+        """
+        if self._root is None:
+            root = toplevel()
+            self._root = os.path.realpath(root) if root else ""
+        path = os.path.abspath(path)
+        if self._root:
+            try:
+                relative = os.path.relpath(os.path.realpath(path), self._root)
+            except ValueError:
+                return path
+            if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+                return Path(relative).as_posix()
+        return path
+
+    def file_stats(self, path: str) -> Dict[str, Any]:
+        """Return the recorded duration and failure streak for a source file."""
+        return self.data.get("files", {}).get(self.file_key(path), {})
+
+    def record_file(
+        self, path: str, duration: float, failed: Optional[bool] = None
+    ) -> None:
+        """Remember how long a file took and whether it failed in this run.
+
+        With ``failed=None`` only the duration is updated.
+        """
+        self.record_key(self.file_key(path), duration, failed)
+
+    def record_key(
+        self, key: str, duration: float, failed: Optional[bool] = None
+    ) -> None:
+        """Like ``record_file``, for a key from ``file_key``."""
+        files: Dict[str, Dict[str, Any]] = self.data.setdefault("files", {})
+        previous = files.pop(key, {})
+        failures = previous.get("failures", 0)
+        if failed is not None:
+            failures = failures + 1 if failed else 0
+        files[key] = {"duration": round(duration, 3), "failures": failures}
+        for stale in list(files)[: max(0, len(files) - MAX_FILE_ENTRIES)]:
+            del files[stale]
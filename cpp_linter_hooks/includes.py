@@ -0,0 +1,87 @@
+"""Find the project headers a translation unit includes, for cache keys."""
+
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_INCLUDE_RE = re.compile(
+    rb'^[ \t]*#[ \t]*(?:include|include_next|import)[ \t]*([<"])([^>"\r\n]+)[>"]',
+    re.MULTILINE,
+)
+# Options that add a directory to the quoted or to every include search path.
+_QUOTE_DIR_OPTIONS = ("-iquote",)
+_DIR_OPTIONS = ("-I", "-isystem", "-idirafter", "/I")
+
+
+def include_dirs(
+    flags: Sequence[str], directory: str = ""
+) -> Tuple[List[str], List[str]]:
+    """Return (quoted-only, all-include) search directories from compile flags."""
+    quote_dirs: List[str] = []
+    dirs: List[str] = []
+    pending: Optional[List[str]] = None
+    for flag in flags:
+        if pending is not None:
+            pending.append(os.path.join(directory, flag))
+            pending = None
+            continue
+        for options, target in ((_QUOTE_DIR_OPTIONS, quote_dirs), (_DIR_OPTIONS, dirs)):
+            option = next((o for o in options if flag.startswith(o)), None)
+            if option is None:
+                continue
+            if flag == option:
+                pending = target
+            else:
+                target.append(os.path.join(directory, flag[len(option) :]))
+            break
+    return quote_dirs, dirs
+
+
+class HeaderScanner:
+    """Resolve ``#include`` directives transitively, caching parsed files.
+
+    Every directive is followed regardless of preprocessor conditions, and
+    headers that cannot be found (usually system headers) are ignored, so
+    the result over-approximates the project headers a file depends on.
+    """
+
+    def __init__(self) -> None:
+        self._includes: Dict[str, List[Tuple[bytes, str]]] = {}
+
+    def _parse(self, path: str) -> List[Tuple[bytes, str]]:
+        """Return the (delimiter, name) of each include directive in a file."""
+        if path not in self._includes:
+            try:
+                with open(path, "rb") as f:
+                    content = f.read()
+            except OSError:
+                content = b""
+            self._includes[path] = [
+                (match.group(1), match.group(2).decode("utf-8", "replace"))
+                for match in _INCLUDE_RE.finditer(content)
+            ]
+        return self._includes[path]
+
+    def dependencies(
+        self,
+        source: str,
+        quote_dirs: Sequence[str] = (),
+        dirs: Sequence[str] = (),
+    ) -> List[str]:
+        """Return the sorted paths of headers reachable from a source file."""
+        seen = set()
+        pending = [os.path.normpath(source)]
+        while pending:
+            current = pending.pop()
+            for delimiter, name in self._parse(current):
+                search = list(dirs)
+                if delimiter == b'"':
+                    search = [os.path.dirname(current)] + list(quote_dirs) + search
+                for candidate_dir in search:
+                    candidate = os.path.normpath(os.path.join(candidate_dir, name))
+                    if os.path.isfile(candidate):
+                        if candidate not in seen:
+                            seen.add(candidate)
+                            pending.append(candidate)
+                        break
+        return sorted(seen)
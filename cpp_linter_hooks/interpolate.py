@@ -0,0 +1,236 @@
+"""Infer compile commands for files missing from a compile database.
+
+Like clangd, a header or an orphan source file borrows the command of the
+closest translation unit in the database: preferably one with the same
+file name stem nearby, otherwise one in the nearest enclosing directory,
+always favouring entries of the same language.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.compile_db import command_arguments
+from cpp_linter_hooks.util import COMPILE_DB_FILE
+
+C = "c"
+CXX = "c++"
+CUDA = "cuda"
+_LANGUAGES = {
+    ".c": C,
+    ".cc": CXX,
+    ".cp": CXX,
+    ".cpp": CXX,
+    ".cxx": CXX,
+    ".c++": CXX,
+    ".ixx": CXX,
+    ".hh": CXX,
+    ".hpp": CXX,
+    ".hxx": CXX,
+    ".h++": CXX,
+    ".ipp": CXX,
+    ".inl": CXX,
+    ".tpp": CXX,
+    ".txx": CXX,
+    ".cu": CUDA,
+    ".cuh": CUDA,
+}
+_HEADER_SUFFIXES = {
+    ".h",
+    ".hh",
+    ".hpp",
+    ".hxx",
+    ".h++",
+    ".ipp",
+    ".inl",
+    ".tpp",
+    ".txx",
+    ".cuh",
+}
+# Options that name a path, either joined (-Idir) or as the next argument.
+_PATH_OPTIONS = ("-I", "-isystem", "-iquote", "-idirafter", "-include", "-imacros")
+# Options dropped when a command is transferred to another file.
+_OUTPUT_OPTIONS = ("-o", "-MF", "-MT", "-MQ", "-MJ")
+_DROPPED_FLAGS = ("-c", "-MD", "-MMD")
+
+
+class Entry(NamedTuple):
+    """One translation unit of a compile database."""
+
+    file: str
+    directory: str
+    arguments: Tuple[str, ...]
+
+
+def _language(path: str) -> Optional[str]:
+    """Return the language of a file, or None if its suffix is ambiguous."""
+    return _LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def _stem(path: str) -> str:
+    """Return a file name without directories and suffix, lower-cased."""
+    return os.path.splitext(os.path.basename(path))[0].lower()
+
+
+def _common_depth(a: str, b: str) -> int:
+    """Return the number of leading directories two paths share."""
+    try:
+        common = os.path.commonpath([a, b])
+    except ValueError:
+        return 0
+    return len(Path(common).parts)
+
+
+def load_entries(compile_db: str) -> List[Entry]:
+    """Read the entries of the compile_commands.json in a directory."""
+    try:
+        data = json.loads(Path(compile_db, COMPILE_DB_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    entries = []
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict):
+            continue
+        directory = item.get("directory", "")
+        arguments = command_arguments(item)
+        source = os.path.normpath(os.path.join(directory, item.get("file", "")))
+        entries.append(Entry(source, directory, tuple(arguments)))
+    return entries
+
+
+class CommandIndex:
+    """Lookup tables for finding the closest compile command of a file.
+
+    The tables are built in one pass over the database, so each lookup only
+    costs a walk up the file's directories.
+    """
+
+    def __init__(self, entries: Sequence[Entry]):
+        self.entries: Dict[str, Entry] = {}
+        self.by_stem: Dict[str, List[Entry]] = {}
+        # First entry of each language below every directory that has one.
+        self.by_dir: Dict[str, Dict[Optional[str], Entry]] = {}
+        for entry in entries:
+            if entry.file in self.entries:
+                continue
+            self.entries[entry.file] = entry
+            self.by_stem.setdefault(_stem(entry.file), []).append(entry)
+            language = _language(entry.file)
+            directory = os.path.dirname(entry.file)
+            while True:
+                languages = self.by_dir.setdefault(directory, {})
+                if language in languages:
+                    break
+                languages[language] = entry
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+
+    @classmethod
+    def load(cls, compile_db: str) -> "CommandIndex":
+        """Build the index of the compile database in a directory."""
+        return cls(load_entries(compile_db))
+
+    def closest(self, path: str) -> Optional[Entry]:
+        """Return the entry whose command suits a file best, or None."""
+        path = os.path.normpath(os.path.abspath(path))
+        language = _language(path)
+        wanted = [language] if language else [CXX, C, CUDA]
+        directory = os.path.dirname(path)
+        depth = len(Path(directory).parts)
+        # A translation unit with the same stem in a nearby directory, such as
+        # src/foo.cpp for include/foo.h, is most likely the right one.
+        siblings = [
+            entry
+            for entry in self.by_stem.get(_stem(path), ())
+            if _common_depth(entry.file, directory) >= depth - 1
+        ]
+        if siblings:
+            return max(
+                siblings,
+                key=lambda entry: (
+                    _language(entry.file) in wanted,
+                    _common_depth(entry.file, directory),
+                ),
+            )
+        while True:
+            languages = self.by_dir.get(directory)
+            if languages:
+                for candidate in wanted:
+                    if candidate in languages:
+                        return languages[candidate]
+                return next(iter(languages.values()))
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+
+def _absolute(path: str, directory: str) -> str:
+    """Resolve a path argument against a compile command's directory."""
+    return os.path.normpath(os.path.join(directory, path))
+
+
+def transfer(entry: Entry, path: str) -> List[str]:
+    """Adapt an entry's command line to another file.
+
+    The compiler, the input and output files and ``-c`` are dropped, include
+    paths are made absolute, and the language is set explicitly when it
+    differs from the donor's or the file is a header.
+    """
+    compiler = os.path.basename(entry.arguments[0]) if entry.arguments else ""
+    flags: List[str] = []
+    if os.path.splitext(compiler.lower())[0] in ("cl", "clang-cl"):
+        flags.append("--driver-mode=cl")
+    language = _language(path) or _language(entry.file) or CXX
+    changes_language = language != _language(entry.file)
+    args = list(entry.arguments[1:])
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        idx += 1
+        if arg in _OUTPUT_OPTIONS or arg == "-x":
+            idx += 1
+        elif arg in _DROPPED_FLAGS or arg.startswith(_OUTPUT_OPTIONS):
+            continue
+        elif arg.startswith("-x") and len(arg) > 2:
+            continue
+        elif changes_language and arg.startswith(("-std=", "--std=", "/std:")):
+            continue
+        elif _absolute(arg, entry.directory) == entry.file:
+            continue
+        elif arg in _PATH_OPTIONS and idx < len(args):
+            flags += [arg, _absolute(args[idx], entry.directory)]
+            idx += 1
+        else:
+            option = next(
+                (o for o in _PATH_OPTIONS if arg.startswith(o) and len(arg) > len(o)),
+                None,
+            )
+            if option is None:
+                flags.append(arg)
+            else:
+                flags.append(option + _absolute(arg[len(option) :], entry.directory))
+    if language != CUDA and os.path.splitext(path)[1].lower() in _HEADER_SUFFIXES:
+        flags += ["-x", f"{language}-header"]
+    elif changes_language:
+        flags += ["-x", language]
+    return flags
+
+
+def infer_commands(
+    source_files: Sequence[str], compile_db: str
+) -> Dict[str, Tuple[str, List[str]]]:
+    """Return {file: (donor file, flags)} for files missing from a database."""
+    index = CommandIndex.load(compile_db)
+    inferred = {}
+    for source_file in source_files:
+        path = os.path.normpath(os.path.abspath(source_file))
+        if path in index.entries:
+            continue
+        entry = index.closest(path)
+        if entry is not None:
+            inferred[source_file] = (entry.file, transfer(entry, path))
+    return inferred
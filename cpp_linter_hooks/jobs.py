@@ -0,0 +1,245 @@
+"""Worker-count heuristics for parallel clang-tidy runs."""
+
+import math
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+PROC_SELF_CGROUP = Path("/proc/self/cgroup")
+PRESSURE_ROOT = Path("/proc/pressure")
+MEMINFO_PATH = Path("/proc/meminfo")
+
+# A single clang-tidy process can use well over 1 GiB on template-heavy code,
+# so assume that much per job until a real measurement has been recorded.
+DEFAULT_JOB_MEMORY = 1 << 30
+# Percentage of time (avg10) stalled on a resource before workers are shed.
+PRESSURE_HIGH = 20.0
+PRESSURE_LOW = 5.0
+ADJUST_INTERVAL = 0.5
+
+
+def _cpu_count() -> int:
+    """Return the number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _cgroup_dirs(root: Path = CGROUP_ROOT) -> List[Path]:
+    """Return this process's cgroup directory and all its ancestors, innermost first."""
+    dirs: List[Path] = []
+    try:
+        for line in PROC_SELF_CGROUP.read_text().splitlines():
+            # cgroup v2 entries look like "0::/user.slice/session.scope"
+            if line.startswith("0::"):
+                parts = Path(line[3:].strip().lstrip("/")).parts
+                dirs += [
+                    root.joinpath(*parts[:depth]) for depth in range(len(parts), 0, -1)
+                ]
+    except OSError:
+        pass
+    dirs.append(root)
+    return dirs
+
+
+def _cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """Return the CPU quota imposed by cgroups, in CPUs, or None if unlimited.
+
+    A limit may be set at any level of the hierarchy, e.g. on the slice of
+    a nested container, so the smallest one wins.
+    """
+    limits = []
+    for directory in _cgroup_dirs(root):
+        try:
+            quota, period = (directory / "cpu.max").read_text().split()[:2]
+            limits.append(int(quota) / int(period))
+        except (OSError, ValueError, ZeroDivisionError):
+            # "max" is no limit at this level.
+            continue
+    if limits:
+        return min(limits)
+    try:
+        quota_v1 = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period_v1 = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota_v1 > 0 and period_v1 > 0:
+        return quota_v1 / period_v1
+    return None
+
+
+def _cgroup_memory_available(root: Path = CGROUP_ROOT) -> Optional[int]:
+    """Return the bytes left before hitting a cgroup memory limit.
+
+    Every level of the hierarchy is checked and the tightest one wins.
+    """
+    available = []
+    for directory in _cgroup_dirs(root):
+        try:
+            limit = int((directory / "memory.max").read_text())
+            current = int((directory / "memory.current").read_text())
+        except (OSError, ValueError):
+            # "max" is no limit at this level.
+            continue
+        available.append(max(0, limit - current))
+    return min(available) if available else None
+
+
+def _available_memory(
+    root: Path = CGROUP_ROOT, meminfo: Path = MEMINFO_PATH
+) -> Optional[int]:
+    """Return the memory (bytes) available to new jobs, or None if unknown."""
+    available = None
+    try:
+        for line in meminfo.read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                break
+    except (OSError, ValueError, IndexError):
+        pass
+    cgroup_available = _cgroup_memory_available(root)
+    if cgroup_available is not None:
+        available = (
+            cgroup_available if available is None else min(available, cgroup_available)
+        )
+    return available
+
+
+def _pressure(resource: str, root: Path = PRESSURE_ROOT) -> Optional[float]:
+    """Return the PSI "some avg10" stall percentage for cpu, memory or io."""
+    try:
+        text = (root / resource).read_text()
+    except OSError:
+        return None
+    for line in text.splitlines():
+        if not line.startswith("some"):
+            continue
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "avg10":
+                try:
+                    return float(value)
+                except ValueError:
+                    return None
+    return None
+
+
+def _load_average() -> Optional[float]:
+    """Return the one-minute load average, or None where unsupported."""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def child_peak_rss() -> Optional[int]:
+    """Return the largest peak RSS (bytes) of any finished child process."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if not peak:
+        return None
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def cpu_jobs() -> int:
+    """Return the CPU count, capped by any cgroup CPU quota."""
+    jobs = _cpu_count()
+    quota = _cgroup_cpu_limit()
+    if quota is not None:
+        jobs = min(jobs, max(1, math.floor(quota)))
+    return jobs
+
+
+def auto_jobs(peak_rss: Optional[int] = None) -> int:
+    """Derive a worker count from CPU quota, free memory and per-job memory use."""
+    jobs = cpu_jobs()
+    available = _available_memory()
+    if available is not None:
+        jobs = min(jobs, max(1, available // (peak_rss or DEFAULT_JOB_MEMORY)))
+    return jobs
+
+
+class AdaptiveLimiter:
+    """Gate that grows or shrinks the number of active jobs under pressure.
+
+    Worker threads enter the limiter before spawning clang-tidy.  Roughly every
+    ``ADJUST_INTERVAL`` seconds the limit is nudged down when memory or CPU
+    pressure is high, and back up towards ``maximum`` once it subsides.
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        initial: Optional[int] = None,
+        peak_rss: Optional[int] = None,
+    ):
+        self.maximum = max(1, maximum)
+        self.limit = max(1, min(self.maximum, initial or self.maximum))
+        self.active = 0
+        self._job_memory = peak_rss or DEFAULT_JOB_MEMORY
+        self._cond = threading.Condition()
+        self._last_adjust = 0.0
+
+    def _measure(self) -> int:
+        """Return -1 to shed a worker, 1 to add one or 0 to hold steady."""
+        memory = _pressure("memory")
+        available = _available_memory()
+        if (memory is not None and memory >= PRESSURE_HIGH) or (
+            available is not None and available < self._job_memory
+        ):
+            return -1
+        cpu = _pressure("cpu")
+        if cpu is None:
+            load = _load_average()
+            if load is not None and load > _cpu_count():
+                return -1
+        elif cpu >= PRESSURE_HIGH:
+            return -1
+        memory_calm = memory is None or memory < PRESSURE_LOW
+        cpu_calm = cpu is None or cpu < PRESSURE_LOW
+        room = available is None or available >= 2 * self._job_memory
+        return 1 if memory_calm and cpu_calm and room else 0
+
+    def adjust(self) -> None:
+        """Re-evaluate system pressure, at most once per adjust interval."""
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_adjust < ADJUST_INTERVAL:
+                return
+            self._last_adjust = now
+        step = self._measure()
+        if step:
+            with self._cond:
+                self.limit = max(1, min(self.maximum, self.limit + step))
+                self._cond.notify_all()
+
+    def acquire(self) -> None:
+        """Block until the current limit allows another active job."""
+        while True:
+            self.adjust()
+            with self._cond:
+                if self.active < self.limit:
+                    self.active += 1
+                    return
+                self._cond.wait(ADJUST_INTERVAL)
+
+    def release(self) -> None:
+        """Mark one active job as finished."""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def __enter__(self) -> "AdaptiveLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,151 @@
+"""Client for the GNU make jobserver, to share make's parallelism budget."""
+
+import os
+import select
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from cpp_linter_hooks.process import JobCancelled
+
+# Seconds between checks for a free token, the implicit slot or cancellation.
+POLL_INTERVAL = 0.1
+
+
+def parse_makeflags(makeflags: str) -> Optional[str]:
+    """Return the jobserver auth value (``R,W`` or ``fifo:PATH``) in MAKEFLAGS.
+
+    The last ``--jobserver-auth`` (or pre-4.2 ``--jobserver-fds``) wins, as
+    in make itself.
+    """
+    auth = None
+    for word in makeflags.split():
+        for option in ("--jobserver-auth=", "--jobserver-fds="):
+            if word.startswith(option):
+                auth = word[len(option) :]
+    return auth or None
+
+
+class JobServer:
+    """Token bucket shared with make and every other jobserver client.
+
+    Like any make child, this process owns one implicit slot, so the first
+    concurrent job runs without a token and each further one reads a token
+    from the jobserver and writes it back when it finishes.
+    """
+
+    def __init__(self, read_fd: int, write_fd: int, description: str, owned: bool):
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+        self.description = description
+        self._owned = owned
+        self._lock = threading.Lock()
+        # Only one thread waits on the jobserver at a time, so a token seen
+        # by select() is not taken by a sibling thread before it is read.
+        self._reader = threading.Lock()
+        self._implicit_free = True
+        self._tokens: List[bytes] = []
+
+    @classmethod
+    def from_auth(cls, auth: str) -> Optional["JobServer"]:
+        """Connect to the jobserver named by an auth value, or return None."""
+        if os.name == "nt":
+            # Windows jobservers use named semaphores, which are not supported.
+            return None
+        if auth.startswith("fifo:"):
+            path = auth[len("fifo:") :]
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            except OSError:
+                return None
+            return cls(fd, fd, auth, owned=True)
+        try:
+            read_fd, write_fd = (int(fd) for fd in auth.split(","))
+            os.fstat(read_fd)
+            os.fstat(write_fd)
+        except (OSError, ValueError):
+            # make only passes the pipe to children it knows to be recursive.
+            return None
+        if read_fd < 0 or write_fd < 0:
+            return None
+        try:
+            # A private, non-blocking description of the same pipe, where /proc
+            # allows it, so a token taken by another client cannot block us.
+            own_fd = os.open(f"/proc/self/fd/{read_fd}", os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return cls(read_fd, write_fd, auth, owned=False)
+        return cls(own_fd, write_fd, auth, owned=True)
+
+    @classmethod
+    def from_environment(cls) -> Optional["JobServer"]:
+        """Connect to the jobserver advertised in MAKEFLAGS, if any."""
+        auth = parse_makeflags(os.environ.get("MAKEFLAGS", ""))
+        return cls.from_auth(auth) if auth else None
+
+    def _read_token(self) -> Optional[bytes]:
+        """Wait briefly for a token, returning None if none arrived."""
+        if not self._reader.acquire(timeout=POLL_INTERVAL):
+            return None
+        try:
+            readable, _, _ = select.select([self.read_fd], [], [], POLL_INTERVAL)
+            if not readable:
+                return None
+            token = os.read(self.read_fd, 1)
+        except (BlockingIOError, InterruptedError):
+            # Another process took the token first.
+            return None
+        finally:
+            self._reader.release()
+        return token or None
+
+    def acquire(self, cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Wait for a slot, returning True if a token (not the implicit slot)
+        was taken.
+
+        Raises JobCancelled once ``cancelled()`` returns true.
+        """
+        while True:
+            with self._lock:
+                if self._implicit_free:
+                    self._implicit_free = False
+                    return False
+            if cancelled is not None and cancelled():
+                raise JobCancelled()
+            token = self._read_token()
+            if token is not None:
+                with self._lock:
+                    self._tokens.append(token)
+                return True
+
+    def release(self, used_token: bool) -> None:
+        """Give back a slot taken by acquire()."""
+        with self._lock:
+            if not used_token:
+                self._implicit_free = True
+                return
+            token = self._tokens.pop()
+        try:
+            os.write(self.write_fd, token)
+        except OSError:
+            pass
+
+    @contextmanager
+    def slot(self, cancelled: Optional[Callable[[], bool]] = None) -> Iterator[None]:
+        """Hold a jobserver slot for the duration of a job."""
+        used_token = self.acquire(cancelled)
+        try:
+            yield
+        finally:
+            self.release(used_token)
+
+    def close(self) -> None:
+        """Return any tokens still held and close descriptors opened here."""
+        with self._lock:
+            tokens, self._tokens = self._tokens, []
+        for token in tokens:
+            try:
+                os.write(self.write_fd, token)
+            except OSError:
+                pass
+        if self._owned:
+            os.close(self.read_fd)
@@ -0,0 +1,178 @@
+"""Per-job memory and CPU time limits for clang tool child processes."""
+
+import errno
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+from typing import Any, List, NamedTuple, Optional, Set
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# Seconds between the CPU time limit's SIGXCPU and the kernel's SIGKILL.
+CPU_KILL_GRACE = 5
+# Messages of LLVM tools that failed to allocate memory.
+OUT_OF_MEMORY_PATTERNS = (
+    "LLVM ERROR: out of memory",
+    "std::bad_alloc",
+    "Allocation failed",
+)
+MEMORY = "memory"
+CPU_TIME = "CPU time"
+
+
+class ResourceLimits(NamedTuple):
+    """Limits applied to each child process on its own."""
+
+    # Bytes of address space.
+    memory: Optional[int] = None
+    # Seconds of CPU time.
+    cpu_time: Optional[int] = None
+
+
+# Sets the limits in the child itself, then runs the command in its place, so
+# they are in force before the command starts.  preexec_fn would do the same
+# but is unsafe in a multithreaded parent.
+_WRAPPER = """\
+import os, resource, sys
+def limit(kind, soft, hard):
+    current = resource.getrlimit(kind)[1]
+    if current != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current), min(hard, current)
+    try:
+        resource.setrlimit(kind, (soft, hard))
+    except (OSError, ValueError):
+        pass
+memory, cpu_time, grace = (int(value) for value in sys.argv[1:4])
+if memory >= 0:
+    limit(resource.RLIMIT_AS, memory, memory)
+if cpu_time >= 0:
+    limit(resource.RLIMIT_CPU, cpu_time, cpu_time + grace)
+os.execv(sys.argv[4], sys.argv[5:])
+"""
+
+
+def supported() -> bool:
+    """Return whether limits can be applied to children here."""
+    return resource is not None and hasattr(os, "wait4") and bool(sys.executable)
+
+
+def limited_command(command: List[str], limits: ResourceLimits) -> List[str]:
+    """Return a command that runs ``command`` under the limits from its start.
+
+    Raises FileNotFoundError if the program cannot be found, like Popen.
+    """
+    if not supported():
+        return command
+    program = shutil.which(command[0])
+    if program is None:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), command[0])
+    values = [
+        -1 if limits.memory is None else limits.memory,
+        -1 if limits.cpu_time is None else limits.cpu_time,
+        CPU_KILL_GRACE,
+    ]
+    return [
+        sys.executable,
+        "-I",
+        "-S",
+        "-c",
+        _WRAPPER,
+        *(str(value) for value in values),
+        program,
+        *command,
+    ]
+
+
+def wait_usage(process: subprocess.Popen, timeout: Optional[float]) -> Any:
+    """Wait for a child like Popen.wait(), returning its resource usage.
+
+    The usage is None if it could not be collected.  Raises
+    subprocess.TimeoutExpired after ``timeout`` seconds.
+    """
+    usage: List[Any] = []
+
+    def reap() -> None:
+        try:
+            _, status, rusage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            return
+        process.returncode = os.waitstatus_to_exitcode(status)
+        usage.append(rusage)
+
+    reaper = threading.Thread(target=reap, daemon=True)
+    reaper.start()
+    reaper.join(timeout)
+    if reaper.is_alive():
+        raise subprocess.TimeoutExpired(process.args, timeout)
+    if not usage:
+        process.wait()
+        return None
+    return usage[0]
+
+
+def _peak_rss(rusage: Any) -> int:
+    """Return a child's peak resident set size in bytes."""
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere.
+    return rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count for messages, e.g. 10.2 GiB."""
+    if size < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ("KiB", "MiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+class JobLimitExceeded(Exception):
+    """Raised for a job that was stopped by one of its resource limits."""
+
+    def __init__(self, command: List[str], limit: str, peak_rss: int, cpu_time: float):
+        super().__init__(command, limit)
+        self.limit = limit
+        self.peak_rss = peak_rss
+        self.cpu_time = cpu_time
+
+    def describe(self) -> str:
+        """Summarise which limit stopped the job and what it had used."""
+        return (
+            f"{self.limit} limit exceeded "
+            f"(peak RSS {_format_size(self.peak_rss)}, CPU {self.cpu_time:.1f}s)"
+        )
+
+
+def check_usage(
+    command: List[str],
+    returncode: int,
+    rusage: Any,
+    limits: ResourceLimits,
+    found: Set[str],
+) -> None:
+    """Raise JobLimitExceeded if a failed child was stopped by a limit.
+
+    Only evidence from the limit itself counts: the CPU time limit's SIGXCPU
+    (or the SIGKILL that follows it), and for the address-space limit an
+    allocation failure, i.e. ``found`` OUT_OF_MEMORY_PATTERNS in the output.
+    Peak RSS says little about address space, so it is only reported.
+    """
+    if returncode == 0 or rusage is None:
+        return
+    cpu_time = rusage.ru_utime + rusage.ru_stime
+    peak_rss = _peak_rss(rusage)
+    if limits.cpu_time is not None and (
+        returncode == -getattr(signal, "SIGXCPU", 0)
+        or (returncode == -signal.SIGKILL and cpu_time >= limits.cpu_time)
+    ):
+        raise JobLimitExceeded(command, CPU_TIME, peak_rss, cpu_time)
+    if limits.memory is not None and found:
+        raise JobLimitExceeded(command, MEMORY, peak_rss, cpu_time)
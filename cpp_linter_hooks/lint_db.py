@@ -0,0 +1,170 @@
+"""Derive compile databases without flags that only slow clang-tidy down."""
+
+import fnmatch
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.compile_db import command_arguments
+from cpp_linter_hooks.history import cache_dir
+from cpp_linter_hooks.util import COMPILE_DB_FILE, atomic_write
+
+VIEWS_DIR = "lint-db"
+# Codegen, debug info, profiling and dependency output flags (glob patterns).
+DEFAULT_STRIP = (
+    "-flto",
+    "-flto=*",
+    "-ffat-lto-objects",
+    "-fsanitize=*",
+    "-fsanitize-*",
+    "-fno-sanitize*",
+    "-g",
+    "-g[0-3]",
+    "-ggdb*",
+    "-gdwarf*",
+    "-gsplit-dwarf",
+    "-gline-tables-only",
+    "-gcolumn-info",
+    "-gz*",
+    "-fprofile-*",
+    "-fno-profile-*",
+    "-fcs-profile-generate*",
+    "-fcoverage-*",
+    "--coverage",
+    "-fdebug-prefix-map=*",
+    "-M",
+    "-MM",
+    "-MD",
+    "-MMD",
+    "-MP",
+    "-MG",
+    "-MF*",
+    "-MT*",
+    "-MQ*",
+    "-MJ*",
+)
+# Options whose value may follow as a separate argument.
+_SEPARATE_VALUE = ("-MF", "-MT", "-MQ", "-MJ", "-include", "-imacros")
+
+
+class LintRules:
+    """Glob patterns of flags to drop and exact flags to replace.
+
+    A pattern is matched against each flag and, for options such as
+    ``-include`` that take a separate value, against ``"<option> <value>"``.
+    """
+
+    def __init__(
+        self,
+        strip: Sequence[str] = DEFAULT_STRIP,
+        rewrite: Optional[Dict[str, str]] = None,
+    ):
+        self.strip = tuple(strip)
+        self.rewrite = dict(rewrite or {})
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "LintRules":
+        """Read rules from a JSON file, or return the defaults.
+
+        The file holds ``{"strip": [...], "rewrite": {...}, "defaults": true}``;
+        its strip patterns are added to the defaults unless ``defaults`` is false.
+        """
+        if path is None:
+            return cls()
+        data: Dict[str, Any] = json.loads(Path(path).read_text(encoding="utf-8"))
+        strip = list(data.get("strip", []))
+        if data.get("defaults", True):
+            strip = list(DEFAULT_STRIP) + strip
+        return cls(strip, data.get("rewrite", {}))
+
+    def digest(self) -> str:
+        """Return a hash identifying the rule set."""
+        data = json.dumps([self.strip, sorted(self.rewrite.items())])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _stripped(self, flag: str) -> bool:
+        """Return whether a flag matches one of the strip patterns."""
+        return any(fnmatch.fnmatchcase(flag, pattern) for pattern in self.strip)
+
+    def apply(self, arguments: Sequence[str]) -> List[str]:
+        """Return a compiler command line with the rules applied.
+
+        The first argument, the compiler, is always kept.
+        """
+        result = list(arguments[:1])
+        idx = 1
+        while idx < len(arguments):
+            arg = arguments[idx]
+            if arg in _SEPARATE_VALUE and idx + 1 < len(arguments):
+                value = arguments[idx + 1]
+                if self._stripped(arg) or self._stripped(f"{arg} {value}"):
+                    idx += 2
+                    continue
+                result += [self.rewrite.get(arg, arg), value]
+                idx += 2
+                continue
+            if not self._stripped(arg):
+                result.append(self.rewrite.get(arg, arg))
+            idx += 1
+        return result
+
+
+def _lint_entry(entry: Dict[str, Any], rules: LintRules) -> Dict[str, Any]:
+    """Return a compile database entry with the rules applied to its command."""
+    arguments = command_arguments(entry)
+    lint_entry = {
+        key: value
+        for key, value in entry.items()
+        if key not in ("arguments", "command")
+    }
+    lint_entry["arguments"] = rules.apply(arguments)
+    return lint_entry
+
+
+def _stamp(compile_db: str, rules: LintRules) -> Optional[Tuple[float, int, str]]:
+    """Return what a view depends on: the database's mtime and size, and rules."""
+    try:
+        stat = os.stat(os.path.join(compile_db, COMPILE_DB_FILE))
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size, rules.digest()
+
+
+def lint_view(compile_db: str, rules: Optional[LintRules] = None) -> str:
+    """Return a directory holding a lint-optimised copy of a compile database.
+
+    Views live in the cache directory and are rebuilt only when the source
+    database or the rules change.  The original directory is returned if
+    the database cannot be read.
+    """
+    rules = rules or LintRules()
+    source = os.path.abspath(compile_db)
+    stamp = _stamp(source, rules)
+    if stamp is None:
+        return compile_db
+    view = cache_dir() / VIEWS_DIR / hashlib.sha256(source.encode("utf-8")).hexdigest()
+    stamp_path = view / "stamp.json"
+    try:
+        if json.loads(stamp_path.read_text(encoding="utf-8")) == list(stamp):
+            return str(view)
+    except (OSError, ValueError):
+        pass
+    try:
+        entries = json.loads(Path(source, COMPILE_DB_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return compile_db
+    if not isinstance(entries, list):
+        return compile_db
+    lint_entries = [_lint_entry(e, rules) for e in entries if isinstance(e, dict)]
+    try:
+        view.mkdir(parents=True, exist_ok=True)
+        for name, data in (
+            (COMPILE_DB_FILE, lint_entries),
+            ("stamp.json", list(stamp)),
+        ):
+            atomic_write(view / name, json.dumps(data, indent=2))
+    except OSError:
+        return compile_db
+    return str(view)
@@ -0,0 +1,141 @@
+"""Capture child process output with bounded memory use."""
+
+import codecs
+import tempfile
+from argparse import ArgumentParser, ArgumentTypeError
+from typing import IO, Iterable, List, Optional, Set, Tuple
+
+# Bytes of one stream kept in memory before it spills to a temporary file.
+SPILL_THRESHOLD = 1 << 20
+CHUNK_SIZE = 64 * 1024
+# Bytes of one process's output returned when --max-output is not given.
+DEFAULT_MAX_OUTPUT = 16 << 20
+
+
+def _cut(data: bytes, limit: int) -> int:
+    """Return where to cut data to at most ``limit`` bytes, at a line end."""
+    if len(data) <= limit:
+        return len(data)
+    return data.rfind(b"\n", 0, limit) + 1 or limit
+
+
+def truncation_note(omitted: int) -> str:
+    """Describe output left out because of --max-output."""
+    return f"[{omitted} more bytes of output not shown (--max-output)]"
+
+
+def truncate(text: str, limit: Optional[int]) -> Tuple[str, int]:
+    """Cut text to at most ``limit`` UTF-8 bytes, returning it and the bytes cut."""
+    if limit is None:
+        return text, 0
+    data = text.encode("utf-8", "replace")
+    cut = _cut(data, limit)
+    if cut == len(data):
+        return text, 0
+    return data[:cut].decode("utf-8", "ignore"), len(data) - cut
+
+
+class PatternScanner:
+    """Find fixed strings in text that arrives in chunks.
+
+    Only the end of the previous chunk is kept, long enough to find patterns
+    that straddle a chunk boundary, so the text itself need not be stored.
+    """
+
+    def __init__(self, patterns: Iterable[str], ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.patterns = tuple(p.lower() if ignore_case else p for p in patterns)
+        self.found: Set[str] = set()
+        self._overlap = max((len(p) for p in self.patterns), default=1) - 1
+        self._tail = ""
+
+    def copy(self) -> "PatternScanner":
+        """Return a fresh scanner for the same patterns."""
+        return PatternScanner(self.patterns, self.ignore_case)
+
+    def feed(self, text: str) -> None:
+        """Scan the next chunk of text."""
+        if self.ignore_case:
+            text = text.lower()
+        window = self._tail + text
+        for pattern in self.patterns:
+            if pattern not in self.found and pattern in window:
+                self.found.add(pattern)
+        self._tail = window[-self._overlap :] if self._overlap else ""
+
+
+class CapturedOutput:
+    """One output stream of a child, spilled to a temp file past a threshold.
+
+    Chunks are decoded incrementally and fed to the given scanners as they
+    arrive, so callers can look for known messages without keeping or
+    re-reading the whole output.
+    """
+
+    def __init__(
+        self,
+        scanners: Iterable[PatternScanner] = (),
+        threshold: int = SPILL_THRESHOLD,
+    ):
+        self.scanners: List[PatternScanner] = list(scanners)
+        self.threshold = threshold
+        self.size = 0
+        self._file = tempfile.SpooledTemporaryFile(max_size=threshold)
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    @property
+    def spilled(self) -> bool:
+        """Return whether the output grew too large to stay in memory."""
+        return self.size > self.threshold
+
+    def write(self, data: bytes) -> None:
+        """Append a chunk of output."""
+        self._file.write(data)
+        self.size += len(data)
+        if self.scanners:
+            text = self._decoder.decode(data)
+            for scanner in self.scanners:
+                scanner.feed(text)
+
+    def read_from(self, pipe: IO[bytes]) -> None:
+        """Copy a pipe into the capture until it is closed."""
+        for chunk in iter(lambda: pipe.read1(CHUNK_SIZE), b""):
+            self.write(chunk)
+
+    def text(self, limit: Optional[int] = None) -> Tuple[str, int]:
+        """Return the output, cut to ``limit`` bytes, and the bytes cut."""
+        self._file.seek(0)
+        if limit is None or self.size <= limit:
+            return self._file.read().decode("utf-8", "replace"), 0
+        data = self._file.read(limit + 1)
+        cut = _cut(data, limit)
+        return data[:cut].decode("utf-8", "ignore"), self.size - cut
+
+    def close(self) -> None:
+        """Release the in-memory buffer or temporary file."""
+        self._file.close()
+
+
+def size_value(value: str) -> int:
+    """Parse a byte count with an optional k, M or G suffix."""
+    units = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    multiplier = units.get(value[-1:].lower(), 1)
+    number = value[:-1] if multiplier > 1 else value
+    try:
+        size = int(number) * multiplier
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise ArgumentTypeError(f"expected a positive size such as 512k, not '{value}'")
+    return size
+
+
+def add_output_arguments(parser: ArgumentParser) -> None:
+    """Add the output size options shared by the hooks."""
+    parser.add_argument(
+        "--max-output",
+        type=size_value,
+        default=None,
+        dest="max_output",
+        help="Show at most this many bytes of output (e.g. 512k, 10M)",
+    )
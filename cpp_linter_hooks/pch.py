@@ -0,0 +1,233 @@
+"""Precompiled headers that spare clang-tidy re-parsing common heavy headers.
+
+Translation units with the same compile flags share one PCH of the system
+headers every one of them includes first, built with a clang matching
+clang-tidy's version.  clang-tidy gets it through ``-include-pch``; since
+those headers are included anyway and guarded, the diagnostics are the same.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.batching import load_compile_flags
+from cpp_linter_hooks.history import cache_dir
+from cpp_linter_hooks.interpolate import Entry, load_entries, transfer
+from cpp_linter_hooks.process import run_process
+from cpp_linter_hooks.util import atomic_write
+
+PCH_DIR = "pch"
+COMPILER = "clang"
+# Groups smaller than this are not worth a PCH build.
+MIN_GROUP_SIZE = 2
+# Messages of a PCH that clang-tidy cannot use.
+PCH_ERRORS = ("precompiled header", "pch file", "ast file")
+_INCLUDE_RE = re.compile(r'#\s*include\s*([<"])([^>"]+)[>"]')
+_COMMENT_RE = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+# The leading include block is looked for in this many bytes.
+_HEAD_SIZE = 16 * 1024
+
+
+def leading_includes(path: str) -> List[Tuple[str, str]]:
+    """Return the (delimiter, name) of the includes a file starts with.
+
+    The block ends at the first line that is not an include, a comment or
+    ``#pragma once``, since later includes may depend on macros.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            head = f.read(_HEAD_SIZE)
+    except OSError:
+        return []
+    includes = []
+    for line in _COMMENT_RE.sub("", head).splitlines():
+        line = line.strip()
+        if not line or line.replace(" ", "") == "#pragmaonce":
+            continue
+        match = _INCLUDE_RE.fullmatch(line)
+        if match is None:
+            break
+        includes.append((match.group(1), match.group(2)))
+    return includes
+
+
+def common_prefix(source_files: Sequence[str]) -> List[str]:
+    """Return the system headers every file includes in its leading block."""
+    blocks = [
+        [name for delimiter, name in leading_includes(path) if delimiter == "<"]
+        for path in source_files
+    ]
+    if not blocks:
+        return []
+    shared = set(blocks[0]).intersection(*blocks[1:])
+    return [name for name in dict.fromkeys(blocks[0]) if name in shared]
+
+
+def _parse_deps(text: str) -> List[str]:
+    """Return the prerequisites listed in a make-style dependency file."""
+    text = text.replace("\\\n", " ")
+    _, _, prerequisites = text.partition(": ")
+    paths = re.findall(r"(?:\\ |[^\s])+", prerequisites)
+    return [path.replace("\\ ", " ") for path in paths]
+
+
+def _stamps(paths: Sequence[str]) -> Optional[Dict[str, List[int]]]:
+    """Return the mtime and size of each file, or None if one is missing."""
+    stamps = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamps[path] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def extra_args(pch_path: str) -> List[str]:
+    """Return the clang-tidy arguments that use a PCH."""
+    return ["--extra-arg=-include-pch", f"--extra-arg={pch_path}"]
+
+
+def pch_path(command: List[str]) -> Optional[str]:
+    """Return the PCH a clang-tidy command uses, if any."""
+    if "--extra-arg=-include-pch" not in command:
+        return None
+    idx = command.index("--extra-arg=-include-pch")
+    return command[idx + 1][len("--extra-arg=") :]
+
+
+def without_pch(command: List[str]) -> List[str]:
+    """Return a clang-tidy command with its PCH arguments removed."""
+    if "--extra-arg=-include-pch" not in command:
+        return command
+    idx = command.index("--extra-arg=-include-pch")
+    return command[:idx] + command[idx + 2 :]
+
+
+def pch_failed(output: str) -> bool:
+    """Return whether clang-tidy output shows a PCH it could not use."""
+    return any(
+        "error:" in line and any(pattern in line for pattern in PCH_ERRORS)
+        for line in output.lower().splitlines()
+    )
+
+
+class PchBuilder:
+    """Build and cache the PCH of each group of compatible translation units.
+
+    A PCH is keyed by the compiler version, the compile flags and the prefix
+    header.  It is rebuilt when one of the headers it was built from changes,
+    and a failed build is remembered so it is not retried every run.
+    """
+
+    def __init__(
+        self,
+        compiler_version: str,
+        header: Optional[str] = None,
+        jobs: int = 1,
+        root: Optional[Path] = None,
+    ):
+        self.compiler_version = compiler_version
+        self.header = os.path.abspath(header) if header else None
+        self.jobs = jobs
+        self.root = root or cache_dir() / PCH_DIR
+        self.messages: List[str] = []
+
+    def _prefix(self, source_files: Sequence[str]) -> str:
+        """Return the content of the header to precompile for a group."""
+        if self.header is not None:
+            return f'#include "{self.header}"\n'
+        return "".join(f"#include <{name}>\n" for name in common_prefix(source_files))
+
+    def _build(self, entry: Entry, prefix: str) -> Optional[str]:
+        """Return the path of an up-to-date PCH for a prefix, building it if needed."""
+        suffix = ".h" if os.path.splitext(entry.file)[1].lower() == ".c" else ".hpp"
+        flags = transfer(entry, "prefix" + suffix)
+        if "--driver-mode=cl" in flags:
+            return None
+        key = hashlib.sha256(
+            json.dumps([self.compiler_version, flags, prefix]).encode("utf-8")
+        ).hexdigest()
+        directory = self.root / key
+        pch_path = directory / "prefix.pch"
+        meta_path = directory / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if _stamps(meta["deps"]) == meta["deps"]:
+                return str(pch_path) if meta["ok"] else None
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        directory.mkdir(parents=True, exist_ok=True)
+        header_path = directory / ("prefix" + suffix)
+        header_path.write_text(prefix, encoding="utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".pch.tmp")
+        os.close(fd)
+        deps_path = directory / "prefix.d"
+        # The compile flags end with -x <language>-header, which applies here.
+        command = [COMPILER, *flags, str(header_path), "-o", tmp_path]
+        command += ["-MD", "-MF", str(deps_path)]
+        try:
+            retval, output = run_process(command)
+        except OSError as e:
+            retval, output = 1, str(e)
+        ok = retval == 0
+        deps = [str(header_path)]
+        if ok:
+            os.replace(tmp_path, pch_path)
+            deps = _parse_deps(deps_path.read_text(encoding="utf-8", errors="replace"))
+        else:
+            os.unlink(tmp_path)
+            self.messages.append(
+                f"Could not build a PCH for {entry.file}; checking without one:\n"
+                + output.strip()
+            )
+        meta = {"ok": ok, "deps": _stamps(deps) or {}}
+        atomic_write(meta_path, json.dumps(meta))
+        return str(pch_path) if ok else None
+
+    def _try_build(self, entry: Entry, prefix: str) -> Optional[str]:
+        """Build a PCH like _build(), giving up on cache directory errors."""
+        try:
+            return self._build(entry, prefix)
+        except OSError as e:
+            self.messages.append(f"Could not build a PCH for {entry.file}: {e}")
+            return None
+
+    def prepare(
+        self, source_files: Sequence[str], compile_db: str
+    ) -> Dict[str, List[str]]:
+        """Return the PCH arguments for each file that can use a PCH."""
+        flags = load_compile_flags(compile_db)
+        entries = {entry.file: entry for entry in load_entries(compile_db)}
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for source_file in source_files:
+            source = os.path.normpath(os.path.abspath(source_file))
+            if source in flags and source in entries:
+                groups.setdefault(flags[source], []).append(source_file)
+        jobs = []
+        for group in groups.values():
+            if len(group) < MIN_GROUP_SIZE:
+                continue
+            prefix = self._prefix(group)
+            if prefix:
+                entry = entries[os.path.normpath(os.path.abspath(group[0]))]
+                jobs.append((group, entry, prefix))
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            built = list(pool.map(lambda job: self._try_build(*job[1:]), jobs))
+        pch_args = {}
+        for (group, _, _), pch_path in zip(jobs, built):
+            if pch_path is not None:
+                for source_file in group:
+                    pch_args[source_file] = extra_args(pch_path)
+        return pch_args
+
+
+def discard(path: str) -> None:
+    """Forget a PCH clang-tidy could not use, so the next run rebuilds it."""
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
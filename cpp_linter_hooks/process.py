@@ -0,0 +1,213 @@
+"""Run clang tool child processes that can be cancelled as a group."""
+
+import os
+import signal
+import subprocess
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from cpp_linter_hooks.limits import (
+    OUT_OF_MEMORY_PATTERNS,
+    ResourceLimits,
+    check_usage,
+    limited_command,
+    wait_usage,
+)
+from cpp_linter_hooks.output import (
+    DEFAULT_MAX_OUTPUT,
+    CapturedOutput,
+    PatternScanner,
+    truncation_note,
+)
+
+
+# Seconds a timed-out child gets to exit after SIGTERM before it is killed.
+KILL_GRACE = 5.0
+
+
+class JobCancelled(Exception):
+    """Raised for a job that was skipped or killed by a cancelled scope."""
+
+
+class JobTimedOut(Exception):
+    """Raised for a job that was killed because it exceeded its timeout."""
+
+
+class CancelScope:
+    """Track running child processes so they can all be stopped at once.
+
+    Children started inside a scope get their own process group (or console
+    process group on Windows), so cancelling also reaches any helpers they
+    spawned.  Jobs that start after cancellation are not spawned at all.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._running: Set[subprocess.Popen] = set()
+        self._killed: Set[int] = set()
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        """Return whether cancel() has been called."""
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Stop scheduling new jobs and terminate the running ones."""
+        with self._lock:
+            self._cancelled = True
+            running = list(self._running)
+            self._killed.update(process.pid for process in running)
+        for process in running:
+            _terminate(process)
+
+    def _register(self, process: subprocess.Popen) -> None:
+        """Track a started process, killing it at once if already cancelled."""
+        with self._lock:
+            if self._cancelled:
+                self._killed.add(process.pid)
+            else:
+                self._running.add(process)
+                return
+        _terminate(process)
+
+    def _finish(self, process: subprocess.Popen) -> bool:
+        """Stop tracking a process and return whether the scope killed it."""
+        with self._lock:
+            self._running.discard(process)
+            return process.pid in self._killed
+
+
+def _process_group_kwargs() -> Dict[str, Any]:
+    """Return Popen arguments that place the child in its own process group."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _terminate(process: subprocess.Popen, force: bool = False) -> None:
+    """Terminate (or with ``force`` kill) a child and its process group.
+
+    A child that was already reaped is left alone, since its pid and process
+    group id may belong to another process by now.
+    """
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == "nt" and force:
+            process.kill()
+        elif os.name == "nt":
+            process.terminate()
+        else:
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except ProcessLookupError:
+        # The group exited between the check and the signal.
+        pass
+    except OSError:
+        pass
+
+
+def _stop(process: subprocess.Popen) -> None:
+    """Terminate a child, killing it if it ignores SIGTERM, and reap it."""
+    _terminate(process)
+    try:
+        process.wait(timeout=KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        _terminate(process, force=True)
+        process.wait()
+
+
+def _combined_text(
+    stdout: CapturedOutput, stderr: CapturedOutput, max_output: Optional[int]
+) -> str:
+    """Return stdout followed by stderr, cut to ``max_output`` bytes overall."""
+    out_text, omitted = stdout.text(max_output)
+    remaining = None
+    if max_output is not None:
+        remaining = 0 if omitted else max_output - stdout.size
+    err_text, err_omitted = stderr.text(remaining)
+    text = out_text + err_text
+    omitted += err_omitted
+    if not omitted:
+        return text
+    if text and not text.endswith("\n"):
+        text += "\n"
+    return text + truncation_note(omitted)
+
+
+def run_process(
+    command: List[str],
+    scope: Optional[CancelScope] = None,
+    timeout: Optional[float] = None,
+    max_output: Optional[int] = None,
+    scanners: Sequence[PatternScanner] = (),
+    limits: Optional[ResourceLimits] = None,
+) -> Tuple[int, str]:
+    """Run a command and return (returncode, stdout followed by stderr).
+
+    Output is captured in bounded buffers that spill to temporary files, and
+    only the first ``max_output`` bytes (``DEFAULT_MAX_OUTPUT`` if None) are
+    read back and returned.  ``scanners`` see the whole output as it arrives,
+    even the part that is not returned.
+
+    Raises JobCancelled if ``scope`` was cancelled before the command could
+    start or while it was running, JobTimedOut if it ran for longer than
+    ``timeout`` seconds, and JobLimitExceeded if it was stopped by ``limits``.
+    """
+    kwargs: Dict[str, Any] = {}
+    if scope is not None and scope.cancelled:
+        raise JobCancelled(command)
+    if scope is not None or timeout is not None:
+        kwargs = _process_group_kwargs()
+    # Each stream gets its own scanners, since both are read concurrently.
+    out_of_memory = PatternScanner(OUT_OF_MEMORY_PATTERNS)
+    if limits is not None:
+        scanners = (*scanners, out_of_memory)
+    stdout = CapturedOutput(scanner.copy() for scanner in scanners)
+    stderr = CapturedOutput(scanner.copy() for scanner in scanners)
+    rusage = None
+    try:
+        with subprocess.Popen(
+            command if limits is None else limited_command(command, limits),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **kwargs,
+        ) as process:
+            if scope is not None:
+                scope._register(process)
+            readers = [
+                threading.Thread(target=capture.read_from, args=(pipe,), daemon=True)
+                for capture, pipe in (
+                    (stdout, process.stdout),
+                    (stderr, process.stderr),
+                )
+            ]
+            for reader in readers:
+                reader.start()
+            try:
+                if limits is None:
+                    process.wait(timeout=timeout)
+                else:
+                    rusage = wait_usage(process, timeout)
+            except subprocess.TimeoutExpired:
+                _stop(process)
+                raise JobTimedOut(command, timeout)
+            finally:
+                for reader in readers:
+                    reader.join()
+                killed = scope is not None and scope._finish(process)
+        if killed:
+            raise JobCancelled(command)
+        for scanner, *copies in zip(scanners, stdout.scanners, stderr.scanners):
+            for copy in copies:
+                scanner.found |= copy.found
+        if limits is not None:
+            check_usage(
+                command, process.returncode, rusage, limits, out_of_memory.found
+            )
+        if max_output is None:
+            max_output = DEFAULT_MAX_OUTPUT
+        return process.returncode, _combined_text(stdout, stderr, max_output)
+    finally:
+        stdout.close()
+        stderr.close()
@@ -0,0 +1,120 @@
+"""Thread-pool scheduling that delivers job results as soon as they finish."""
+
+import sys
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    TypeVar,
+)
+
+from cpp_linter_hooks.process import CancelScope, JobCancelled
+
+ORDERED = "ordered"
+COMPLETION = "completion"
+
+T = TypeVar("T")
+R = TypeVar("R")
+_SKIPPED = object()
+
+
+def iter_results(
+    run: Callable[[T], R],
+    items: Sequence[T],
+    jobs: int,
+    order: str = ORDERED,
+    scope: Optional[CancelScope] = None,
+) -> Iterator[Tuple[int, R]]:
+    """Run ``run(item)`` on a thread pool, yielding ``(index, result)`` pairs.
+
+    With ``ORDERED`` a result is yielded as soon as it and every earlier item
+    have finished, so output stays in input order without waiting for the
+    slowest job.  With ``COMPLETION`` results are yielded as they finish.
+
+    Once ``scope`` is cancelled, queued items are dropped and items whose
+    run raised JobCancelled are skipped; results that finished normally are
+    still yielded.
+    """
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        futures = {executor.submit(run, item): idx for idx, item in enumerate(items)}
+        finished: Dict[int, Any] = {}
+        next_idx = 0
+        for future in as_completed(futures):
+            if scope is not None and scope.cancelled:
+                for pending in futures:
+                    pending.cancel()
+            idx = futures[future]
+            try:
+                result = future.result()
+            except (CancelledError, JobCancelled):
+                result = _SKIPPED
+            if order == COMPLETION:
+                if result is not _SKIPPED:
+                    yield idx, result
+                continue
+            finished[idx] = result
+            while next_idx in finished:
+                result = finished.pop(next_idx)
+                if result is not _SKIPPED:
+                    yield next_idx, result
+                next_idx += 1
+
+
+class Progress:
+    """Single-line ``[done/total] percent ETA`` indicator for terminals.
+
+    Nothing is drawn unless the stream is interactive, so captured output
+    (for example under pre-commit) stays free of carriage-return noise.
+    """
+
+    def __init__(self, total: int, stream: Optional[TextIO] = None):
+        self.total = total
+        self.done = 0
+        self.stream = stream or sys.stderr
+        self.enabled = total > 0 and self.stream.isatty()
+        self._start = time.monotonic()
+        self._shown = False
+
+    def _eta(self) -> str:
+        """Estimate the remaining time from the average time per finished job."""
+        if not self.done:
+            return "--:--"
+        elapsed = time.monotonic() - self._start
+        remaining = int(elapsed / self.done * (self.total - self.done))
+        return f"{remaining // 60}:{remaining % 60:02d}"
+
+    def draw(self) -> None:
+        """Redraw the progress line in place."""
+        if not self.enabled:
+            return
+        percent = 100 * self.done // self.total
+        self.stream.write(
+            f"\r\033[K[{self.done}/{self.total}] {percent}% ETA {self._eta()}"
+        )
+        self.stream.flush()
+        self._shown = True
+
+    def advance(self, count: int = 1) -> None:
+        """Record finished jobs and redraw."""
+        self.done += count
+        self.draw()
+
+    def clear(self) -> None:
+        """Erase the progress line so regular output can be printed."""
+        if self._shown:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+            self._shown = False
+
+    def finish(self) -> None:
+        """Remove the progress line once all jobs are done."""
+        self.clear()
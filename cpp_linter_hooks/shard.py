@@ -0,0 +1,128 @@
+"""Split clang-tidy runs across CI nodes and merge the per-shard reports."""
+
+import json
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cpp_linter_hooks.diagnostics import DiagnosticCollector
+from cpp_linter_hooks.history import RunHistory
+
+# Assumed duration of files without history, relative to the known average.
+UNKNOWN_WEIGHT = 1.0
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a 1-based ``K/N`` shard specification."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ArgumentTypeError(f"--shard must look like K/N, not '{value}'")
+    if count < 1 or not 1 <= index <= count:
+        raise ArgumentTypeError(f"--shard needs 1 <= K <= N, not '{value}'")
+    return index, count
+
+
+def _weights(files: Sequence[str], history: Optional[RunHistory]) -> List[float]:
+    """Return the expected cost of each file from recorded durations."""
+    durations = [
+        history.file_stats(f).get("duration") if history is not None else None
+        for f in files
+    ]
+    known = [d for d in durations if d]
+    default = sum(known) / len(known) if known else UNKNOWN_WEIGHT
+    return [d if d else default for d in durations]
+
+
+def partition(
+    files: Sequence[str], count: int, history: Optional[RunHistory] = None
+) -> List[List[str]]:
+    """Deterministically split files into ``count`` shards of similar cost.
+
+    Files are placed from the most to the least expensive, each on the
+    currently cheapest shard.  Without history every file costs the same, so
+    shards differ by at most one file.  Every node must see the same files
+    and history to agree on the split.
+    """
+    weights = _weights(files, history)
+    order = sorted(range(len(files)), key=lambda idx: (-weights[idx], files[idx]))
+    loads = [0.0] * count
+    shards: List[List[str]] = [[] for _ in range(count)]
+    for idx in order:
+        target = min(range(count), key=lambda shard: (loads[shard], shard))
+        loads[target] += weights[idx]
+        shards[target].append(files[idx])
+    position = {source_file: idx for idx, source_file in enumerate(files)}
+    return [sorted(shard, key=position.__getitem__) for shard in shards]
+
+
+def select_shard(
+    files: Sequence[str], shard: Tuple[int, int], history: Optional[RunHistory] = None
+) -> List[str]:
+    """Return the files assigned to shard ``K/N``, in their original order."""
+    index, count = shard
+    return partition(files, count, history)[index - 1]
+
+
+def write_report(
+    path: str,
+    shard: Tuple[int, int],
+    result: Tuple[int, str],
+    durations: Dict[str, float],
+) -> None:
+    """Save one shard's result so it can be merged with the others."""
+    report = {
+        "shard": list(shard),
+        "retval": result[0],
+        "output": result[1],
+        "durations": durations,
+    }
+    Path(path).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+def merge_reports(paths: Sequence[str]) -> Tuple[int, str, Dict[str, float]]:
+    """Combine shard reports into (retval, deduplicated output, durations).
+
+    The highest shard exit status wins, so a timed-out shard is not hidden
+    by a shard that merely found problems.
+    """
+    retval = 0
+    collector = DiagnosticCollector()
+    durations: Dict[str, float] = {}
+    for path in paths:
+        report: Dict[str, Any] = json.loads(Path(path).read_text(encoding="utf-8"))
+        retval = max(retval, report.get("retval", 1))
+        collector.add(report.get("output", ""))
+        durations.update(report.get("durations", {}))
+    return retval, collector.render(), durations
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Merge shard reports: ``python -m cpp_linter_hooks.shard REPORT...``."""
+    parser = ArgumentParser(prog="python -m cpp_linter_hooks.shard")
+    parser.add_argument("reports", nargs="+")
+    parser.add_argument(
+        "--history",
+        default=None,
+        help="Record the merged per-file durations in this history file",
+    )
+    args = parser.parse_args(argv)
+    try:
+        retval, output, durations = merge_reports(args.reports)
+    except (OSError, ValueError) as e:
+        print(f"Could not read shard report: {e}", file=sys.stderr)
+        return 1
+    if args.history:
+        history = RunHistory.load(Path(args.history))
+        # Reports are keyed like the history, so the keys are kept as they are.
+        for key, duration in durations.items():
+            history.record_key(key, duration)
+        history.save()
+    if output.strip():
+        print(output)
+    return retval
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
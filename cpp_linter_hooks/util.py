@@ -1,11 +1,13 @@
-"""Shared helpers for resolving and installing clang tool wheels."""
+"""Shared helpers: resolving and installing clang tool wheels, and file writes."""
 
+import os
 import sys
 import shutil
 import subprocess
+import tempfile
 from pathlib import Path
 import logging
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 from functools import lru_cache
 import json
 import urllib.request
@@ -13,6 +15,36 @@ import re
 
 LOG = logging.getLogger(__name__)
 
+# Name of the compilation database file in a build directory.
+COMPILE_DB_FILE = "compile_commands.json"
+
+
+def atomic_write(path: Union[str, Path], data: Union[bytes, str]) -> None:
+    """Replace a file's content without leaving a half-written file behind.
+
+    The data goes to a temporary file in the same directory, which then
+    replaces ``path``, keeping the mode of a file already there.  Text is
+    written as UTF-8.  Raises OSError if the file cannot be written.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    directory = os.path.dirname(os.fspath(path)) or os.curdir
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=".cpp-linter-hooks-", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 @lru_cache(maxsize=4)
 def _get_pypi_versions(tool: str) -> Tuple[Optional[str], list]:
@@ -125,6 +157,12 @@ def _detect_installed_version(tool: str) -> Optional[str]:
     return match.group(1) if match else None
 
 
+@lru_cache(maxsize=4)
+def tool_version(tool: str) -> Optional[str]:
+    """Return the version of *tool* on PATH, cached for the process lifetime."""
+    return _detect_installed_version(tool)
+
+
 def _is_version_installed(tool: str, version: str) -> Optional[Path]:
     """Return the tool path if the installed version matches, otherwise None."""
     existing = shutil.which(tool)
@@ -0,0 +1,338 @@
+"""Re-check files as they are saved, until interrupted (Linux only).
+
+inotify is reached through ctypes, so watching needs no extra package.  The
+tools are resolved once and the compile databases are kept in memory, so
+after a save only the affected files are checked: the saved file, the
+translation units that include it, the files under a changed .clang-format
+or .clang-tidy and the files whose compile flags changed.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from argparse import ArgumentParser
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from cpp_linter_hooks import clang_format, clang_tidy
+from cpp_linter_hooks.batching import CONFIG_FILE, forget_configs, load_compile_flags
+from cpp_linter_hooks.clang_format import STYLE_FILES
+from cpp_linter_hooks.files import is_source_file
+from cpp_linter_hooks.format_tidy import resolve_tools
+from cpp_linter_hooks.includes import HeaderScanner, include_dirs
+from cpp_linter_hooks.util import COMPILE_DB_FILE
+
+# Files that mark a build directory, whose sources are not checked.
+BUILD_MARKERS = (COMPILE_DB_FILE, "CMakeCache.txt", "build.ninja")
+# Seconds without events after which a burst of saves is handled.
+DEBOUNCE = 0.3
+
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+parser = ArgumentParser()
+parser.add_argument(
+    "--watch-dir",
+    action="append",
+    default=[],
+    dest="watch_dirs",
+    help="Directory to watch (repeat for several; default: the current one)",
+)
+parser.add_argument(
+    "--debounce",
+    type=float,
+    default=DEBOUNCE,
+    help="Seconds without changes to wait for before checking",
+)
+parser.add_argument(
+    "--format-arg",
+    action="append",
+    default=[],
+    dest="format_args",
+    help="Argument for clang-format (repeat for several); other arguments go "
+    "to clang-tidy",
+)
+parser.add_argument(
+    "--format-version",
+    default=None,
+    dest="format_version",
+    help="clang-format version (defaults to --version)",
+)
+parser.add_argument("--version", default=None)
+parser.add_argument(
+    "--no-format", action="store_false", dest="format", help="Do not run clang-format"
+)
+parser.add_argument(
+    "--no-tidy", action="store_false", dest="tidy", help="Do not run clang-tidy"
+)
+parser.add_argument("-v", "--verbose", action="store_true")
+
+
+class Inotify:
+    """A non-blocking inotify instance watching directories.
+
+    Raises OSError if inotify is not available.
+    """
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._libc = libc
+        self.fd = self._check(libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC))
+        self.paths: Dict[int, str] = {}
+
+    @staticmethod
+    def _check(result: int) -> int:
+        """Raise OSError for a failed libc call."""
+        if result < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return result
+
+    def add_watch(self, directory: str) -> None:
+        """Watch a directory for files being written, moved and deleted."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        self.paths[self._check(wd)] = directory
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[str, int]]:
+        """Return the (path, mask) of events arriving within ``timeout``.
+
+        An overflowed event queue is reported with an empty path.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            start = offset + _EVENT.size
+            name = data[start : start + length].rstrip(b"\0")
+            offset = start + length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+            elif mask & IN_Q_OVERFLOW:
+                events.append(("", mask))
+            elif wd in self.paths:
+                directory = self.paths[wd]
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                events.append((path, mask))
+        return events
+
+    def wait(self, debounce: float) -> List[Tuple[str, int]]:
+        """Block until events arrive, then until none came for ``debounce``s."""
+        events: List[Tuple[str, int]] = []
+        while not events:
+            events = self.read(None)
+        while True:
+            more = self.read(debounce)
+            if not more:
+                return events
+            events += more
+
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class SourceTree:
+    """The sources and compile databases under the watched directories."""
+
+    def __init__(self, roots: Iterable[str], inotify: Inotify):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.inotify = inotify
+        self.sources: Set[str] = set()
+        self.build_dirs: Set[str] = set()
+        # Flags of each compile database, by the directory holding it.
+        self.flags: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        for root in self.roots:
+            self._add_directory(root)
+
+    def _add_directory(self, directory: str) -> Set[str]:
+        """Watch a directory tree, returning the sources found in it."""
+        found: Set[str] = set()
+        for current, dirs, files in os.walk(directory):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            try:
+                self.inotify.add_watch(current)
+            except OSError as e:
+                print(f"Warning: cannot watch {current}: {e}", file=sys.stderr)
+                dirs[:] = []
+                continue
+            if COMPILE_DB_FILE in files:
+                self.flags[current] = load_compile_flags(current)
+            if current not in self.roots and any(m in files for m in BUILD_MARKERS):
+                # Only the compile database of a build directory matters.
+                self.build_dirs.add(current)
+                dirs[:] = []
+                continue
+            found.update(os.path.join(current, f) for f in files if is_source_file(f))
+        self.sources |= found
+        return found
+
+    def _under(self, directory: str) -> Set[str]:
+        """Return the sources in a directory tree."""
+        prefix = os.path.join(directory, "")
+        return {path for path in self.sources if path.startswith(prefix)}
+
+    def _includers(self, headers: Set[str]) -> Set[str]:
+        """Return the translation units that include any of the headers."""
+        scanner = HeaderScanner()
+        includers = set()
+        for flags in self.flags.values():
+            for source, source_flags in flags.items():
+                if source not in self.sources or source in headers:
+                    continue
+                quote_dirs, dirs = include_dirs(
+                    source_flags[1:], source_flags[0] if source_flags else ""
+                )
+                if headers.intersection(scanner.dependencies(source, quote_dirs, dirs)):
+                    includers.add(source)
+        return includers
+
+    def update(self, events: Iterable[Tuple[str, int]]) -> Tuple[Set[str], Set[str]]:
+        """Apply events, returning the files to format and to tidy again."""
+        saved: Set[str] = set()
+        to_format: Set[str] = set()
+        to_tidy: Set[str] = set()
+        for path, mask in events:
+            removed = mask & (IN_DELETE | IN_MOVED_FROM)
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so everything may have changed.
+                self.sources.clear()
+                for root in self.roots:
+                    saved |= self._add_directory(root)
+            elif mask & IN_ISDIR:
+                if removed:
+                    self.sources -= self._under(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    saved |= self._add_directory(path)
+            elif mask & IN_CREATE:
+                # The file is not written yet; IN_CLOSE_WRITE follows.
+                continue
+            elif os.path.basename(path) == COMPILE_DB_FILE:
+                directory = os.path.dirname(path)
+                old = self.flags.pop(directory, {})
+                new = {} if removed else load_compile_flags(directory)
+                if new:
+                    self.flags[directory] = new
+                to_tidy |= {
+                    source
+                    for source in set(old) | set(new)
+                    if old.get(source) != new.get(source) and source in self.sources
+                }
+            elif os.path.basename(path) in STYLE_FILES:
+                to_format |= self._under(os.path.dirname(path))
+            elif os.path.basename(path) == CONFIG_FILE:
+                forget_configs()
+                to_tidy |= self._under(os.path.dirname(path))
+            elif is_source_file(path) and os.path.dirname(path) not in self.build_dirs:
+                if removed:
+                    self.sources.discard(path)
+                    saved.discard(path)
+                else:
+                    self.sources.add(path)
+                    saved.add(path)
+        translation_units = {
+            source for flags in self.flags.values() for source in flags
+        }
+        headers = saved - translation_units
+        if headers:
+            to_tidy |= self._includers(headers)
+        to_format |= saved
+        to_tidy |= saved
+        return (
+            {path for path in to_format if os.path.isfile(path)},
+            {path for path in to_tidy if os.path.isfile(path)},
+        )
+
+
+def _display(paths: Iterable[str]) -> List[str]:
+    """Return sorted paths, relative to the current directory when under it."""
+    cwd = os.path.join(os.getcwd(), "")
+    return sorted(
+        os.path.relpath(path) if path.startswith(cwd) else path for path in paths
+    )
+
+
+def run_watch(args=None) -> int:
+    """Watch the source tree and check affected files after every change."""
+    hook_args, other_args = parser.parse_known_args(args)
+    format_version = hook_args.format_version or hook_args.version
+    error = resolve_tools(format_version, hook_args.version, hook_args.verbose)
+    if error is not None:
+        print(error, file=sys.stderr)
+        return 1
+    try:
+        inotify = Inotify()
+    except OSError as e:
+        print(f"Watch mode needs Linux inotify: {e}", file=sys.stderr)
+        return 1
+
+    verbose = ["--verbose"] if hook_args.verbose else []
+    format_hook_args, format_options = clang_format.parser.parse_known_args(
+        ["--dry-run", *hook_args.format_args, *verbose]
+    )
+    tidy_hook_args, tidy_args = clang_tidy.parser.parse_known_args(
+        ["--stream", *other_args, *verbose]
+    )
+    try:
+        tree = SourceTree(hook_args.watch_dirs or ["."], inotify)
+        print(
+            f"Watching {len(tree.sources)} files; press Ctrl+C to stop.",
+            file=sys.stderr,
+        )
+        while True:
+            to_format, to_tidy = tree.update(inotify.wait(hook_args.debounce))
+            if not hook_args.format:
+                to_format = set()
+            if not hook_args.tidy:
+                to_tidy = set()
+            if not to_format and not to_tidy:
+                continue
+            print(
+                "Checking " + ", ".join(_display(to_format | to_tidy)),
+                file=sys.stderr,
+                flush=True,
+            )
+            if to_format:
+                _, output = clang_format.format_files(
+                    format_hook_args, format_options + _display(to_format)
+                )
+                if output.strip():
+                    print(output.rstrip("\n"), flush=True)
+            if to_tidy:
+                _, output = clang_tidy.check_files(
+                    tidy_hook_args, tidy_args + _display(to_tidy)
+                )
+                if output.strip():
+                    print(output, flush=True)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        inotify.close()
+
+
+def main() -> int:
+    """Run watch mode as a command-line entry point."""
+    return run_watch()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
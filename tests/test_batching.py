@@ -0,0 +1,97 @@
+"""Tests for cpp_linter_hooks.batching -- grouping files per clang-tidy run."""
+
+import json
+
+from cpp_linter_hooks.batching import (
+    load_compile_flags,
+    nearest_config,
+    plan_batches,
+)
+
+
+def test_nearest_config_walks_up_directories(tmp_path):
+    (tmp_path / ".clang-tidy").write_text("Checks: '*'\n")
+    (tmp_path / "lib" / "strict").mkdir(parents=True)
+    (tmp_path / "lib" / "strict" / ".clang-tidy").write_text("Checks: '-*'\n")
+
+    assert nearest_config(str(tmp_path / "lib" / "a.cpp")) == str(
+        tmp_path / ".clang-tidy"
+    )
+    assert nearest_config(str(tmp_path / "lib" / "strict" / "b.cpp")) == str(
+        tmp_path / "lib" / "strict" / ".clang-tidy"
+    )
+
+
+def test_load_compile_flags_ignores_outputs_and_source(tmp_path):
+    src = tmp_path / "src"
+    (tmp_path / "compile_commands.json").write_text(
+        json.dumps(
+            [
+                {
+                    "directory": str(tmp_path),
+                    "file": "src/a.cpp",
+                    "command": "c++ -Iinc -O2 -o a.o -c src/a.cpp",
+                },
+                {
+                    "directory": str(tmp_path),
+                    "file": str(src / "b.cpp"),
+                    "arguments": ["c++", "-Iinc", "-O2", "-ob.o", "-c", "src/b.cpp"],
+                },
+                {
+                    "directory": str(tmp_path),
+                    "file": "src/c.cpp",
+                    "arguments": ["c++", "-Iinc", "-O0", "-c", "src/c.cpp"],
+                },
+            ]
+        )
+    )
+
+    flags = load_compile_flags(str(tmp_path))
+
+    assert flags[str(src / "a.cpp")] == (str(tmp_path), "-Iinc", "-O2")
+    assert flags[str(src / "a.cpp")] == flags[str(src / "b.cpp")]
+    assert flags[str(src / "c.cpp")] == (str(tmp_path), "-Iinc", "-O0")
+
+
+def test_load_compile_flags_without_database(tmp_path):
+    assert load_compile_flags(str(tmp_path)) == {}
+
+
+def test_plan_batches_groups_by_config_and_flags(tmp_path):
+    (tmp_path / "strict").mkdir()
+    (tmp_path / "strict" / ".clang-tidy").write_text("Checks: '-*'\n")
+    (tmp_path / "compile_commands.json").write_text(
+        json.dumps(
+            [
+                {
+                    "directory": str(tmp_path),
+                    "file": name,
+                    "command": f"cc {opt} {name}",
+                }
+                for name, opt in (
+                    ("a.c", "-O2"),
+                    ("b.c", "-O2"),
+                    ("c.c", "-O0"),
+                    ("strict/d.c", "-O2"),
+                    ("e.c", "-O2"),
+                )
+            ]
+        )
+    )
+    files = [
+        str(tmp_path / name) for name in ("a.c", "b.c", "c.c", "strict/d.c", "e.c")
+    ]
+
+    assert plan_batches(files, jobs=1, compile_db=str(tmp_path)) == [
+        [0, 1],
+        [2],
+        [3],
+        [4],
+    ]
+
+
+def test_plan_batches_keeps_workers_busy():
+    files = [f"file{idx}.cpp" for idx in range(8)]
+    assert plan_batches(files, jobs=8) == [[idx] for idx in range(8)]
+    batches = plan_batches(files * 20, jobs=2)
+    assert [len(batch) for batch in batches] == [16] * 10
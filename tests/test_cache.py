@@ -0,0 +1,160 @@
+"""Tests for cpp_linter_hooks.cache -- local and shared result caches."""
+
+import io
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cpp_linter_hooks.cache import (
+    READ_ONLY,
+    WRITE_THROUGH,
+    DirectoryStore,
+    HttpStore,
+    ResultCache,
+    config_chain,
+    export_bundle,
+    import_bundle,
+    localize,
+    main,
+    make_key,
+    portable,
+)
+
+KEY = make_key("tidy", ["a"])
+
+
+@pytest.fixture()
+def http_cache():
+    """A minimal in-memory GET/PUT cache server standing in for a real one."""
+    entries = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in entries:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(entries[self.path])
+
+        def do_PUT(self):
+            entries[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(201)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/cache", entries
+    server.shutdown()
+    server.server_close()
+
+
+def test_make_key_is_stable_and_unambiguous():
+    assert make_key("tidy", ["ab", "c"]) == make_key("tidy", ["ab", "c"])
+    assert make_key("tidy", ["ab", "c"]) != make_key("tidy", ["a", "bc"])
+    assert make_key("format", [b"x"]).startswith("format/")
+
+
+def test_portable_paths_round_trip():
+    text = "/work/repo/src/a.cpp:1:1: warning: x"
+    assert portable(text, "/work/repo") == "${ROOT}/src/a.cpp:1:1: warning: x"
+    assert localize(portable(text, "/work/repo"), "/home/me/repo") == (
+        "/home/me/repo/src/a.cpp:1:1: warning: x"
+    )
+    sibling = "/work/repo2/a.cpp /work/repo.old/b.cpp -I/work/repo"
+    assert portable(sibling, "/work/repo/") == (
+        "/work/repo2/a.cpp /work/repo.old/b.cpp -I${ROOT}"
+    )
+
+
+def test_config_chain_lists_every_level(tmp_path):
+    (tmp_path / ".clang-tidy").write_text("a")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / ".clang-tidy").write_text("b")
+    paths = [
+        path
+        for path, _ in config_chain(str(tmp_path / "sub" / "x.cpp"), [".clang-tidy"])
+    ]
+    assert paths[:2] == [
+        str(tmp_path / "sub" / ".clang-tidy"),
+        str(tmp_path / ".clang-tidy"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("mode", "uploaded"), ((READ_ONLY, False), (WRITE_THROUGH, True))
+)
+def test_result_cache_remote_modes(tmp_path, mode, uploaded):
+    remote = DirectoryStore(tmp_path / "remote")
+    cache = ResultCache(DirectoryStore(tmp_path / "local"), remote, mode)
+
+    cache.put(KEY, {"retval": 0})
+
+    assert cache.get(KEY) == {"retval": 0}
+    assert (remote.get(KEY) is not None) == uploaded
+
+
+def test_result_cache_copies_remote_hits_locally(tmp_path):
+    remote = DirectoryStore(tmp_path / "remote")
+    remote.put(KEY, b'{"retval": 1}')
+    local = DirectoryStore(tmp_path / "local")
+
+    assert ResultCache(local, remote).get(KEY) == {"retval": 1}
+    assert local.get(KEY) == b'{"retval": 1}'
+
+
+def test_http_store_get_and_put(http_cache):
+    url, entries = http_cache
+    store = HttpStore(url)
+
+    assert store.get(KEY) is None
+    store.put(KEY, b"{}")
+
+    assert entries == {f"/cache/{KEY}": b"{}"}
+    assert store.get(KEY) == b"{}"
+    assert not store.failed
+
+
+def test_http_store_stops_after_connection_errors():
+    store = HttpStore("http://127.0.0.1:9")
+    assert store.get(KEY) is None
+    assert store.failed
+
+
+def test_bundle_round_trip(tmp_path, capsys, monkeypatch):
+    source = DirectoryStore(tmp_path / "source")
+    source.put(KEY, b'{"retval": 0}')
+    bundle = tmp_path / "bundle.tar.gz"
+
+    assert export_bundle(str(bundle), source.root) == 1
+    target = DirectoryStore(tmp_path / "target")
+    assert import_bundle(str(bundle), target.root) == 1
+    assert target.get(KEY) == b'{"retval": 0}'
+
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cli"))
+    assert main(["import", str(bundle)]) == 0
+    assert "Imported 1 cache entries." in capsys.readouterr().out
+
+
+def test_import_bundle_ignores_unexpected_members(tmp_path):
+    bundle = tmp_path / "evil.tar.gz"
+    with tarfile.open(bundle, "w:gz") as tar:
+        data = b"pwned"
+        info = tarfile.TarInfo("../../outside.json")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+    assert import_bundle(str(bundle), tmp_path / "cache") == 0
+    assert not (tmp_path.parent / "outside.json").exists()
+
+
+def test_main_reports_bad_bundle(tmp_path, capsys):
+    (tmp_path / "bad.tar.gz").write_text("not a tarball")
+    assert main(["import", str(tmp_path / "bad.tar.gz")]) == 1
+    assert "Could not import cache bundle" in capsys.readouterr().err
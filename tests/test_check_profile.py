@@ -0,0 +1,51 @@
+"""Tests for cpp_linter_hooks.check_profile -- ranked per-check timings."""
+
+import json
+
+from cpp_linter_hooks.check_profile import CheckProfile, CheckTiming
+
+
+def _profile(**timers):
+    return {
+        "file": "/src/a.cpp",
+        "profile": {
+            f"time.clang-tidy.{check}.{kind}": seconds
+            for check, (wall, user) in timers.items()
+            for kind, seconds in (("wall", wall), ("user", user), ("sys", 0.0))
+        },
+    }
+
+
+def test_profile_aggregates_and_ranks_checks(tmp_path):
+    (tmp_path / "1-a.cpp.json").write_text(
+        json.dumps(_profile(**{"misc-x": (1.0, 0.9), "bugprone-y": (0.5, 0.5)}))
+    )
+    (tmp_path / "2-b.cpp.json").write_text(
+        json.dumps(_profile(**{"misc-x": (2.0, 1.5)}))
+    )
+    (tmp_path / "broken.json").write_text("{")
+
+    profile = CheckProfile()
+    profile.load_dir(tmp_path)
+
+    assert profile.files == 2
+    assert profile.ranked() == [
+        CheckTiming("misc-x", 3.0, 2.4, 0.0),
+        CheckTiming("bugprone-y", 0.5, 0.5, 0.0),
+    ]
+    report = profile.render()
+    assert report.splitlines() == [
+        "clang-tidy check profile: 2 checks, 2 files, 3.500s total",
+        "      3.000s  85.7%  misc-x",
+        "      0.500s  14.3%  bugprone-y",
+    ]
+    data = profile.to_json()
+    assert data["total_wall"] == 3.5
+    assert data["checks"][1]["check"] == "bugprone-y"
+    assert round(data["checks"][1]["percent"], 1) == 14.3
+
+
+def test_profile_render_truncates_long_reports():
+    profile = CheckProfile()
+    profile.add(_profile(**{f"check-{idx}": (float(idx + 1), 0.0) for idx in range(3)}))
+    assert profile.render(limit=2).splitlines()[-1] == "  ... 1 more checks"
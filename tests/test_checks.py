@@ -0,0 +1,184 @@
+"""Tests for cpp_linter_hooks.checks -- enabled checks and per-check output."""
+
+from unittest.mock import patch
+
+from cpp_linter_hooks.checks import (
+    CheckConfig,
+    CheckLister,
+    CheckResults,
+    CheckSplitter,
+    diagnostic_globs,
+    parse_check_list,
+    parse_dump,
+    partition,
+    restrict,
+)
+
+LIST_OUTPUT = """Enabled checks:
+    bugprone-use-after-move
+    misc-const-correctness
+
+Error while trying to load a compilation database:
+"""
+
+DUMP_OUTPUT = """---
+Checks:          'clang-diagnostic-*,-*,bugprone-*,misc-const-correctness'
+WarningsAsErrors: ''
+HeaderFileExtensions:
+  - h
+CheckOptions:
+  misc-const-correctness.AnalyzeValues: 'true'
+  llvm-else-after-return.WarnOnUnfixable: 'false'
+SystemHeaders:   false
+...
+Running without flags.
+"""
+
+
+def test_parse_check_list():
+    assert parse_check_list(LIST_OUTPUT) == [
+        "bugprone-use-after-move",
+        "misc-const-correctness",
+    ]
+    assert parse_check_list("error: unknown option") is None
+
+
+def test_parse_dump_separates_checks_and_options():
+    glob, options, rest = parse_dump(DUMP_OUTPUT)
+    assert glob == "clang-diagnostic-*,-*,bugprone-*,misc-const-correctness"
+    assert options == {
+        "misc-const-correctness.AnalyzeValues": "'true'",
+        "llvm-else-after-return.WarnOnUnfixable": "'false'",
+    }
+    assert rest == [
+        "WarningsAsErrors: ''",
+        "HeaderFileExtensions:",
+        "  - h",
+        "SystemHeaders:   false",
+    ]
+    old_style = "---\nCheckOptions:\n  - key: a-b.C\n    value: '1'\n...\n"
+    assert parse_dump(old_style)[1] == {"a-b.C": "'1'"}
+
+
+def test_parse_dump_without_check_options():
+    dump = DUMP_OUTPUT.replace(
+        "CheckOptions:\n  misc-const-correctness.AnalyzeValues: 'true'\n"
+        "  llvm-else-after-return.WarnOnUnfixable: 'false'\n",
+        "CheckOptions:    {}\n",
+    )
+    _, options, rest = parse_dump(dump)
+    assert options == {}
+    # The settings digest does not change with the last check option gone.
+    assert rest == parse_dump(DUMP_OUTPUT)[2]
+
+
+def test_diagnostic_globs():
+    glob = "clang-diagnostic-*,-*,bugprone-*,-clang-diagnostic-unused*,clang-*"
+    assert diagnostic_globs(glob) == [
+        "clang-diagnostic-*",
+        "-*",
+        "-clang-diagnostic-unused*",
+        "clang-*",
+    ]
+
+
+def test_restrict_replaces_checks_option():
+    command = ["clang-tidy", "--checks=-*,a", "-p", "build", "x.cpp", "--", "-DA"]
+    assert restrict(command, ["b", "c"]) == [
+        "clang-tidy",
+        "--checks=-*,b,c",
+        "-p",
+        "build",
+        "x.cpp",
+        "--",
+        "-DA",
+    ]
+
+
+def test_lister_queries_once_per_config():
+    def fake_run(command):
+        return 0, LIST_OUTPUT if "--list-checks" in command else DUMP_OUTPUT
+
+    lister = CheckLister()
+    with patch("cpp_linter_hooks.checks.run_process", side_effect=fake_run) as mock:
+        first = lister.config("clang-tidy", ["-p", "b"], "a.cpp", [".clang-tidy"])
+        second = lister.config("clang-tidy", ["-p", "b"], "b.cpp", [".clang-tidy"])
+    assert first == second
+    assert sorted(first.checks) == ["bugprone-use-after-move", "misc-const-correctness"]
+    assert mock.call_count == 2
+    assert mock.call_args.args[0] == ["clang-tidy", "--dump-config", "a.cpp"]
+
+
+OUTPUT = (
+    "a.cpp:1:5: error: unknown type name 'foo' [clang-diagnostic-error]\n"
+    "a.cpp:2:1: warning: moved [bugprone-use-after-move]\n"
+    "  2 | use(x);\n"
+    "a.cpp:3:1: warning: const [misc-const-correctness]"
+)
+
+
+def test_results_drop_removed_and_changed_checks():
+    results = CheckResults.from_output(
+        {"bugprone-use-after-move": "1", "misc-const-correctness": "1"}, (1, OUTPUT)
+    )
+    selected = results.select({"bugprone-use-after-move": "1"})
+    assert selected.result() == (1, "\n".join(OUTPUT.splitlines()[:3]))
+
+    # Changed options invalidate a check, but never compiler diagnostics.
+    selected = results.select({"bugprone-use-after-move": "2"})
+    assert selected.missing({"bugprone-use-after-move": "2"}) == [
+        "bugprone-use-after-move"
+    ]
+    assert selected.result() == (1, OUTPUT.splitlines()[0])
+
+
+def test_results_merge_only_takes_the_restricted_checks():
+    base = CheckResults.from_output({"a-x": "1"}, (0, ""))
+    added = CheckResults.from_output(
+        {"b-y": "1"},
+        (
+            1,
+            "a.cpp:1:1: warning: unused [clang-diagnostic-unused]\n"
+            "a.cpp:2:1: warning: y [b-y]",
+        ),
+    )
+    merged = base.merge(added)
+    assert merged.checks == {"a-x": "1", "b-y": "1"}
+    assert merged.result() == (1, "a.cpp:2:1: warning: y [b-y]")
+    crashed = CheckResults.from_output({"c-z": "1"}, (1, "Segmentation fault"))
+    assert base.merge(crashed).result() == (1, "")
+
+
+def test_partition_deals_checks_into_disjoint_groups():
+    checks = ["b-1", "a-2", "a-1", "b-2", "c-1"]
+    assert partition(checks, 2) == [["a-1", "b-1", "c-1"], ["a-2", "b-2"]]
+    assert partition(["a-1"], 4) == [["a-1"]]
+
+
+def test_splitter_only_splits_listed_files(tmp_path):
+    slow = str(tmp_path / "slow.cpp")
+    lister = CheckLister()
+    splitter = CheckSplitter(2, [slow], lister)
+    config = CheckConfig(
+        {"a-1": "", "a-2": "", "b-1": ""}, "", ("clang-diagnostic-*", "-*")
+    )
+    with patch.object(CheckLister, "config", return_value=config) as mock_config:
+        assert splitter.commands(["clang-tidy", "fast.cpp"]) is None
+        # Compiler warnings stay enabled in exactly one group.
+        assert splitter.commands(["clang-tidy", "-p", "b", slow]) == [
+            [
+                "clang-tidy",
+                "--checks=-*,clang-diagnostic-*,-*,a-1,b-1",
+                "-p",
+                "b",
+                slow,
+            ],
+            ["clang-tidy", "--checks=-*,a-2", "-p", "b", slow],
+        ]
+        assert mock_config.call_args.args[1] == ["-p", "b"]
+        # Checks already known, e.g. the ones a cache is missing, are used as is.
+        assert splitter.commands(["clang-tidy", slow], ["c-1"]) is None
+        assert splitter.commands(["clang-tidy", slow], ["c-1", "c-2"]) == [
+            ["clang-tidy", "--checks=-*,clang-diagnostic-*,-*,c-1", slow],
+            ["clang-tidy", "--checks=-*,c-2", slow],
+        ]
@@ -128,12 +128,84 @@ def test_run_clang_format_verbose_passes_version_diagnostics():
             "cpp_linter_hooks.clang_format.resolve_install_with_diagnostics",
             return_value=(None, None),
         ) as mock_resolve,
-        patch("cpp_linter_hooks.clang_format.subprocess.run") as mock_run,
+        patch("cpp_linter_hooks.clang_format.run_process", return_value=(0, "")),
     ):
-        mock_run.return_value.returncode = 0
-        mock_run.return_value.stdout = ""
-        mock_run.return_value.stderr = ""
         ret, output = run_clang_format(["--verbose", "--version=21", "dummy.cpp"])
 
     assert (ret, output) == (0, "")
     mock_resolve.assert_called_once_with("clang-format", "21", True)
+
+
+def test_run_clang_format_cache_skips_formatted_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    good, bad = tmp_path / "good.c", tmp_path / "bad.c"
+    good.write_text("int a;\n")
+    bad.write_text("int  b;\n")
+
+    def run(*files):
+        with (
+            patch(
+                "cpp_linter_hooks.clang_format.resolve_install_with_diagnostics",
+                return_value=(None, None),
+            ),
+            patch("cpp_linter_hooks.clang_format.tool_version", return_value="21.1.0"),
+            patch(
+                "cpp_linter_hooks.clang_format.run_process", return_value=(0, "")
+            ) as mock_run,
+        ):
+            result = run_clang_format(["--cache", "--dry-run", *map(str, files)])
+        return result, [call.args[0][-2] for call in mock_run.call_args_list]
+
+    assert run(good) == ((0, ""), [str(good)])
+    assert run(good) == ((0, ""), [])
+    assert run(good, bad) == ((0, ""), [str(bad)])
+
+
+def test_run_clang_format_skips_generated_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    generated, source = tmp_path / "lexer.c", tmp_path / "main.c"
+    generated.write_text("/* A lexical scanner generated by flex */\n")
+    source.write_text("int a;\n")
+
+    def run(*files):
+        with (
+            patch(
+                "cpp_linter_hooks.clang_format.resolve_install_with_diagnostics",
+                return_value=(None, None),
+            ),
+            patch(
+                "cpp_linter_hooks.clang_format.run_process", return_value=(0, "")
+            ) as mock_run,
+        ):
+            result = run_clang_format(["--skip-generated", *map(str, files)])
+        return result, [call.args[0] for call in mock_run.call_args_list]
+
+    assert run(generated, source) == ((0, ""), [["clang-format", "-i", str(source)]])
+    assert run(generated) == ((0, ""), [])
+
+
+def test_run_clang_format_files_from_runs_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    names = [f"f{idx}.c" for idx in range(5)]
+    for name in names:
+        (tmp_path / name).write_text("int a;\n")
+    (tmp_path / "list").write_bytes("\0".join(names).encode())
+
+    with (
+        patch(
+            "cpp_linter_hooks.clang_format.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch("cpp_linter_hooks.clang_format.MAX_FILES_PER_RUN", 2),
+        patch(
+            "cpp_linter_hooks.clang_format.run_process", return_value=(0, "")
+        ) as mock_run,
+    ):
+        result = run_clang_format(["--style=LLVM", "--files-from=list", "f0.c"])
+
+    assert result == (0, "")
+    assert [call.args[0] for call in mock_run.call_args_list] == [
+        ["clang-format", "-i", "--style=LLVM", "f0.c", "f1.c"],
+        ["clang-format", "-i", "--style=LLVM", "f2.c", "f3.c"],
+        ["clang-format", "-i", "--style=LLVM", "f4.c"],
+    ]
@@ -1,10 +1,18 @@
+import io
+import json
+import os
 import pytest
 import subprocess
+import threading
 import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
-from cpp_linter_hooks.clang_tidy import _exec_clang_tidy, run_clang_tidy
+from cpp_linter_hooks.clang_tidy import TIMEOUT_RETVAL, _exec_clang_tidy, run_clang_tidy
+from cpp_linter_hooks.checks import CheckConfig, CheckLister
+from cpp_linter_hooks.history import RunHistory
+from cpp_linter_hooks.limits import JobLimitExceeded, ResourceLimits
+from cpp_linter_hooks.process import JobCancelled, JobTimedOut
 
 
 @pytest.fixture(scope="function")
@@ -57,14 +65,24 @@ def test_run_clang_tidy_invalid(args, expected_retval, tmp_path):
     assert ret == expected_retval
 
 
-# --- compile_commands tests (all mock subprocess.run and resolve_install) ---
+# --- compile_commands tests (all mock subprocess.Popen and resolve_install) ---
 
-_MOCK_RUN = MagicMock(returncode=0, stdout="", stderr="")
+
+def _mock_popen(returncode=0, stdout="", stderr=""):
+    """Return a fake Popen object as used by cpp_linter_hooks.process."""
+    process = MagicMock(returncode=returncode, pid=12345)
+    process.__enter__.return_value = process
+    process.stdout = io.BytesIO(stdout.encode())
+    process.stderr = io.BytesIO(stderr.encode())
+    return process
+
+
+_MOCK_RUN = _mock_popen()
 
 
 def _patch():
     return (
-        patch("cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN),
+        patch("cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN),
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
             return_value=(None, None),
@@ -78,7 +96,7 @@ def test_compile_commands_explicit(tmp_path):
     (db_dir / "compile_commands.json").write_text("[]")
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -98,7 +116,7 @@ def test_compile_commands_auto_detect(tmp_path, monkeypatch):
     (build_dir / "compile_commands.json").write_text("[]")
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -119,7 +137,7 @@ def test_compile_commands_auto_detect_fallback(tmp_path, monkeypatch):
     (out_dir / "compile_commands.json").write_text("[]")
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -136,7 +154,7 @@ def test_compile_commands_none(tmp_path, monkeypatch):
     monkeypatch.chdir(tmp_path)
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -156,7 +174,7 @@ def test_compile_commands_conflict_guard(tmp_path, monkeypatch):
     (build_dir / "compile_commands.json").write_text("[]")
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -177,7 +195,7 @@ def test_compile_commands_no_flag(tmp_path, monkeypatch):
     (build_dir / "compile_commands.json").write_text("[]")
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -223,7 +241,7 @@ def test_compile_commands_explicit_with_p_conflict(tmp_path, capsys):
     (db_dir / "compile_commands.json").write_text("[]")
     with (
         patch(
-            "cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN
+            "cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN
         ) as mock_run,
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
@@ -244,7 +262,7 @@ def test_verbose_prints_compile_db_path(tmp_path, monkeypatch, capsys):
     build_dir.mkdir()
     (build_dir / "compile_commands.json").write_text("[]")
     with (
-        patch("cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN),
+        patch("cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN),
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
             return_value=(None, None),
@@ -259,7 +277,7 @@ def test_verbose_prints_compile_db_generation_hint_when_not_found(
 ):
     monkeypatch.chdir(tmp_path)
     with (
-        patch("cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN),
+        patch("cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN),
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
             return_value=(None, None),
@@ -286,12 +304,12 @@ def test_invalid_version_returns_supported_versions():
 
 
 def test_exec_clang_tidy_appends_compile_db_hint():
-    completed = MagicMock(
+    completed = _mock_popen(
         returncode=1,
         stdout="",
         stderr="Error while trying to load a compilation database: missing\n",
     )
-    with patch("cpp_linter_hooks.clang_tidy.subprocess.run", return_value=completed):
+    with patch("cpp_linter_hooks.process.subprocess.Popen", return_value=completed):
         ret, output = _exec_clang_tidy(["clang-tidy", "-p", "missing", "a.cpp"])
 
     assert ret == 1
@@ -301,12 +319,12 @@ def test_exec_clang_tidy_appends_compile_db_hint():
 
 
 def test_exec_clang_tidy_appends_msvc_hint():
-    completed = MagicMock(
+    completed = _mock_popen(
         returncode=1,
         stdout="",
         stderr="fatal error: 'vcruntime.h' file not found\n",
     )
-    with patch("cpp_linter_hooks.clang_tidy.subprocess.run", return_value=completed):
+    with patch("cpp_linter_hooks.process.subprocess.Popen", return_value=completed):
         ret, output = _exec_clang_tidy(["clang-tidy", "a.cpp"])
 
     assert ret == 1
@@ -321,7 +339,7 @@ def test_no_verbose_no_extra_stderr(tmp_path, monkeypatch, capsys):
     build_dir.mkdir()
     (build_dir / "compile_commands.json").write_text("[]")
     with (
-        patch("cpp_linter_hooks.clang_tidy.subprocess.run", return_value=_MOCK_RUN),
+        patch("cpp_linter_hooks.process.subprocess.Popen", return_value=_MOCK_RUN),
         patch(
             "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
             return_value=(None, None),
@@ -439,8 +457,44 @@ def test_jobs_with_export_fixes_forces_serial_execution():
     )
 
 
+def test_serial_run_over_several_compile_dbs_keeps_timeout_status():
+    def fake_exec(command, timeout=None):
+        if command[-1] == "a.cpp":
+            raise JobTimedOut()
+        return 1, "b.cpp:1:1: warning: x [check]"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch(
+            "cpp_linter_hooks.clang_tidy.route_files",
+            return_value=(
+                ["/app", "/lib"],
+                {"a.cpp": "/app", "b.cpp": "/lib"},
+            ),
+        ),
+    ):
+        ret, output = run_clang_tidy(
+            [
+                "--compile-commands=auto",
+                "--timeout=5",
+                "--export-fixes",
+                "fixes.yaml",
+                "a.cpp",
+                "b.cpp",
+            ]
+        )
+
+    assert ret == TIMEOUT_RETVAL
+    assert "clang-tidy timed out" in output
+
+
 def test_fix_flag_appends_fix_to_command():
     with (
+        patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")),
         patch(
             "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
         ) as mock_exec,
@@ -456,8 +510,9 @@ def test_fix_flag_appends_fix_to_command():
     assert "-fix" in cmd
 
 
-def test_fix_flag_forces_serial_execution():
+def test_fix_flag_runs_in_parallel_with_per_job_export_fixes():
     with (
+        patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")),
         patch(
             "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
         ) as mock_exec,
@@ -468,6 +523,88 @@ def test_fix_flag_forces_serial_execution():
     ):
         run_clang_tidy(["--fix", "--jobs=4", "-p", "./build", "a.cpp", "b.cpp"])
 
+    assert mock_exec.call_count == 2
+    commands = [call.args[0] for call in mock_exec.call_args_list]
+    export_paths = set()
+    for cmd in commands:
+        assert "-fix" not in cmd
+        exports = [arg for arg in cmd if arg.startswith("--export-fixes=")]
+        assert len(exports) == 1
+        export_paths.add(exports[0])
+    assert len(export_paths) == 2
+    assert sorted(cmd[-1] for cmd in commands) == ["a.cpp", "b.cpp"]
+
+
+def test_parallel_fix_merges_and_applies_exported_fixes(tmp_path):
+    header = tmp_path / "shared.h"
+    header.write_text("int  x;\n")
+    source = tmp_path / "a.cpp"
+    source.write_text("int y ;\n")
+
+    def fake_exec(command):
+        export_path = next(
+            arg.split("=", 1)[1] for arg in command if arg.startswith("--export-fixes=")
+        )
+        fixes = [(str(header), 3, 2, " ")]
+        if command[-1] == "a.cpp":
+            fixes.append((str(source), 5, 1, ""))
+        Path(export_path).write_text(_export_fixes_yaml(fixes))
+        return 1, f"{command[-1]}: warning: fixable [check]"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")),
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--fix", "--jobs=2", "a.cpp", "b.cpp"])
+
+    assert ret == 1
+    assert header.read_text() == "int x;\n"
+    assert source.read_text() == "int y;\n"
+    assert "Applied 2 fixes to 2 files." in output
+
+
+def test_parallel_fix_skips_files_with_compiler_errors(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_text("int y ;\n")
+
+    def fake_exec(command):
+        export_path = next(
+            arg.split("=", 1)[1] for arg in command if arg.startswith("--export-fixes=")
+        )
+        Path(export_path).write_text(_export_fixes_yaml([(str(source), 5, 1, "")]))
+        return 1, "a.cpp:1:1: error: broken [clang-diagnostic-error]"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")),
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--fix", "--jobs=2", "a.cpp", "b.cpp"])
+
+    assert ret == 1
+    assert source.read_text() == "int y ;\n"
+    assert "Fixes have NOT been applied" in output
+
+
+def test_fix_with_format_style_forces_serial_execution():
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        run_clang_tidy(["--fix", "--jobs=4", "--format-style=file", "a.cpp", "b.cpp"])
+
     mock_exec.assert_called_once()
     cmd = mock_exec.call_args[0][0]
     assert "-fix" in cmd
@@ -475,8 +612,38 @@ def test_fix_flag_forces_serial_execution():
     assert "b.cpp" in cmd
 
 
-def test_fix_errors_in_args_forces_serial_execution():
+def test_fix_with_format_style_in_config_forces_serial_execution(tmp_path):
+    (tmp_path / ".clang-tidy").write_text("FormatStyle: file\n")
+    sources = [str(tmp_path / "a.cpp"), str(tmp_path / "b.cpp")]
+    dump = "---\nChecks: '-*,misc-*'\nFormatStyle:     'file'\n...\n"
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy.run_process", return_value=(0, dump)
+        ) as mock_dump,
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        run_clang_tidy(["--fix", "--jobs=4", "--config-file=x.yaml", *sources])
+
+    # Both files share one config, which is dumped once.
+    assert mock_dump.call_args.args[0] == [
+        "clang-tidy",
+        "--dump-config",
+        "--config-file=x.yaml",
+        sources[0],
+    ]
+    mock_exec.assert_called_once()
+    assert "-fix" in mock_exec.call_args.args[0]
+
+
+def test_fix_errors_in_args_runs_in_parallel():
     with (
+        patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")),
         patch(
             "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
         ) as mock_exec,
@@ -487,8 +654,917 @@ def test_fix_errors_in_args_forces_serial_execution():
     ):
         run_clang_tidy(["--jobs=4", "-p", "./build", "-fix-errors", "a.cpp", "b.cpp"])
 
-    mock_exec.assert_called_once()
-    cmd = mock_exec.call_args[0][0]
-    assert "-fix-errors" in cmd
-    assert "a.cpp" in cmd
-    assert "b.cpp" in cmd
+    assert mock_exec.call_count == 2
+    for call in mock_exec.call_args_list:
+        cmd = call.args[0]
+        assert "-fix-errors" not in cmd
+        assert any(arg.startswith("--export-fixes=") for arg in cmd)
+
+
+def _export_fixes_yaml(fixes):
+    """Render (path, offset, length, text) tuples as clang-tidy export fixes."""
+    lines = ["---", "MainSourceFile: ''", "Diagnostics:"]
+    for path, offset, length, text in fixes:
+        lines += [
+            "  - DiagnosticName:  check",
+            "    DiagnosticMessage:",
+            "      Message:         fixable",
+            f"      FilePath:        '{path}'",
+            "      Replacements:",
+            f"        - FilePath:        '{path}'",
+            f"          Offset:          {offset}",
+            f"          Length:          {length}",
+            f"          ReplacementText: '{text}'",
+            "    Level:           Warning",
+        ]
+    return "\n".join(lines + ["..."]) + "\n"
+
+
+@pytest.mark.parametrize("jobs_arg", ("--jobs=auto", "--jobs=adaptive"))
+def test_jobs_auto_resolves_worker_count(jobs_arg, tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path))
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch("cpp_linter_hooks.clang_tidy.auto_jobs", return_value=2),
+        patch("cpp_linter_hooks.clang_tidy.cpu_jobs", return_value=4),
+        patch("cpp_linter_hooks.clang_tidy.child_peak_rss", return_value=123),
+    ):
+        run_clang_tidy([jobs_arg, "-p", "./build", "a.cpp", "b.cpp", "c.cpp"])
+
+    assert mock_exec.call_count == 3
+    assert (tmp_path / "history.json").read_text() == '{"peak_rss": [123]}'
+
+
+def test_jobs_rejects_unknown_value(capsys):
+    with pytest.raises(SystemExit):
+        run_clang_tidy(["--jobs=lots", "a.cpp"])
+    assert "--jobs must be a positive integer, 'auto' or 'adaptive'" in (
+        capsys.readouterr().err
+    )
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX jobserver only")
+@pytest.mark.parametrize("extra,expected_peak", (([], 2), (["--no-jobserver"], 4)))
+def test_jobs_share_make_jobserver(extra, expected_peak, monkeypatch):
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"+")
+    monkeypatch.setenv("MAKEFLAGS", f"-j2 --jobserver-auth={read_fd},{write_fd}")
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(expected_peak, timeout=5)
+
+    def fake_exec(command):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        barrier.wait()
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return 0, ""
+
+    try:
+        with (
+            patch(
+                "cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec
+            ),
+            patch(
+                "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+                return_value=(None, None),
+            ),
+        ):
+            ret, _ = run_clang_tidy(
+                ["--jobs=4", *extra, "a.cpp", "b.cpp", "c.cpp", "d.cpp"]
+            )
+        assert ret == 0
+        assert peak == expected_peak
+        assert os.read(read_fd, 1) == b"+"
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+@pytest.mark.parametrize("pre_commit,expected_calls", (("1", 1), ("", 0)))
+def test_jobs_join_pre_commit_run_pool(pre_commit, expected_calls, monkeypatch):
+    monkeypatch.setenv("PRE_COMMIT", pre_commit)
+    coordinator = MagicMock(leader=False)
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch(
+            "cpp_linter_hooks.clang_tidy.join", return_value=coordinator
+        ) as mock_join,
+    ):
+        ret, _ = run_clang_tidy(["--jobs=3", "a.cpp", "b.cpp"])
+
+    assert ret == 0
+    assert mock_join.call_count == expected_calls
+    assert coordinator.slot.call_count == 2 * expected_calls
+    assert coordinator.close.call_count == expected_calls
+    if expected_calls:
+        assert mock_join.call_args.args[1] == 3
+
+
+def test_jobs_report_resource_limit_failures_separately():
+    def fake_exec(command, limits=None):
+        assert limits == ResourceLimits(memory=2 << 30, cpu_time=60)
+        if command[-1] == "b.cpp":
+            raise JobLimitExceeded(command, "memory", 3 << 30, 12.5)
+        return 1, "a.cpp:1:1: warning: finding [check]"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(
+            ["--jobs=2", "--memory-limit=2G", "--cpu-limit=60", "a.cpp", "b.cpp"]
+        )
+
+    assert ret == TIMEOUT_RETVAL
+    assert "a.cpp:1:1: warning: finding [check]" in output
+    assert (
+        "1 files exceeded a per-job resource limit and were not fully checked:\n"
+        "  b.cpp: memory limit exceeded (peak RSS 3.0 GiB, CPU 12.5s)"
+    ) in output
+
+
+def test_skip_generated_drops_files_before_running(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    generated, source = tmp_path / "msg.pb.cc", tmp_path / "main.cpp"
+    generated.write_text("// Generated by the protocol buffer compiler.\n")
+    source.write_text("int main() {}\n")
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        assert run_clang_tidy(["--skip-generated", str(generated)]) == (0, "")
+        mock_exec.assert_not_called()
+        run_clang_tidy(["--skip-generated", str(generated), str(source)])
+
+    assert mock_exec.call_args.args[0][-1] == str(source)
+    assert str(generated) not in mock_exec.call_args.args[0]
+
+
+def test_pch_falls_back_when_clang_tidy_rejects_it(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path))
+    pch_args = ["--extra-arg=-include-pch", f"--extra-arg={tmp_path}/k/prefix.pch"]
+    (tmp_path / "k").mkdir()
+    commands = []
+
+    def fake_exec(command):
+        commands.append(command)
+        if "--extra-arg=-include-pch" in command:
+            return 1, "fatal error: malformed or corrupted AST file"
+        return 0, ""
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch(
+            "cpp_linter_hooks.clang_tidy._prepare_pch",
+            return_value={"a.cpp": pch_args},
+        ),
+    ):
+        ret, output = run_clang_tidy(["--pch", "a.cpp", "b.cpp"])
+
+    assert (ret, output) == (0, "")
+    assert ["clang-tidy", *pch_args, "a.cpp"] in commands
+    assert ["clang-tidy", "a.cpp"] in commands
+    assert ["clang-tidy", "b.cpp"] in commands
+    assert not (tmp_path / "k").exists()
+
+
+def test_jobs_deduplicates_header_diagnostics():
+    header_warning = (
+        "/src/shared.h:1:5: warning: bad name [readability-identifier-naming]\n"
+        "int X;\n"
+        "    ^"
+    )
+
+    def fake_exec(command):
+        return 1, f"3 warnings generated.\n{header_warning}\n"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--jobs=4", "a.cpp", "b.cpp", "c.cpp"])
+
+    assert ret == 1
+    assert output == header_warning
+
+
+@pytest.mark.parametrize(
+    ("order", "expected"),
+    (
+        ("completion", "b.cpp output\na.cpp output\n"),
+        ("ordered", "a.cpp output\nb.cpp output\n"),
+    ),
+)
+def test_stream_prints_results_as_jobs_finish(order, expected, capsys):
+    b_done = threading.Event()
+
+    def fake_exec(command):
+        if command[-1] == "a.cpp":
+            b_done.wait(5)
+            time.sleep(0.05)
+            return 0, "a.cpp output"
+        b_done.set()
+        return 1, "b.cpp output"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(
+            ["--jobs=2", "--stream", f"--stream-order={order}", "a.cpp", "b.cpp"]
+        )
+
+    assert ret == 1
+    assert output == ""
+    assert capsys.readouterr().out == expected
+
+
+def test_stream_runs_one_job_per_file_without_jobs():
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        run_clang_tidy(["--stream", "a.cpp", "b.cpp"])
+
+    assert mock_exec.call_count == 2
+
+
+def _failing_exec(failing):
+    """Fake _exec_clang_tidy that fails for the given files and honours scopes."""
+    calls = []
+
+    def fake_exec(command, scope=None):
+        if scope is not None and scope.cancelled:
+            raise JobCancelled(command)
+        if command[-1] in failing:
+            calls.append(command[-1])
+            return 1, f"{command[-1]}:1:1: warning: bad [check]"
+        # Passing files take a moment, long enough for a failure to cancel them.
+        time.sleep(0.05)
+        if scope is not None and scope.cancelled:
+            raise JobCancelled(command)
+        calls.append(command[-1])
+        return 0, ""
+
+    return fake_exec, calls
+
+
+@pytest.mark.parametrize(
+    ("args", "expected_calls"),
+    (
+        (["--fail-fast"], ["a.cpp"]),
+        (["--max-failures=2", "--jobs=2"], ["a.cpp", "c.cpp"]),
+    ),
+)
+def test_fail_fast_stops_after_failures(args, expected_calls):
+    fake_exec, calls = _failing_exec({"a.cpp", "c.cpp"})
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(args + ["a.cpp", "b.cpp", "c.cpp", "d.cpp"])
+
+    assert ret == 1
+    assert sorted(calls) == expected_calls
+    assert "a.cpp:1:1: warning: bad [check]" in output
+    unchecked = 4 - len(expected_calls)
+    assert f"{unchecked} files were not checked" in output
+    assert "  d.cpp" in output
+
+
+def test_fail_fast_without_failures_checks_everything():
+    fake_exec, calls = _failing_exec(set())
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--fail-fast", "--jobs=2", "a.cpp", "b.cpp"])
+
+    assert ret == 0
+    assert sorted(calls) == ["a.cpp", "b.cpp"]
+    assert output == ""
+
+
+def test_timeout_reports_timed_out_files():
+    calls = []
+
+    def fake_exec(command, timeout=None):
+        calls.append(timeout)
+        if command[-1] == "b.cpp":
+            raise JobTimedOut(command, timeout)
+        return 1, f"{command[-1]}:1:1: warning: bad [check]"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--timeout=5", "a.cpp", "b.cpp"])
+
+    assert ret == TIMEOUT_RETVAL
+    assert calls == [5.0, 5.0]
+    assert "a.cpp:1:1: warning: bad [check]" in output
+    assert "1 files timed out and were not fully checked:\n  b.cpp" in output
+
+
+def test_timeout_applies_to_single_file_runs():
+    def fake_exec(command, timeout=None):
+        raise JobTimedOut(command, timeout)
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--timeout=0.5", "a.cpp"])
+
+    assert ret == TIMEOUT_RETVAL
+    assert "1 files timed out and were not fully checked:\n  a.cpp" in output
+
+
+def test_time_budget_prioritises_and_skips_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path))
+    history = RunHistory.load()
+    history.record_file("c.cpp", 1.0, failed=True)
+    history.save()
+    calls = []
+
+    def fake_exec(command, timeout=None):
+        calls.append(command[-1])
+        time.sleep(0.3)
+        return 0, ""
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch(
+            "cpp_linter_hooks.clang_tidy.staged_files",
+            return_value=[os.path.abspath("d.cpp")],
+        ),
+    ):
+        ret, output = run_clang_tidy(
+            ["--time-budget=0.5", "a.cpp", "b.cpp", "c.cpp", "d.cpp"]
+        )
+
+    assert ret == TIMEOUT_RETVAL
+    assert calls == ["d.cpp", "c.cpp"]
+    assert "Time budget exhausted; 2 files were not checked:" in output
+    assert "  a.cpp\n  b.cpp" in output
+    history = RunHistory.load()
+    assert history.file_stats("c.cpp")["failures"] == 0
+    assert history.file_stats("d.cpp")["duration"] >= 0.3
+    assert history.file_stats("a.cpp") == {}
+
+
+def test_batch_checks_several_files_per_process():
+    commands = []
+
+    def fake_exec(command):
+        commands.append(command)
+        return 1, "/src/shared.h:1:1: warning: bad [check]"
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch(
+            "cpp_linter_hooks.clang_tidy.plan_batches",
+            return_value=[[0, 1], [2]],
+        ) as mock_plan,
+    ):
+        ret, output = run_clang_tidy(
+            ["--batch", "--jobs=2", "-p", "build", "a.cpp", "b.cpp", "c.cpp"]
+        )
+
+    mock_plan.assert_called_once_with(["a.cpp", "b.cpp", "c.cpp"], 2, "build")
+    assert sorted(command[3:] for command in commands) == [
+        ["a.cpp", "b.cpp"],
+        ["c.cpp"],
+    ]
+    assert ret == 1
+    assert output == "/src/shared.h:1:1: warning: bad [check]"
+
+
+def test_batch_fix_exports_one_file_per_batch(tmp_path):
+    sources = [tmp_path / "a.cpp", tmp_path / "b.cpp"]
+    for source in sources:
+        source.write_bytes(b"int  x;\n")
+
+    def fake_exec(command):
+        export_fixes = [arg for arg in command if arg.startswith("--export-fixes=")]
+        assert len(export_fixes) == 1
+        assert command[-2:] == [str(source) for source in sources]
+        Path(export_fixes[0].split("=", 1)[1]).write_text(
+            _export_fixes_yaml([(str(sources[0]), 3, 2, " ")])
+        )
+        return 0, ""
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")),
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch("cpp_linter_hooks.clang_tidy.plan_batches", return_value=[[0, 1]]),
+    ):
+        ret, output = run_clang_tidy(
+            ["--batch", "--fix", "--jobs=2"] + [str(source) for source in sources]
+        )
+
+    assert ret == 0
+    assert "Applied 1 fixes to 1 files." in output
+    assert sources[0].read_bytes() == b"int x;\n"
+    assert sources[1].read_bytes() == b"int  x;\n"
+
+
+def test_diff_mode_adds_line_filter_and_skips_untouched_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    diff = "+++ b/a.cpp\n@@ -2 +2 @@\n-int a;\n+int b;\n"
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch("cpp_linter_hooks.clang_tidy.toplevel", return_value=str(tmp_path)),
+        patch(
+            "cpp_linter_hooks.clang_tidy.staged_diff", return_value=diff
+        ) as mock_diff,
+    ):
+        ret, _ = run_clang_tidy(["--diff-base=main", "a.cpp", "b.cpp"])
+
+    assert ret == 0
+    mock_diff.assert_called_once_with("main")
+    mock_exec.assert_called_once_with(
+        ["clang-tidy", '--line-filter=[{"name":"a.cpp","lines":[[2,2]]}]', "a.cpp"]
+    )
+
+
+def test_diff_mode_without_code_changes_runs_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy") as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch("cpp_linter_hooks.clang_tidy.toplevel", return_value=str(tmp_path)),
+        patch(
+            "cpp_linter_hooks.clang_tidy.staged_diff",
+            return_value="+++ b/a.cpp\n@@ -1,0 +1 @@\n+// comment\n",
+        ),
+    ):
+        assert run_clang_tidy(["--diff", "a.cpp"]) == (0, "")
+
+    mock_exec.assert_not_called()
+
+
+def test_profile_reports_check_timings(tmp_path, capsys):
+    json_path = tmp_path / "profile.json"
+
+    def fake_exec(command):
+        store = [arg for arg in command if arg.startswith("--store-check-profile=")]
+        assert "--enable-check-profile" in command
+        profile_dir = Path(store[0].split("=", 1)[1])
+        (profile_dir / f"{command[-1]}.json").write_text(
+            '{"profile": {"time.clang-tidy.misc-x.wall": 0.25}}'
+        )
+        return 0, ""
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, _ = run_clang_tidy(
+            ["--profile-json", str(json_path), "--jobs=2", "a.cpp", "b.cpp"]
+        )
+
+    assert ret == 0
+    assert "      0.500s 100.0%  misc-x" in capsys.readouterr().err
+    assert json.loads(json_path.read_text())["checks"][0]["wall"] == 0.5
+
+
+def test_shard_checks_its_files_and_writes_report(tmp_path):
+    history_path = tmp_path / "history.json"
+    history = RunHistory(history_path)
+    history.record_file("a.cpp", 10.0)
+    history.record_file("b.cpp", 1.0)
+    history.save()
+    report_path = tmp_path / "shard.json"
+
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(
+            [
+                "--shard=2/2",
+                f"--shard-history={history_path}",
+                f"--shard-report={report_path}",
+                "a.cpp",
+                "b.cpp",
+                "c.cpp",
+            ]
+        )
+
+    assert (ret, output) == (0, "")
+    assert [call.args[0][-1] for call in mock_exec.call_args_list] == [
+        "b.cpp",
+        "c.cpp",
+    ]
+    report = json.loads(report_path.read_text())
+    assert report["shard"] == [2, 2]
+    assert report["retval"] == 0
+    assert sorted(report["durations"]) == ["b.cpp", "c.cpp"]
+    # The history the shards split with is left for the merge step to update.
+    assert RunHistory.load(history_path).file_stats("c.cpp") == {}
+
+
+def test_shards_ignore_local_history(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    files = [f"f{idx}.cpp" for idx in range(1, 5)]
+    history = RunHistory()
+    history.record_file("f1.cpp", 10.0)
+    history.save()
+
+    checked = []
+    for shard in ("1/2", "2/2"):
+        with (
+            patch(
+                "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+            ) as mock_exec,
+            patch(
+                "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+                return_value=(None, None),
+            ),
+        ):
+            assert run_clang_tidy([f"--shard={shard}", *files]) == (0, "")
+        checked += [call.args[0][-1] for call in mock_exec.call_args_list]
+
+    assert sorted(checked) == files
+    assert RunHistory.load().file_stats("f2.cpp") == {}
+
+
+def test_cache_reuses_results_until_an_included_header_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    Path("a.cpp").write_text('#include "a.h"\n')
+    Path("a.h").write_text("int a;\n")
+
+    def run():
+        with (
+            patch(
+                "cpp_linter_hooks.clang_tidy._exec_clang_tidy",
+                return_value=(1, f"{tmp_path}/a.h:1:1: warning: x"),
+            ) as mock_exec,
+            patch(
+                "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+                return_value=(None, None),
+            ),
+            patch("cpp_linter_hooks.clang_tidy.tool_version", return_value="21.1.0"),
+        ):
+            result = run_clang_tidy(["--cache", "a.cpp"])
+        return result, mock_exec.call_count
+
+    assert run() == ((1, f"{tmp_path}/a.h:1:1: warning: x"), 1)
+    assert run() == ((1, f"{tmp_path}/a.h:1:1: warning: x"), 0)
+    Path("a.h").write_text("int b;\n")
+    assert run()[1] == 1
+
+
+def test_batch_runs_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    Path("a.cpp").write_text("int a;\n")
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+        patch("cpp_linter_hooks.clang_tidy.tool_version", return_value="21.1.0"),
+    ):
+        for _ in range(2):
+            assert run_clang_tidy(["--cache", "--batch", "a.cpp"]) == (0, "")
+
+    assert mock_exec.call_count == 2
+
+
+def test_cache_only_runs_newly_enabled_checks(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    Path("a.cpp").write_text("int a;\n")
+    outputs = {
+        "a-x": "a.cpp:1:1: warning: x [a-x]",
+        "b-y": "a.cpp:1:2: warning: y [b-y]",
+        "c-z": "a.cpp:1:3: warning: z [c-z]",
+    }
+
+    def fake_exec(command, **kwargs):
+        checks = next(arg for arg in command if arg.startswith("--checks="))
+        return 1, "\n".join(
+            text for name, text in outputs.items() if name in checks.split(",")
+        )
+
+    def run(*checks):
+        config = CheckConfig({name: "" for name in checks}, "settings")
+        with (
+            patch(
+                "cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec
+            ) as mock_exec,
+            patch.object(CheckLister, "config", return_value=config),
+            patch(
+                "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+                return_value=(None, None),
+            ),
+            patch("cpp_linter_hooks.clang_tidy.tool_version", return_value="21.1.0"),
+        ):
+            result = run_clang_tidy(
+                ["--cache", f"--checks=-*,{','.join(checks)}", "a.cpp"]
+            )
+        return result, [call.args[0][1] for call in mock_exec.call_args_list]
+
+    assert run("a-x", "b-y") == (
+        (1, f"{outputs['a-x']}\n{outputs['b-y']}"),
+        ["--checks=-*,a-x,b-y"],
+    )
+    assert run("a-x") == ((1, outputs["a-x"]), [])
+    assert run("a-x", "c-z") == (
+        (1, f"{outputs['a-x']}\n{outputs['c-z']}"),
+        ["--checks=-*,c-z"],
+    )
+    assert run("c-z") == ((1, outputs["c-z"]), [])
+
+
+def test_split_checks_spreads_a_slow_file_over_processes(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    history = RunHistory.load()
+    history.record_file("big.cpp", 120.0)
+    history.record_file("small.cpp", 1.0)
+    history.save()
+    config = CheckConfig({"a-x": "", "b-y": "", "c-z": ""}, "", ("clang-diagnostic-*",))
+
+    def fake_exec(command, **kwargs):
+        checks = next(
+            (arg for arg in command if arg.startswith("--checks=")),
+            "--checks=clang-diagnostic-*,a-x,b-y,c-z",
+        )
+        diagnostics = "clang-diagnostic-*" in checks.split(",")
+        return 1, "\n".join(
+            ["big.cpp:1:1: warning: suggest parentheses [clang-diagnostic-parentheses]"]
+            * diagnostics
+            + [
+                f"big.cpp:2:1: warning: {name} [{name}]"
+                for name in config.checks
+                if name in checks.split(",")
+            ]
+        )
+
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec
+        ) as mock_exec,
+        patch.object(CheckLister, "config", return_value=config),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(["--split-checks=2", "big.cpp", "small.cpp"])
+
+    assert ret == 1
+    commands = sorted(call.args[0] for call in mock_exec.call_args_list)
+    assert commands == [
+        ["clang-tidy", "--checks=-*,b-y", "big.cpp"],
+        ["clang-tidy", "--checks=-*,clang-diagnostic-*,a-x,c-z", "big.cpp"],
+        ["clang-tidy", "small.cpp"],
+    ]
+    # The compiler warning survives the split, and is reported once.
+    assert output.count("clang-diagnostic-parentheses") == 1
+    assert all(f"[{name}]" in output for name in config.checks)
+
+
+def test_single_file_run_records_its_duration(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        assert run_clang_tidy(["--split-checks=2", "big.cpp"]) == (0, "")
+
+    assert "duration" in RunHistory.load().file_stats("big.cpp")
+
+
+def test_split_checks_stay_within_jobs(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    history = RunHistory.load()
+    for name in ("a.cpp", "b.cpp"):
+        history.record_file(name, 120.0)
+    history.save()
+    config = CheckConfig({"a-x": "", "b-y": "", "c-z": ""}, "")
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_exec(command, **kwargs):
+        with lock:
+            running.append(command)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(command)
+        return 0, ""
+
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec
+        ) as mock_exec,
+        patch.object(CheckLister, "config", return_value=config),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        result = run_clang_tidy(["--split-checks=3", "--jobs=2", "a.cpp", "b.cpp"])
+
+    assert result == (0, "")
+    assert mock_exec.call_count == 6
+    assert max(peak) <= 2
+
+
+def test_files_from_stdin_runs_one_job_per_file(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(b"a.cpp\0b.txt\0")))
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, _ = run_clang_tidy(["--files-from=-", "-p", "build", "c.cpp"])
+
+    assert ret == 0
+    assert sorted(call.args[0] for call in mock_exec.call_args_list) == [
+        ["clang-tidy", "-p", "build", "a.cpp"],
+        ["clang-tidy", "-p", "build", "c.cpp"],
+    ]
+
+
+def test_max_output_truncates_combined_output():
+    def fake_exec(command, **kwargs):
+        assert kwargs == {"max_output": 60}
+        name = command[-1]
+        return (
+            1,
+            f"{name}:1:1: warning: first [misc-x]\n{name}:2:1: warning: second [misc-x]",
+        )
+
+    with (
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_exec),
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, output = run_clang_tidy(
+            ["--jobs=2", "--max-output=60", "a.cpp", "b.cpp", "c.cpp"]
+        )
+
+    assert ret == 1
+    assert output == (
+        "a.cpp:1:1: warning: first [misc-x]\n"
+        "[175 more bytes of output not shown (--max-output)]"
+    )
+
+
+def test_auto_compile_commands_routes_files_to_their_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    for name in ("app", "lib"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "build").mkdir()
+        (tmp_path / name / "build" / "compile_commands.json").write_text(
+            json.dumps(
+                [{"directory": str(tmp_path / name), "file": "a.cpp", "command": "c++"}]
+            )
+        )
+
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        ret, _ = run_clang_tidy(
+            ["--compile-commands=auto", "app/a.cpp", "lib/a.cpp", "app/a.h"]
+        )
+
+    assert ret == 0
+    assert sorted(call.args[0] for call in mock_exec.call_args_list) == [
+        ["clang-tidy", "-p", str(tmp_path / "app" / "build"), "app/a.cpp"],
+        ["clang-tidy", "-p", str(tmp_path / "app" / "build"), "app/a.h"],
+        ["clang-tidy", "-p", str(tmp_path / "lib" / "build"), "lib/a.cpp"],
+    ]
+
+
+def test_infer_commands_passes_borrowed_flags_for_unlisted_files(tmp_path):
+    (tmp_path / "compile_commands.json").write_text(
+        json.dumps(
+            [{"directory": str(tmp_path), "file": "a.cpp", "command": "c++ -DA a.cpp"}]
+        )
+    )
+    source, header = str(tmp_path / "a.cpp"), str(tmp_path / "a.h")
+
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        run_clang_tidy(["--infer-commands", "-p", str(tmp_path), source, header])
+
+    assert [call.args[0] for call in mock_exec.call_args_list] == [
+        ["clang-tidy", "-p", str(tmp_path), source],
+        ["clang-tidy", "-p", str(tmp_path), header, "--", "-DA", "-x", "c++-header"],
+    ]
@@ -0,0 +1,130 @@
+"""Tests for cpp_linter_hooks.compile_db -- multi-database routing."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from cpp_linter_hooks.compile_db import (
+    CompileDbIndex,
+    command_arguments,
+    discover,
+    route_files,
+    split_command,
+)
+
+
+def _write_db(build_dir, *sources):
+    build_dir.mkdir(parents=True, exist_ok=True)
+    entries = [
+        {"directory": str(build_dir), "file": str(source), "command": "c++ -c x"}
+        for source in sources
+    ]
+    (build_dir / "compile_commands.json").write_text(json.dumps(entries))
+
+
+@pytest.fixture()
+def monorepo(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    tmp_path = tmp_path / "repo"
+    for name in ("app", "lib"):
+        (tmp_path / name / "src").mkdir(parents=True)
+        (tmp_path / name / "src" / "a.cpp").write_text("")
+        _write_db(tmp_path / name / "build", tmp_path / name / "src" / "a.cpp")
+    # Databases in hidden directories or inside build trees are ignored.
+    _write_db(tmp_path / ".git" / "x", tmp_path / "app" / "src" / "a.cpp")
+    _write_db(tmp_path / "lib" / "build" / "sub", tmp_path / "lib" / "src" / "a.cpp")
+    return tmp_path
+
+
+def test_discover_finds_each_build_tree(monorepo):
+    assert discover(str(monorepo)) == [
+        str(monorepo / "app" / "build"),
+        str(monorepo / "lib" / "build"),
+    ]
+
+
+def test_root_database_does_not_hide_build_trees(monorepo):
+    (monorepo / "compile_commands.json").symlink_to(
+        monorepo / "app" / "build" / "compile_commands.json"
+    )
+    dbs = discover(str(monorepo))
+    assert dbs == [
+        str(monorepo),
+        str(monorepo / "app" / "build"),
+        str(monorepo / "lib" / "build"),
+    ]
+    assert CompileDbIndex(dbs).route(str(monorepo / "lib" / "src" / "a.cpp")) == str(
+        monorepo / "lib" / "build"
+    )
+
+
+def test_discover_reuses_cached_result_until_a_database_changes(monorepo):
+    first = discover(str(monorepo))
+    with patch("cpp_linter_hooks.compile_db.os.walk") as mock_walk:
+        assert discover(str(monorepo)) == first
+    mock_walk.assert_not_called()
+
+    os.utime(monorepo / "app" / "build" / "compile_commands.json", (1, 1))
+    with patch("cpp_linter_hooks.compile_db.os.walk", return_value=[]) as mock_walk:
+        discover(str(monorepo))
+    mock_walk.assert_called_once()
+
+
+def test_index_routes_sources_and_headers(monorepo):
+    index = CompileDbIndex(discover(str(monorepo)))
+    assert index.route(str(monorepo / "lib" / "src" / "a.cpp")) == str(
+        monorepo / "lib" / "build"
+    )
+    assert index.route(str(monorepo / "app" / "src" / "a.h")) == str(
+        monorepo / "app" / "build"
+    )
+    assert index.route(str(monorepo / "other" / "b.cpp")) is None
+
+
+def test_unrouted_files_do_not_search_again(monorepo):
+    discover(str(monorepo))
+    header = str(monorepo / "other" / "x.h")
+    with patch("cpp_linter_hooks.compile_db.os.walk") as mock_walk:
+        assert route_files([header], str(monorepo))[1] == {header: None}
+    mock_walk.assert_not_called()
+
+
+def test_route_files_searches_again_for_new_build_trees(monorepo):
+    discover(str(monorepo))
+    (monorepo / "tool").mkdir()
+    _write_db(monorepo / "tool" / "build", monorepo / "tool" / "t.cpp")
+
+    dbs, routes = route_files([str(monorepo / "tool" / "t.cpp")], str(monorepo))
+
+    assert len(dbs) == 3
+    assert routes == {
+        str(monorepo / "tool" / "t.cpp"): str(monorepo / "tool" / "build")
+    }
+
+
+def test_split_command_windows_style():
+    command = r'cl.exe /IC:\inc\ "/DNAME=\"x y\"" -c "C:\Program Files\a.cpp"'
+    assert split_command(command, windows=True) == [
+        "cl.exe",
+        "/IC:\\inc\\",
+        '/DNAME="x y"',
+        "-c",
+        "C:\\Program Files\\a.cpp",
+    ]
+    assert split_command('c++ -DA="x y" a.cpp', windows=False) == [
+        "c++",
+        "-DA=x y",
+        "a.cpp",
+    ]
+
+
+def test_command_arguments_prefers_arguments():
+    entry = {"arguments": ["c++", "a.cpp"], "command": "ignored"}
+    assert command_arguments(entry) == ["c++", "a.cpp"]
+    with patch("cpp_linter_hooks.compile_db.os.name", "nt"):
+        assert command_arguments({"command": r"cl C:\src\a.cpp"}) == [
+            "cl",
+            "C:\\src\\a.cpp",
+        ]
@@ -0,0 +1,123 @@
+"""Tests for cpp_linter_hooks.coordinator -- the cross-partition job pool."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from cpp_linter_hooks.coordinator import join
+from cpp_linter_hooks.process import JobCancelled
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="Unix sockets only")
+
+
+@pytest.fixture()
+def group_dir(tmp_path):
+    # A short directory keeps the socket path within the AF_UNIX limit.
+    directory = os.path.join("/tmp", f"clh-{os.getpid()}-{tmp_path.name[-8:]}")
+    os.makedirs(directory, exist_ok=True)
+    yield directory
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def _run_jobs(coordinators, jobs_each):
+    """Run jobs_each jobs per coordinator concurrently; return peak concurrency."""
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job(coordinator):
+        nonlocal running, peak
+        with coordinator.slot():
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+    threads = [
+        threading.Thread(target=job, args=(coordinator,))
+        for coordinator in coordinators
+        for _ in range(jobs_each)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return peak
+
+
+def test_first_process_leads_and_others_follow(group_dir):
+    leader = join("run", 2, group_dir)
+    follower = join("run", 8, group_dir)
+    try:
+        assert leader.leader
+        assert not follower.leader
+        # The leader's limit applies to every member of the run.
+        assert _run_jobs([leader, follower], 4) == 2
+    finally:
+        follower.close()
+        leader.close()
+
+
+def test_groups_are_independent(group_dir):
+    first = join("run-a", 1, group_dir)
+    second = join("run-b", 1, group_dir)
+    try:
+        assert first.leader and second.leader
+    finally:
+        first.close()
+        second.close()
+
+
+def test_leader_waits_for_followers_before_leaving(group_dir):
+    leader = join("run", 2, group_dir)
+    follower = join("run", 2, group_dir)
+    closed = threading.Event()
+    closer = threading.Thread(target=lambda: (leader.close(), closed.set()))
+    closer.start()
+    assert not closed.wait(0.3)
+    follower.close()
+    assert closed.wait(5)
+    closer.join()
+    # The next process of a new run becomes the leader.
+    successor = join("run", 2, group_dir)
+    assert successor.leader
+    successor.close()
+
+
+def test_crashed_follower_returns_its_slot(group_dir):
+    leader = join("run", 1, group_dir)
+    follower = join("run", 1, group_dir)
+    try:
+        held = follower.slot()
+        held.__enter__()
+        # Dropping the slot connection, as process exit would, frees the slot.
+        held.__exit__(None, None, None)
+        with leader.slot():
+            pass
+    finally:
+        follower.close()
+        leader.close()
+
+
+def test_cancelled_wait_raises(group_dir):
+    leader = join("run", 1, group_dir)
+    follower = join("run", 1, group_dir)
+    try:
+        with leader.slot():
+            with pytest.raises(JobCancelled):
+                with follower.slot(lambda: True):
+                    pass
+            with pytest.raises(JobCancelled):
+                with leader.slot(lambda: True):
+                    pass
+        with follower.slot():
+            pass
+    finally:
+        follower.close()
+        leader.close()
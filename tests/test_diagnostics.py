@@ -0,0 +1,90 @@
+"""Tests for cpp_linter_hooks.diagnostics -- parsing and deduplication."""
+
+from cpp_linter_hooks.diagnostics import Diagnostic, DiagnosticCollector, parse_output
+
+HEADER_WARNING = """\
+/src/include/shared.h:3:5: warning: variable 'x' is not initialized [cppcoreguidelines-init-variables]
+    int x;
+        ^
+          = 0"""
+
+
+def _tu_output(source, extra=""):
+    return (
+        "12 warnings generated.\n"
+        f"{HEADER_WARNING}\n"
+        f"{source}:1:1: warning: use of old-style cast [google-readability-casting]\n"
+        "int a = (int)b;\n"
+        "        ^\n"
+        f"{extra}"
+        "Suppressed 10 warnings (10 in non-user code).\n"
+        "Use -header-filter=.* to display errors from all non-system headers. "
+        "Use -system-headers to display errors from system headers as well.\n"
+    )
+
+
+def test_parse_output_builds_records_and_strips_boilerplate():
+    entries = list(parse_output(_tu_output("/src/a.cpp")))
+
+    assert entries == [
+        Diagnostic(
+            "/src/include/shared.h",
+            3,
+            5,
+            "warning",
+            "variable 'x' is not initialized",
+            "cppcoreguidelines-init-variables",
+            ("    int x;", "        ^", "          = 0"),
+        ),
+        Diagnostic(
+            "/src/a.cpp",
+            1,
+            1,
+            "warning",
+            "use of old-style cast",
+            "google-readability-casting",
+            ("int a = (int)b;", "        ^"),
+        ),
+    ]
+    assert entries[0].render() == HEADER_WARNING
+
+
+def test_parse_output_attaches_notes_and_keeps_other_text():
+    output = (
+        "/src/a.cpp:4:2: error: unknown type name 'foo' [clang-diagnostic-error]\n"
+        "/src/a.cpp:2:1: note: expanded from macro 'BAR'\n"
+        "2 warnings and 1 error generated.\n"
+        "Error while processing /src/a.cpp.\n"
+    )
+    entries = list(parse_output(output))
+
+    assert len(entries) == 2
+    assert entries[0].check == "clang-diagnostic-error"
+    assert entries[0].details == ("/src/a.cpp:2:1: note: expanded from macro 'BAR'",)
+    assert entries[1] == "Error while processing /src/a.cpp."
+
+
+def test_collector_deduplicates_header_findings_across_jobs():
+    collector = DiagnosticCollector()
+    for source in ("/src/a.cpp", "/src/b.cpp", "/src/c.cpp"):
+        collector.add(_tu_output(source))
+
+    rendered = collector.render()
+    assert rendered.count("shared.h:3:5") == 1
+    assert "warnings generated" not in rendered
+    assert "Suppressed" not in rendered
+    assert [d.file for d in collector.diagnostics] == [
+        "/src/include/shared.h",
+        "/src/a.cpp",
+        "/src/b.cpp",
+        "/src/c.cpp",
+    ]
+
+
+def test_collector_deduplicates_repeated_text_blocks():
+    hint = "Generate compile_commands.json with one of:\n  CMake: cmake ..."
+    collector = DiagnosticCollector()
+    collector.add(f"a.cpp failed\n\n{hint}")
+    collector.add(f"b.cpp failed\n\n{hint}")
+
+    assert collector.render() == f"a.cpp failed\n{hint}\nb.cpp failed"
@@ -0,0 +1,70 @@
+"""Tests for cpp_linter_hooks.diff -- line filters from git hunks."""
+
+import json
+
+from cpp_linter_hooks.diff import Hunk, line_filter, only_comments, parse_diff
+
+DIFF = """\
+diff --git a/src/a.cpp b/src/a.cpp
+index 1111111..2222222 100644
+--- a/src/a.cpp
++++ b/src/a.cpp
+@@ -3 +3,2 @@ int main() {
+-  return 0;
++  int x = 1;
++++x;
+@@ -10,2 +10,0 @@ void f() {
+-  g();
+-  h();
+@@ -20,0 +19 @@ void g() {
++  // explain the loop
+diff --git a/src/old.cpp b/src/old.cpp
+deleted file mode 100644
+--- a/src/old.cpp
++++ /dev/null
+@@ -1 +0,0 @@
+-int old;
+diff --git a/b.h b/b.h
+new file mode 100644
+--- /dev/null
++++ b/b.h
+@@ -0,0 +1,2 @@
++/* header */
++int b;
+\\ No newline at end of file
+"""
+
+
+def test_parse_diff_collects_hunks_per_file():
+    hunks = parse_diff(DIFF)
+
+    assert hunks == {
+        "src/a.cpp": [
+            Hunk(3, 2, ("  return 0;", "  int x = 1;", "++x;")),
+            Hunk(10, 0, ("  g();", "  h();")),
+            Hunk(19, 1, ("  // explain the loop",)),
+        ],
+        "b.h": [Hunk(1, 2, ("/* header */", "int b;"))],
+    }
+    assert [h.line_range for h in hunks["src/a.cpp"]] == [[3, 4], [10, 11], [19, 19]]
+
+
+def test_only_comments():
+    assert only_comments(["", "  // note", "/* a", " * b", " */", "/* c */ // d"])
+    assert not only_comments(["// note", "int x;"])
+    assert not only_comments(["/* note */ int x;"])
+    assert not only_comments([" * continued from elsewhere"])
+
+
+def test_line_filter_skips_unchanged_and_comment_only_files(tmp_path):
+    hunks = {
+        "src/a.cpp": [Hunk(3, 1, ("int x;",)), Hunk(8, 1, ("// why",))],
+        "src/c.cpp": [Hunk(1, 1, ("// only a comment",))],
+    }
+    files = [str(tmp_path / "src" / name) for name in ("a.cpp", "b.cpp", "c.cpp")]
+
+    kept, filters, skipped = line_filter(files, hunks, str(tmp_path))
+
+    assert kept == files[:1]
+    assert skipped == files[1:]
+    assert json.loads(filters) == [{"name": "src/a.cpp", "lines": [[3, 3]]}]
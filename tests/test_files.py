@@ -0,0 +1,46 @@
+"""Tests for cpp_linter_hooks.files -- file lists from files, stdin and git."""
+
+import io
+import subprocess
+from argparse import Namespace
+
+from cpp_linter_hooks.files import listed_files, read_file_list
+
+
+def test_read_file_list_nul_separated(tmp_path):
+    listing = tmp_path / "files"
+    listing.write_bytes(b"a.cpp\0dir/with space.h\0b\ncpp.cc\0")
+    assert read_file_list(str(listing)) == ["a.cpp", "dir/with space.h", "b\ncpp.cc"]
+
+
+def test_read_file_list_from_stdin_lines(monkeypatch):
+    stdin = io.TextIOWrapper(io.BytesIO(b"a.cpp\nb.cpp\n"))
+    monkeypatch.setattr("sys.stdin", stdin)
+    assert read_file_list("-") == ["a.cpp", "b.cpp"]
+
+
+def test_listed_files_enumerates_tracked_sources(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.cpp", "b.H", "notes.md", "untracked.cpp"):
+        (tmp_path / name).write_text("")
+    subprocess.run(["git", "add", "a.cpp", "b.H", "notes.md"], check=True)
+    listing = tmp_path / "files"
+    listing.write_bytes(b"a.cpp\0extra.cpp\0")
+
+    hook_args = Namespace(files_from=str(listing), all_files=True)
+    assert listed_files(hook_args) == (["a.cpp", "extra.cpp", "b.H"], None)
+
+
+def test_listed_files_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+    files, error = listed_files(Namespace(files_from=None, all_files=True))
+    assert (files, error) == (
+        [],
+        "--all: could not list files; not in a git repository",
+    )
+    files, error = listed_files(
+        Namespace(files_from=str(tmp_path / "missing"), all_files=False)
+    )
+    assert error.startswith("--files-from: could not read the file list:")
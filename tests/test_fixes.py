@@ -0,0 +1,163 @@
+"""Tests for cpp_linter_hooks.fixes -- merging exported clang-tidy fixes."""
+
+import hashlib
+import os
+
+from cpp_linter_hooks.fixes import (
+    Replacement,
+    apply_fixes,
+    format_style,
+    merge_replacements,
+    parse_export_fixes,
+)
+
+EXPORT_FIXES = """\
+---
+MainSourceFile:  '/src/a.cpp'
+Diagnostics:
+  - DiagnosticName:  readability-braces-around-statements
+    DiagnosticMessage:
+      Message:         statement should be inside braces
+      FilePath:        '/src/a.cpp'
+      FileOffset:      28
+      Replacements:
+        - FilePath:        '/src/a.cpp'
+          Offset:          36
+          Length:          0
+          ReplacementText: ' {'
+        - FilePath:        '/src/a.cpp'
+          Offset:          46
+          Length:          0
+          ReplacementText: "\\n}\\t"
+      Ranges:
+        - FilePath:        '/src/a.cpp'
+          FileOffset:      28
+          Length:          3
+    Notes:
+      - Message:         alternative fix
+        FilePath:        '/src/a.cpp'
+        FileOffset:      28
+        Replacements:
+          - FilePath:        '/src/a.cpp'
+            Offset:          1
+            Length:          1
+            ReplacementText: 'ignored'
+    Level:           Warning
+    BuildDirectory:  '/src/build'
+  - DiagnosticName:  misc-quoted
+    DiagnosticMessage:
+      Message:         it''s quoted
+      FilePath:        'include/b.h'
+      FileOffset:      0
+      Replacements:
+        - FilePath:        'include/b.h'
+          Offset:          4
+          Length:          2
+          ReplacementText: 'it''s'
+    Level:           Warning
+    BuildDirectory:  '/src/build'
+...
+"""
+
+
+def test_parse_export_fixes_collects_message_replacements():
+    replacements = parse_export_fixes(EXPORT_FIXES)
+
+    assert replacements == [
+        Replacement(os.path.normpath(os.path.abspath("/src/a.cpp")), 36, 0, " {"),
+        Replacement(os.path.normpath(os.path.abspath("/src/a.cpp")), 46, 0, "\n}\t"),
+        Replacement(
+            os.path.normpath(os.path.abspath("/src/build/include/b.h")), 4, 2, "it's"
+        ),
+    ]
+
+
+def test_parse_export_fixes_without_diagnostics():
+    assert parse_export_fixes("---\nMainSourceFile: ''\nDiagnostics: []\n...\n") == []
+
+
+def test_merge_drops_duplicate_header_edits():
+    edit = Replacement("/src/shared.h", 10, 2, "x")
+    merged, conflicts = merge_replacements([[edit], [edit], [edit]])
+    assert merged == {"/src/shared.h": [edit]}
+    assert conflicts == {}
+
+
+def test_merge_detects_overlapping_and_competing_edits():
+    overlap = [Replacement("/a.h", 0, 5, "x"), Replacement("/a.h", 3, 1, "y")]
+    inserts = [Replacement("/b.h", 2, 0, "x"), Replacement("/b.h", 2, 0, "y")]
+    adjacent = [Replacement("/c.h", 0, 2, "x"), Replacement("/c.h", 2, 0, "y")]
+    merged, conflicts = merge_replacements([overlap, inserts, adjacent])
+    assert set(conflicts) == {"/a.h", "/b.h"}
+    assert merged == {"/c.h": adjacent}
+
+
+def test_apply_fixes_writes_files_and_skips_conflicts(tmp_path):
+    good = tmp_path / "good.cpp"
+    good.write_bytes(b"int  a ;\n")
+    bad = tmp_path / "bad.cpp"
+    bad.write_bytes(b"int b;\n")
+
+    retval, message = apply_fixes(
+        [
+            [Replacement(str(good), 3, 2, " "), Replacement(str(bad), 0, 3, "long")],
+            [Replacement(str(good), 6, 1, ""), Replacement(str(bad), 1, 1, "x")],
+            [Replacement(str(good), 3, 2, " ")],
+        ]
+    )
+
+    assert retval == 1
+    assert good.read_bytes() == b"int a;\n"
+    assert bad.read_bytes() == b"int b;\n"
+    assert "Applied 2 fixes to 1 files." in message
+    assert f"Conflicting fixes in {bad}" in message
+
+
+def test_apply_fixes_uses_byte_offsets(tmp_path):
+    source = tmp_path / "utf8.cpp"
+    source.write_text("// é\nint  a;\n", encoding="utf-8")
+    offset = len("// é\nint".encode("utf-8"))
+
+    retval, _ = apply_fixes([[Replacement(str(source), offset, 2, " ")]])
+
+    assert retval == 0
+    assert source.read_text(encoding="utf-8") == "// é\nint a;\n"
+
+
+def test_apply_fixes_rejects_out_of_range_edit(tmp_path):
+    source = tmp_path / "short.cpp"
+    source.write_bytes(b"int a;\n")
+    other = tmp_path / "other.cpp"
+    other.write_bytes(b"int  b;\n")
+
+    retval, message = apply_fixes(
+        [[Replacement(str(other), 3, 2, " "), Replacement(str(source), 100, 0, "x")]]
+    )
+
+    assert retval == 1
+    assert "beyond the end" in message
+    assert other.read_bytes() == b"int  b;\n"
+
+
+def test_apply_fixes_skips_files_changed_since_the_check(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_bytes(b"int  a;\n")
+    digest = hashlib.sha256(b"int  a;\n").hexdigest()
+    other = tmp_path / "b.cpp"
+    other.write_bytes(b"long  b;\n")
+
+    retval, message = apply_fixes(
+        [[Replacement(str(source), 3, 2, " "), Replacement(str(other), 4, 2, " ")]],
+        {str(source): digest, str(other): digest},
+    )
+
+    assert retval == 1
+    assert source.read_bytes() == b"int a;\n"
+    assert other.read_bytes() == b"long  b;\n"
+    assert f"{other} changed while clang-tidy was running" in message
+
+
+def test_format_style():
+    assert format_style("---\nFormatStyle:     'file'\n...\n") == "file"
+    assert format_style("---\nFormatStyle: none\n") == "none"
+    assert format_style("---\nChecks: '*'\n...\n") is None
@@ -0,0 +1,97 @@
+"""Tests for cpp_linter_hooks.format_tidy -- the combined format and tidy hook."""
+
+from unittest.mock import patch
+
+from cpp_linter_hooks.format_tidy import run_format_tidy
+
+
+def _run(args, format_result=(0, ""), tidy_result=(0, "")):
+    events = []
+
+    def fake_format(command, **kwargs):
+        events.append(("format", command[-1]))
+        return format_result
+
+    def fake_tidy(command, **kwargs):
+        events.append(("tidy", command[-1]))
+        return tidy_result
+
+    with (
+        patch(
+            "cpp_linter_hooks.format_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ) as mock_resolve,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics"
+        ) as mock_tidy_resolve,
+        patch("cpp_linter_hooks.clang_format.run_process", side_effect=fake_format),
+        patch("cpp_linter_hooks.clang_tidy._exec_clang_tidy", side_effect=fake_tidy),
+    ):
+        result = run_format_tidy(args)
+    # Both tools are resolved once, up front.
+    mock_tidy_resolve.assert_not_called()
+    return result, events, mock_resolve
+
+
+def test_each_file_is_formatted_before_it_is_checked(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.cpp", "b.cpp", "notes.txt"):
+        (tmp_path / name).write_text("int x;\n")
+
+    result, events, mock_resolve = _run(
+        ["--format-arg=--style=Google", "--version=21", "a.cpp", "b.cpp", "notes.txt"]
+    )
+
+    assert result == (0, "")
+    for name in ("a.cpp", "b.cpp"):
+        assert events.index(("format", name)) < events.index(("tidy", name))
+    # Files clang-tidy does not check are still formatted, once.
+    assert events.count(("format", "notes.txt")) == 1
+    assert sorted(call.args[:2] for call in mock_resolve.call_args_list) == [
+        ("clang-format", "21"),
+        ("clang-tidy", "21"),
+    ]
+
+
+def test_results_are_reported_per_tool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.cpp").write_text("int x;\n")
+
+    (retval, output), _, _ = _run(
+        ["--format-arg=--dry-run", "a.cpp"],
+        format_result=(1, "a.cpp:1:1: warning: code should be clang-formatted"),
+        tidy_result=(1, "a.cpp:1:5: warning: x [misc-x]"),
+    )
+
+    assert retval == 1
+    assert output == (
+        "clang-format:\na.cpp:1:1: warning: code should be clang-formatted\n\n"
+        "clang-tidy:\na.cpp:1:5: warning: x [misc-x]"
+    )
+
+
+def test_version_error_stops_before_running_anything(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_text("int x;\n")
+    with patch(
+        "cpp_linter_hooks.format_tidy.resolve_install_with_diagnostics",
+        side_effect=[(None, "Unsupported clang-format version '3'"), (None, None)],
+    ):
+        assert run_format_tidy(["--format-version=3", str(source)]) == (
+            1,
+            "Unsupported clang-format version '3'",
+        )
+
+
+def test_fix_formats_every_file_before_checking(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.cpp", "b.cpp"):
+        (tmp_path / name).write_text("int x;\n")
+
+    with patch("cpp_linter_hooks.clang_tidy.run_process", return_value=(0, "")):
+        result, events, _ = _run(["--fix", "--jobs=2", "a.cpp", "b.cpp"])
+
+    assert result == (0, "")
+    # One clang-format run covers both files, before clang-tidy starts.
+    assert events[0] == ("format", "b.cpp")
+    assert sorted(events[1:]) == [("tidy", "a.cpp"), ("tidy", "b.cpp")]
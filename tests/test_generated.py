@@ -0,0 +1,105 @@
+"""Tests for cpp_linter_hooks.generated -- skipping generated files."""
+
+import os
+from argparse import ArgumentParser, Namespace
+from unittest.mock import patch
+
+import pytest
+
+from cpp_linter_hooks.generated import (
+    GeneratedFilter,
+    add_generated_arguments,
+    skip_files,
+)
+
+
+def _filter(tmp_path, **kwargs):
+    return GeneratedFilter(path=str(tmp_path / "decisions.json"), **kwargs)
+
+
+def test_marker_in_head_is_skipped(tmp_path):
+    proto = tmp_path / "a.pb.cc"
+    proto.write_text(
+        "// Generated by the protocol buffer compiler.  DO NOT EDIT!\nint x;\n"
+    )
+    plain = tmp_path / "b.cpp"
+    plain.write_text("int y;\n")
+    kept, skipped = _filter(tmp_path).split([str(proto), str(plain)])
+    assert kept == [str(plain)]
+    assert skipped == [(str(proto), "marker 'do not edit'")]
+
+
+def test_marker_past_head_is_ignored(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_text("int x;\n" * 1000 + "// @generated\n")
+    assert _filter(tmp_path).reason(str(source)) is None
+
+
+def test_size_and_line_thresholds(tmp_path):
+    big = tmp_path / "table.cpp"
+    big.write_text("0,\n" * 5000)
+    small = tmp_path / "small.cpp"
+    small.write_text("int x;\n")
+    empty = tmp_path / "empty.cpp"
+    empty.write_text("")
+    assert _filter(tmp_path, max_size=1000).reason(str(big)) == "15000 bytes"
+    lines_filter = _filter(tmp_path, max_lines=100)
+    assert lines_filter.reason(str(big)) == "more than 100 lines"
+    assert lines_filter.reason(str(small)) is None
+    assert lines_filter.reason(str(empty)) is None
+
+
+def test_max_lines_must_be_positive():
+    parser = ArgumentParser()
+    add_generated_arguments(parser)
+    assert parser.parse_args(["--max-lines=5"]).max_lines == 5
+    for value in ("0", "-3", "x"):
+        with pytest.raises(SystemExit):
+            parser.parse_args([f"--max-lines={value}"])
+
+
+def test_decisions_are_cached_by_stat(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_text("// @generated\n")
+    first = _filter(tmp_path)
+    assert first.reason(str(source)) is not None
+    first.save()
+
+    second = _filter(tmp_path)
+    with patch.object(GeneratedFilter, "_scan") as mock_scan:
+        assert second.reason(str(source)) is not None
+    mock_scan.assert_not_called()
+
+    source.write_text("int x; // hand written now\n")
+    os.utime(source, ns=(0, 1))
+    assert _filter(tmp_path).reason(str(source)) is None
+
+
+def test_changed_settings_discard_cached_decisions(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_text("// made by mygen\n")
+    first = _filter(tmp_path)
+    assert first.reason(str(source)) is None
+    first.save()
+    assert _filter(tmp_path, markers=["made by mygen"]).reason(str(source))
+
+
+def test_skip_files_reports_skipped_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path))
+    source = tmp_path / "parser.cpp"
+    source.write_text("/* A Bison parser, made by GNU Bison 3.8.2.  */\n")
+    hook_args = Namespace(
+        skip_generated=False,
+        generated_markers=[],
+        max_file_size=None,
+        max_lines=None,
+        verbose=True,
+    )
+    assert skip_files(hook_args, [str(source)]) == [str(source)]
+
+    hook_args.skip_generated = True
+    assert skip_files(hook_args, [str(source)]) == []
+    assert (
+        f"  {source} (marker 'a bison parser, made by gnu bison')"
+        in capsys.readouterr().err
+    )
@@ -0,0 +1,65 @@
+"""Tests for cpp_linter_hooks.git -- read-only git queries."""
+
+import os
+import subprocess
+
+import pytest
+
+from cpp_linter_hooks.git import staged_diff, staged_files, toplevel, tracked_files
+
+
+@pytest.fixture()
+def repo(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_staged_files_lists_index_changes(repo):
+    (repo / "a.cpp").write_text("int a;\n")
+    (repo / "b.cpp").write_text("int b;\n")
+    subprocess.run(["git", "add", "a.cpp"], check=True)
+
+    assert staged_files() == [os.path.normpath(os.path.join(toplevel(), "a.cpp"))]
+
+
+def test_staged_files_outside_repository(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+    assert toplevel() is None
+    assert staged_files() == []
+
+
+def test_staged_diff_ignores_whitespace_changes(repo):
+    (repo / "a.cpp").write_text("int a;\nint b;\n")
+    subprocess.run(["git", "add", "a.cpp"], check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "a"],
+        check=True,
+    )
+    (repo / "a.cpp").write_text("int  a;\nint c;\n")
+    subprocess.run(["git", "add", "a.cpp"], check=True)
+
+    diff = staged_diff()
+
+    assert "-int b;\n+int c;" in diff
+    assert "int  a;" not in diff
+    assert staged_diff("no-such-revision") is None
+
+
+@pytest.mark.parametrize("setting", ["diff.noprefix", "diff.mnemonicPrefix"])
+def test_staged_diff_paths_ignore_prefix_settings(repo, setting):
+    subprocess.run(["git", "config", setting, "true"], check=True)
+    (repo / "a.cpp").write_text("int a;\n")
+    subprocess.run(["git", "add", "a.cpp"], check=True)
+
+    assert "\n+++ b/a.cpp\n" in staged_diff()
+
+
+def test_tracked_files_are_relative_to_the_current_directory(repo):
+    (repo / "src").mkdir()
+    (repo / "src" / "a.cpp").write_text("")
+    (repo / "b.cpp").write_text("")
+    subprocess.run(["git", "add", "."], check=True)
+    os.chdir(repo / "src")
+    assert tracked_files() == ["a.cpp"]
@@ -0,0 +1,82 @@
+"""Tests for cpp_linter_hooks.history -- persisted run statistics."""
+
+import os
+import subprocess
+
+from cpp_linter_hooks.history import PEAK_RSS_SAMPLES, RunHistory, cache_dir
+
+
+def test_cache_dir_prefers_explicit_override(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "custom"))
+    assert cache_dir() == tmp_path / "custom"
+
+
+def test_cache_dir_uses_xdg_cache_home(tmp_path, monkeypatch):
+    monkeypatch.delenv("CPP_LINTER_HOOKS_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cache_dir() == tmp_path / "cpp-linter-hooks"
+
+
+def test_history_round_trip(tmp_path):
+    path = tmp_path / "nested" / "history.json"
+    history = RunHistory.load(path)
+    assert history.peak_rss is None
+    history.record_peak_rss(100)
+    history.record_peak_rss(300)
+    history.record_peak_rss(200)
+    history.save()
+    assert RunHistory.load(path).peak_rss == 300
+
+
+def test_history_keeps_only_recent_samples(tmp_path):
+    history = RunHistory(tmp_path / "history.json")
+    history.record_peak_rss(10_000)
+    for value in range(PEAK_RSS_SAMPLES):
+        history.record_peak_rss(value)
+    assert history.peak_rss == PEAK_RSS_SAMPLES - 1
+
+
+def test_history_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "history.json"
+    path.write_text("{not json")
+    assert RunHistory.load(path).data == {}
+
+
+def test_history_tracks_file_failure_streaks(tmp_path):
+    history = RunHistory(tmp_path / "history.json")
+    assert history.file_stats("a.cpp") == {}
+    history.record_file("a.cpp", 1.23456, failed=True)
+    history.record_file("a.cpp", 2.0, failed=True)
+    assert history.file_stats("a.cpp") == {"duration": 2.0, "failures": 2}
+    history.record_file("a.cpp", 0.5, failed=False)
+    assert history.file_stats("a.cpp") == {"duration": 0.5, "failures": 0}
+
+
+def test_history_drops_least_recent_files(tmp_path, monkeypatch):
+    monkeypatch.setattr("cpp_linter_hooks.history.MAX_FILE_ENTRIES", 2)
+    history = RunHistory(tmp_path / "history.json")
+    history.record_file("a.cpp", 1.0, failed=False)
+    history.record_file("b.cpp", 1.0, failed=False)
+    history.record_file("a.cpp", 1.0, failed=False)
+    history.record_file("c.cpp", 1.0, failed=False)
+    assert history.file_stats("b.cpp") == {}
+    assert history.file_stats("a.cpp") and history.file_stats("c.cpp")
+
+
+def test_history_is_shared_between_checkouts(tmp_path, monkeypatch):
+    history_path = tmp_path / "history.json"
+    for checkout in ("ci-1", "ci-2"):
+        subprocess.run(["git", "init", "-q", str(tmp_path / checkout)], check=True)
+    monkeypatch.chdir(tmp_path / "ci-1")
+    history = RunHistory(history_path)
+    history.record_file(os.path.join("src", "a.cpp"), 3.0)
+    history.record_file(str(tmp_path / "outside.cpp"), 1.0)
+    history.save()
+    assert sorted(history.data["files"]) == [str(tmp_path / "outside.cpp"), "src/a.cpp"]
+
+    monkeypatch.chdir(tmp_path / "ci-2")
+    history = RunHistory.load(history_path)
+    assert history.file_stats(str(tmp_path / "ci-2" / "src" / "a.cpp")) == {
+        "duration": 3.0,
+        "failures": 0,
+    }
@@ -0,0 +1,40 @@
+"""Tests for cpp_linter_hooks.includes -- include dependency scanning."""
+
+import os
+
+from cpp_linter_hooks.includes import HeaderScanner, include_dirs
+
+
+def test_include_dirs_reads_search_path_options():
+    flags = ["-Iinc", "-I", "gen", "-isystem", "/opt/x", "-iquote", "q", "-DX"]
+    quote_dirs, dirs = include_dirs(flags, "/build")
+    assert quote_dirs == [os.path.join("/build", "q")]
+    assert dirs == [
+        os.path.join("/build", "inc"),
+        os.path.join("/build", "gen"),
+        "/opt/x",
+    ]
+
+
+def test_scanner_follows_includes_transitively(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "inc").mkdir()
+    (tmp_path / "src" / "a.cpp").write_text(
+        '#include "local.h"\n#include <lib.h>\n#include <vector>\n'
+    )
+    (tmp_path / "src" / "local.h").write_text('  #  include "lib.h"\n')
+    (tmp_path / "inc" / "lib.h").write_text("#pragma once\n#include <lib.h>\n")
+
+    deps = HeaderScanner().dependencies(
+        str(tmp_path / "src" / "a.cpp"), dirs=[str(tmp_path / "inc")]
+    )
+
+    assert deps == sorted(
+        [str(tmp_path / "inc" / "lib.h"), str(tmp_path / "src" / "local.h")]
+    )
+
+
+def test_angle_includes_do_not_search_the_current_directory(tmp_path):
+    (tmp_path / "a.cpp").write_text("#include <b.h>\n")
+    (tmp_path / "b.h").write_text("")
+    assert HeaderScanner().dependencies(str(tmp_path / "a.cpp")) == []
@@ -0,0 +1,74 @@
+"""Tests for cpp_linter_hooks.interpolate -- inferred compile commands."""
+
+import json
+import os
+
+from cpp_linter_hooks.interpolate import CommandIndex, Entry, infer_commands, transfer
+
+
+def _entry(path, *flags, compiler="c++"):
+    return Entry(path, "/repo/build", (compiler, *flags, "-c", path, "-o", "x.o"))
+
+
+INDEX = CommandIndex(
+    [
+        _entry("/repo/lib/src/foo.cpp", "-DFOO"),
+        _entry("/repo/lib/src/bar.cpp", "-DBAR"),
+        _entry("/repo/lib/c/util.c", "-DUTIL"),
+        _entry("/repo/app/main.cpp", "-DAPP"),
+    ]
+)
+
+
+def test_closest_prefers_same_stem_nearby():
+    assert INDEX.closest("/repo/lib/include/foo.h").file == "/repo/lib/src/foo.cpp"
+    # A same-named file far away is not a good donor.
+    assert INDEX.closest("/repo/app/sub/deep/foo.h").file == "/repo/app/main.cpp"
+
+
+def test_closest_prefers_nearest_directory_and_language():
+    assert INDEX.closest("/repo/lib/src/new.cpp").file == "/repo/lib/src/foo.cpp"
+    assert INDEX.closest("/repo/lib/other.c").file == "/repo/lib/c/util.c"
+    assert INDEX.closest("/elsewhere/x.c").file == "/repo/lib/c/util.c"
+    assert CommandIndex([]).closest("/repo/x.cpp") is None
+
+
+def test_transfer_rewrites_the_donor_command():
+    entry = Entry(
+        "/repo/src/a.c",
+        "/repo/build",
+        ("gcc", "-Iinc", "-isystem", "../third", "-std=c11", "-MD", "-c", "../src/a.c"),
+    )
+    assert transfer(entry, "/repo/src/b.cpp") == [
+        "-I/repo/build/inc",
+        "-isystem",
+        "/repo/third",
+        "-x",
+        "c++",
+    ]
+    assert transfer(entry, "/repo/src/a.h") == [
+        "-I/repo/build/inc",
+        "-isystem",
+        "/repo/third",
+        "-std=c11",
+        "-x",
+        "c-header",
+    ]
+
+
+def test_transfer_keeps_msvc_driver_mode():
+    entry = Entry("/repo/a.cpp", "/repo", ("cl.exe", "/EHsc", "/c", "a.cpp"))
+    assert transfer(entry, "/repo/b.cpp") == ["--driver-mode=cl", "/EHsc", "/c"]
+
+
+def test_infer_commands_skips_listed_files(tmp_path):
+    source = tmp_path / "a.cpp"
+    (tmp_path / "compile_commands.json").write_text(
+        json.dumps(
+            [{"directory": str(tmp_path), "file": "a.cpp", "command": "c++ -DA a.cpp"}]
+        )
+    )
+    header = os.path.join(str(tmp_path), "a.h")
+    assert infer_commands([str(source), header], str(tmp_path)) == {
+        header: (str(source), ["-DA", "-x", "c++-header"])
+    }
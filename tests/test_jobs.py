@@ -0,0 +1,151 @@
+"""Tests for cpp_linter_hooks.jobs -- automatic and adaptive concurrency."""
+
+from unittest.mock import patch
+
+import pytest
+
+from cpp_linter_hooks import jobs
+from cpp_linter_hooks.jobs import (
+    DEFAULT_JOB_MEMORY,
+    AdaptiveLimiter,
+    _available_memory,
+    _cgroup_cpu_limit,
+    _cgroup_memory_available,
+    _pressure,
+    auto_jobs,
+)
+
+
+@pytest.fixture()
+def no_self_cgroup(tmp_path, monkeypatch):
+    """Pretend /proc/self/cgroup is missing so only the root is inspected."""
+    monkeypatch.setattr(jobs, "PROC_SELF_CGROUP", tmp_path / "missing")
+
+
+def test_cgroup_v2_cpu_quota(tmp_path, no_self_cgroup):
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+    assert _cgroup_cpu_limit(tmp_path) == 2.5
+
+
+def test_cgroup_v2_unlimited(tmp_path, no_self_cgroup):
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert _cgroup_cpu_limit(tmp_path) is None
+
+
+def test_cgroup_v1_cpu_quota(tmp_path, no_self_cgroup):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("400000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert _cgroup_cpu_limit(tmp_path) == 4
+
+
+def test_cgroup_nested_path_from_proc_self(tmp_path, monkeypatch):
+    self_cgroup = tmp_path / "self_cgroup"
+    self_cgroup.write_text("0::/ci/job\n")
+    monkeypatch.setattr(jobs, "PROC_SELF_CGROUP", self_cgroup)
+    (tmp_path / "ci" / "job").mkdir(parents=True)
+    (tmp_path / "ci" / "job" / "cpu.max").write_text("100000 100000\n")
+    assert _cgroup_cpu_limit(tmp_path) == 1
+
+
+def test_cgroup_limits_set_on_an_ancestor(tmp_path, monkeypatch):
+    self_cgroup = tmp_path / "self_cgroup"
+    self_cgroup.write_text("0::/slice/container/job\n")
+    monkeypatch.setattr(jobs, "PROC_SELF_CGROUP", self_cgroup)
+    job = tmp_path / "slice" / "container" / "job"
+    job.mkdir(parents=True)
+    (job / "cpu.max").write_text("max 100000\n")
+    (job / "memory.max").write_text("max\n")
+    (job / "memory.current").write_text(str(1 << 30))
+    slice_dir = tmp_path / "slice"
+    (slice_dir / "cpu.max").write_text("200000 100000\n")
+    (slice_dir / "container" / "cpu.max").write_text("300000 100000\n")
+    (slice_dir / "memory.max").write_text(str(6 << 30))
+    (slice_dir / "memory.current").write_text(str(4 << 30))
+    assert _cgroup_cpu_limit(tmp_path) == 2
+    assert _cgroup_memory_available(tmp_path) == 2 << 30
+
+
+def test_available_memory_uses_smaller_of_meminfo_and_cgroup(tmp_path, no_self_cgroup):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal: 16000000 kB\nMemAvailable: 8000000 kB\n")
+    (tmp_path / "memory.max").write_text(str(4 << 30))
+    (tmp_path / "memory.current").write_text(str(1 << 30))
+    assert _available_memory(tmp_path, meminfo) == 3 << 30
+
+
+def test_pressure_parses_some_avg10(tmp_path):
+    (tmp_path / "memory").write_text(
+        "some avg10=12.50 avg60=3.00 avg300=1.00 total=100\n"
+        "full avg10=1.00 avg60=0.00 avg300=0.00 total=10\n"
+    )
+    assert _pressure("memory", tmp_path) == 12.5
+    assert _pressure("cpu", tmp_path) is None
+
+
+@pytest.mark.parametrize(
+    ("cpus", "quota", "available", "peak_rss", "expected"),
+    (
+        (64, None, None, None, 64),
+        (64, 3.5, None, None, 3),
+        (64, 0.5, None, None, 1),
+        (64, None, 8 * DEFAULT_JOB_MEMORY, None, 8),
+        (64, None, 8 << 30, 2 << 30, 4),
+        (64, None, 100, None, 1),
+    ),
+)
+def test_auto_jobs(cpus, quota, available, peak_rss, expected):
+    with (
+        patch.object(jobs, "_cpu_count", return_value=cpus),
+        patch.object(jobs, "_cgroup_cpu_limit", return_value=quota),
+        patch.object(jobs, "_available_memory", return_value=available),
+    ):
+        assert auto_jobs(peak_rss) == expected
+
+
+def _measured(limiter, memory=None, cpu=None, available=None, load=None):
+    pressures = {"memory": memory, "cpu": cpu}
+    with (
+        patch.object(jobs, "_pressure", side_effect=lambda r: pressures[r]),
+        patch.object(jobs, "_available_memory", return_value=available),
+        patch.object(jobs, "_load_average", return_value=load),
+        patch.object(jobs, "_cpu_count", return_value=4),
+    ):
+        return limiter._measure()
+
+
+def test_adaptive_limiter_sheds_workers_under_pressure():
+    limiter = AdaptiveLimiter(8, initial=4, peak_rss=1 << 30)
+    assert _measured(limiter, memory=50.0) == -1
+    assert _measured(limiter, cpu=80.0) == -1
+    assert _measured(limiter, available=1 << 20) == -1
+    assert _measured(limiter, load=12.0) == -1
+
+
+def test_adaptive_limiter_grows_when_calm():
+    limiter = AdaptiveLimiter(8, initial=4, peak_rss=1 << 30)
+    assert _measured(limiter, memory=0.0, cpu=1.0, available=8 << 30) == 1
+    assert _measured(limiter, memory=10.0, cpu=1.0, available=8 << 30) == 0
+
+
+def test_adaptive_limiter_stays_within_bounds():
+    limiter = AdaptiveLimiter(3, initial=2)
+    with patch.object(limiter, "_measure", return_value=1):
+        for _ in range(5):
+            limiter._last_adjust = 0.0
+            limiter.adjust()
+    assert limiter.limit == 3
+    with patch.object(limiter, "_measure", return_value=-1):
+        for _ in range(5):
+            limiter._last_adjust = 0.0
+            limiter.adjust()
+    assert limiter.limit == 1
+
+
+def test_adaptive_limiter_counts_active_jobs():
+    limiter = AdaptiveLimiter(2, initial=2)
+    with patch.object(limiter, "_measure", return_value=0):
+        with limiter:
+            with limiter:
+                assert limiter.active == 2
+        assert limiter.active == 0
@@ -0,0 +1,122 @@
+"""Tests for cpp_linter_hooks.jobserver -- the GNU make jobserver client."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from cpp_linter_hooks.jobserver import JobServer, parse_makeflags
+from cpp_linter_hooks.process import JobCancelled
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="POSIX jobserver only")
+
+
+@pytest.fixture()
+def token_pipe():
+    """A jobserver pipe holding two tokens, as make -j3 would create."""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"++")
+    yield read_fd, write_fd
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def _tokens_left(read_fd):
+    os.set_blocking(read_fd, False)
+    try:
+        return os.read(read_fd, 64)
+    except BlockingIOError:
+        return b""
+    finally:
+        os.set_blocking(read_fd, True)
+
+
+@pytest.mark.parametrize(
+    "makeflags,expected",
+    [
+        ("-j4 --jobserver-auth=3,4", "3,4"),
+        (" -j --jobserver-auth=fifo:/tmp/GMfifo1", "fifo:/tmp/GMfifo1"),
+        ("--jobserver-fds=5,6 -j", "5,6"),
+        ("--jobserver-auth=3,4 --jobserver-auth=fifo:/tmp/f", "fifo:/tmp/f"),
+        ("-k -j1", None),
+        ("", None),
+    ],
+)
+def test_parse_makeflags(makeflags, expected):
+    assert parse_makeflags(makeflags) == expected
+
+
+def test_from_auth_rejects_closed_fds():
+    read_fd, write_fd = os.pipe()
+    os.close(read_fd)
+    os.close(write_fd)
+    assert JobServer.from_auth(f"{read_fd},{write_fd}") is None
+    assert JobServer.from_auth("not,numbers") is None
+
+
+def test_from_environment(token_pipe, monkeypatch):
+    monkeypatch.setenv("MAKEFLAGS", "-j3 --jobserver-auth={},{}".format(*token_pipe))
+    jobserver = JobServer.from_environment()
+    assert jobserver is not None
+    monkeypatch.setenv("MAKEFLAGS", "-j3")
+    assert JobServer.from_environment() is None
+
+
+def test_implicit_slot_needs_no_token(token_pipe):
+    jobserver = JobServer.from_auth("{},{}".format(*token_pipe))
+    with jobserver.slot():
+        assert _tokens_left(token_pipe[0]) == b"++"
+        os.write(token_pipe[1], b"++")
+
+
+def test_tokens_limit_concurrency_and_are_returned(token_pipe):
+    jobserver = JobServer.from_auth("{},{}".format(*token_pipe))
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job():
+        nonlocal running, peak
+        with jobserver.slot():
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+    threads = [threading.Thread(target=job) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    jobserver.close()
+    # One implicit slot plus two tokens.
+    assert peak == 3
+    assert _tokens_left(token_pipe[0]) == b"++"
+
+
+def test_fifo_form(tmp_path):
+    fifo = tmp_path / "GMfifo"
+    os.mkfifo(fifo)
+    keeper = os.open(fifo, os.O_RDWR | os.O_NONBLOCK)
+    os.write(keeper, b"+")
+    try:
+        jobserver = JobServer.from_auth(f"fifo:{fifo}")
+        assert jobserver is not None
+        with jobserver.slot(), jobserver.slot():
+            assert _tokens_left(keeper) == b""
+        jobserver.close()
+        assert _tokens_left(keeper) == b"+"
+    finally:
+        os.close(keeper)
+
+
+def test_cancelled_wait_raises(token_pipe):
+    jobserver = JobServer.from_auth("{},{}".format(*token_pipe))
+    os.read(token_pipe[0], 2)
+    with jobserver.slot():
+        with pytest.raises(JobCancelled):
+            with jobserver.slot(lambda: True):
+                pass
@@ -0,0 +1,106 @@
+"""Tests for cpp_linter_hooks.limits -- per-job resource limits."""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from cpp_linter_hooks.limits import (
+    CPU_TIME,
+    MEMORY,
+    JobLimitExceeded,
+    ResourceLimits,
+    _format_size,
+    check_usage,
+    supported,
+)
+from cpp_linter_hooks.process import run_process
+
+needs_limits = pytest.mark.skipif(not supported(), reason="needs setrlimit()")
+
+
+def _usage(max_rss_kib=1024, cpu=0.5):
+    return SimpleNamespace(ru_maxrss=max_rss_kib, ru_utime=cpu, ru_stime=0.0)
+
+
+@needs_limits
+def test_cpu_limit_stops_busy_child():
+    with pytest.raises(JobLimitExceeded) as excinfo:
+        run_process(
+            [sys.executable, "-c", "while True: pass"],
+            timeout=30,
+            limits=ResourceLimits(cpu_time=1),
+        )
+    assert excinfo.value.limit == CPU_TIME
+    assert excinfo.value.cpu_time > 0.5
+    assert excinfo.value.peak_rss > 0
+
+
+@needs_limits
+def test_out_of_memory_message_is_a_memory_limit_failure():
+    with pytest.raises(JobLimitExceeded) as excinfo:
+        run_process(
+            [
+                sys.executable,
+                "-c",
+                "import sys; print('LLVM ERROR: out of memory', file=sys.stderr); "
+                "sys.exit(1)",
+            ],
+            limits=ResourceLimits(memory=8 << 30),
+        )
+    assert excinfo.value.limit == MEMORY
+    assert "memory limit exceeded (peak RSS" in excinfo.value.describe()
+
+
+@needs_limits
+def test_limited_child_within_limits_runs_normally():
+    retval, output = run_process(
+        [sys.executable, "-c", "import sys; print('ok'); sys.exit(2)"],
+        limits=ResourceLimits(memory=8 << 30, cpu_time=60),
+    )
+    assert retval == 2
+    assert output.strip() == "ok"
+
+
+def test_ordinary_failures_are_not_limit_failures():
+    limits = ResourceLimits(memory=1 << 30, cpu_time=60)
+    check_usage(["tool"], 1, _usage(), limits, set())
+    check_usage(["tool"], 0, _usage(cpu=120), limits, set())
+
+
+def test_only_evidence_from_a_limit_counts():
+    limits = ResourceLimits(memory=1 << 30, cpu_time=60)
+    # A crash near the memory limit is not blamed on it without an
+    # allocation failure.
+    check_usage(["tool"], -6, _usage(max_rss_kib=1000 * 1024), limits, set())
+    check_usage(["tool"], -9, _usage(cpu=10), limits, set())
+    with pytest.raises(JobLimitExceeded) as excinfo:
+        check_usage(["tool"], -9, _usage(cpu=61), limits, set())
+    assert excinfo.value.limit == CPU_TIME
+
+
+@needs_limits
+def test_limits_are_in_force_when_the_command_starts():
+    retval, output = run_process(
+        [
+            sys.executable,
+            "-c",
+            "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0])",
+        ],
+        limits=ResourceLimits(memory=8 << 30),
+    )
+    assert (retval, output.strip()) == (0, str(8 << 30))
+
+
+@needs_limits
+def test_missing_program_raises_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        run_process(["no-such-tool-here"], limits=ResourceLimits(cpu_time=60))
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    [(512, "512 B"), (2048, "2.0 KiB"), (5 << 20, "5.0 MiB"), (10 << 30, "10.0 GiB")],
+)
+def test_format_size(size, expected):
+    assert _format_size(size) == expected
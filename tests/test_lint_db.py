@@ -0,0 +1,128 @@
+"""Tests for cpp_linter_hooks.lint_db -- lint-optimised compile databases."""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from cpp_linter_hooks.clang_tidy import run_clang_tidy
+from cpp_linter_hooks.lint_db import LintRules, lint_view
+
+HEAVY_FLAGS = [
+    "-flto=thin",
+    "-fsanitize=address,undefined",
+    "-fno-sanitize-recover=all",
+    "-g3",
+    "-gsplit-dwarf",
+    "-fprofile-instr-generate",
+    "-fcoverage-mapping",
+    "-MD",
+    "-MF",
+    "main.c.d",
+]
+
+
+def _write_db(directory, source, flags):
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "directory": str(directory),
+        "file": str(source),
+        "arguments": ["cc", "-Wall", "-I", "inc", *flags, "-c", str(source)],
+    }
+    (directory / "compile_commands.json").write_text(json.dumps([entry]))
+
+
+def test_default_rules_strip_codegen_only_flags():
+    args = ["cc", "-O2", "-DX=1", *HEAVY_FLAGS, "-include", "config.h", "-c", "a.c"]
+    assert LintRules().apply(args) == [
+        "cc",
+        "-O2",
+        "-DX=1",
+        "-include",
+        "config.h",
+        "-c",
+        "a.c",
+    ]
+
+
+def test_rules_file_adds_patterns_and_rewrites(tmp_path):
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(
+        json.dumps({"strip": ["-include */debug/*"], "rewrite": {"-O3": "-O0"}})
+    )
+    rules = LintRules.load(str(rules_path))
+    args = ["cc", "-O3", "-g", "-include", "src/debug/trace.h", "-include", "a.h"]
+    assert rules.apply(args) == ["cc", "-O0", "-include", "a.h"]
+
+    rules_path.write_text(json.dumps({"strip": ["-O*"], "defaults": False}))
+    assert LintRules.load(str(rules_path)).apply(["cc", "-O2", "-g"]) == ["cc", "-g"]
+
+
+def test_lint_view_is_cached_until_the_database_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    build = tmp_path / "build"
+    _write_db(build, tmp_path / "a.c", HEAVY_FLAGS)
+
+    view = lint_view(str(build))
+    entries = json.loads(Path(view, "compile_commands.json").read_text())
+    assert entries[0]["arguments"] == [
+        "cc",
+        "-Wall",
+        "-I",
+        "inc",
+        "-c",
+        str(tmp_path / "a.c"),
+    ]
+
+    with patch("cpp_linter_hooks.lint_db.json.dump") as mock_dump:
+        assert lint_view(str(build)) == view
+    mock_dump.assert_not_called()
+
+    _write_db(build, tmp_path / "a.c", ["-g", "-DNEW"])
+    os.utime(build / "compile_commands.json", (1, 1))
+    entries = json.loads(
+        Path(lint_view(str(build)), "compile_commands.json").read_text()
+    )
+    assert "-DNEW" in entries[0]["arguments"]
+
+
+def test_lint_view_without_database_returns_original(tmp_path):
+    assert lint_view(str(tmp_path)) == str(tmp_path)
+
+
+def test_lint_db_passes_view_to_clang_tidy(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    _write_db(tmp_path / "build", tmp_path / "a.c", HEAVY_FLAGS)
+    with (
+        patch(
+            "cpp_linter_hooks.clang_tidy._exec_clang_tidy", return_value=(0, "")
+        ) as mock_exec,
+        patch(
+            "cpp_linter_hooks.clang_tidy.resolve_install_with_diagnostics",
+            return_value=(None, None),
+        ),
+    ):
+        run_clang_tidy(["--lint-db", "-p", str(tmp_path / "build"), "a.c"])
+
+    command = mock_exec.call_args.args[0]
+    assert command[1] == "-p"
+    assert command[2].startswith(str(tmp_path / "cache" / "lint-db"))
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(shutil.which("clang-tidy") is None, reason="needs clang-tidy")
+@pytest.mark.parametrize("lint_db", (False, True), ids=("original", "lint-db"))
+def test_lint_db_parse_time(lint_db, tmp_path, monkeypatch):
+    """Compare clang-tidy on the testing fixture with and without --lint-db."""
+    monkeypatch.setenv("CPP_LINTER_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    source = tmp_path / "main.c"
+    source.write_bytes(Path("testing/main.c").read_bytes())
+    _write_db(tmp_path / "build", source, HEAVY_FLAGS)
+    args = ["--checks=-*,bugprone-*", "-p", str(tmp_path / "build"), str(source)]
+
+    ret, output = run_clang_tidy((["--lint-db"] if lint_db else []) + args)
+
+    assert ret in (0, 1), output
@@ -0,0 +1,50 @@
+"""Tests for cpp_linter_hooks.output -- bounded output capture."""
+
+import io
+from argparse import ArgumentTypeError
+
+import pytest
+
+from cpp_linter_hooks.output import (
+    CapturedOutput,
+    PatternScanner,
+    size_value,
+    truncate,
+)
+
+
+def test_scanner_finds_patterns_across_chunks():
+    scanner = PatternScanner(["compile_commands.json", "msvc"], ignore_case=True)
+    for chunk in ("x" * 100 + "Compile_Comm", "ands.JSON not found", "\n"):
+        scanner.feed(chunk)
+    assert scanner.found == {"compile_commands.json"}
+
+
+def test_capture_spills_and_scans_everything(monkeypatch):
+    scanner = PatternScanner(["error:"])
+    capture = CapturedOutput([scanner], threshold=16)
+    data = b"line\n" * 100 + b"a.cpp:1:1: error: late\n"
+    capture.read_from(io.BufferedReader(io.BytesIO(data)))
+
+    assert capture.spilled
+    assert scanner.found == {"error:"}
+    assert capture.text() == (data.decode(), 0)
+    assert capture.text(12) == ("line\nline\n", len(data) - 10)
+    capture.close()
+
+
+def test_truncate_cuts_at_line_ends():
+    assert truncate("aaa\nbbb\nccc", None) == ("aaa\nbbb\nccc", 0)
+    assert truncate("aaa\nbbb\nccc", 9) == ("aaa\nbbb\n", 3)
+    assert truncate("abcdef", 4) == ("abcd", 2)
+
+
+@pytest.mark.parametrize(("value", "expected"), (("100", 100), ("2k", 2048)))
+def testsize_value(value, expected):
+    assert size_value(value) == expected
+
+
+@pytest.mark.parametrize("value", ("0", "-1k", "lots"))
+def testsize_value_rejects_invalid_sizes(value):
+    with pytest.raises(ArgumentTypeError):
+        size_value(value)
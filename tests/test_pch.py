@@ -0,0 +1,168 @@
+"""Tests for cpp_linter_hooks.pch -- precompiled headers for clang-tidy."""
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from cpp_linter_hooks.pch import (
+    PchBuilder,
+    _parse_deps,
+    common_prefix,
+    extra_args,
+    leading_includes,
+    pch_failed,
+    pch_path,
+    without_pch,
+)
+
+
+def test_leading_includes_stop_at_code(tmp_path):
+    source = tmp_path / "a.cpp"
+    source.write_text(
+        "// Copyright\n"
+        "#pragma once\n"
+        '#include "a.h"\n'
+        "/* standard\n   headers */\n"
+        "#include <vector>\n"
+        "#  include <map>  // comment\n"
+        "#define X 1\n"
+        "#include <string>\n"
+    )
+    assert leading_includes(str(source)) == [
+        ('"', "a.h"),
+        ("<", "vector"),
+        ("<", "map"),
+    ]
+
+
+def test_common_prefix_keeps_shared_system_headers(tmp_path):
+    a, b = tmp_path / "a.cpp", tmp_path / "b.cpp"
+    a.write_text('#include "a.h"\n#include <vector>\n#include <map>\n')
+    b.write_text("#include <map>\n#include <boost/any.hpp>\n#include <vector>\n")
+    assert common_prefix([str(a), str(b)]) == ["vector", "map"]
+
+
+def test_parse_deps():
+    text = (
+        "prefix.pch: /tmp/prefix.hpp /usr/include/c++/vector \\\n  /opt/my\\ dir/x.h\n"
+    )
+    assert _parse_deps(text) == [
+        "/tmp/prefix.hpp",
+        "/usr/include/c++/vector",
+        "/opt/my dir/x.h",
+    ]
+
+
+def test_command_helpers():
+    command = ["clang-tidy", *extra_args("/c/p.pch"), "-p", "build", "a.cpp"]
+    assert pch_path(command) == "/c/p.pch"
+    assert without_pch(command) == ["clang-tidy", "-p", "build", "a.cpp"]
+    assert pch_path(without_pch(command)) is None
+    assert pch_failed(
+        "fatal error: file '/usr/include/vector' has been modified since the "
+        "precompiled header '/c/p.pch' was built"
+    )
+    assert pch_failed("error: PCH file built from a different branch")
+    assert not pch_failed("a.cpp:1:1: warning: something [check]")
+
+
+def _project(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    files = []
+    for name in ("a.cpp", "b.cpp", "c.cpp"):
+        (src / name).write_text("#include <vector>\n#include <map>\nint x;\n")
+        files.append(str(src / name))
+    (src / "c.cpp").write_text("#include <vector>\nint y;\n")
+    build = tmp_path / "build"
+    build.mkdir()
+    entries = [
+        {
+            "directory": str(build),
+            "file": f,
+            "arguments": ["clang++", "-std=c++17", "-DA", "-c", f, "-o", "x.o"],
+        }
+        for f in files[:2]
+    ] + [
+        {
+            "directory": str(build),
+            "file": files[2],
+            "arguments": ["clang++", "-std=c++20", "-c", files[2]],
+        }
+    ]
+    (build / "compile_commands.json").write_text(json.dumps(entries))
+    header = tmp_path / "vector"
+    header.write_text("// system header\n")
+    return files, str(build), header
+
+
+def _fake_compiler(header):
+    def run(command):
+        output = command[command.index("-o") + 1]
+        Path(output).write_text("pch")
+        deps = command[command.index("-MF") + 1]
+        source = command[command.index("-o") - 1]
+        Path(deps).write_text(f"{output}: {source} {header}\n")
+        return 0, ""
+
+    return run
+
+
+def test_prepare_builds_one_pch_per_flag_group(tmp_path):
+    files, build, header = _project(tmp_path)
+    builder = PchBuilder("21.1.0", root=tmp_path / "cache")
+    with patch(
+        "cpp_linter_hooks.pch.run_process", side_effect=_fake_compiler(header)
+    ) as mock_run:
+        pch = builder.prepare(files, build)
+
+    # c.cpp has other flags, so its group is too small for a PCH.
+    assert sorted(pch) == files[:2]
+    assert pch[files[0]] == pch[files[1]]
+    command = mock_run.call_args.args[0]
+    assert command[0] == "clang"
+    assert "-std=c++17" in command and "-DA" in command
+    assert command[command.index("-x") + 1] == "c++-header"
+    prefix = Path(command[command.index("-o") - 1]).read_text()
+    assert prefix == "#include <vector>\n#include <map>\n"
+
+
+def test_prepare_reuses_pch_until_a_header_changes(tmp_path):
+    files, build, header = _project(tmp_path)
+    builder = PchBuilder("21.1.0", root=tmp_path / "cache")
+    with patch(
+        "cpp_linter_hooks.pch.run_process", side_effect=_fake_compiler(header)
+    ) as mock_run:
+        first = builder.prepare(files, build)
+        assert builder.prepare(files, build) == first
+        assert mock_run.call_count == 1
+        header.write_text("// updated system header\n")
+        os.utime(header, ns=(0, 1))
+        assert builder.prepare(files, build) == first
+        assert mock_run.call_count == 2
+
+
+def test_failed_build_is_remembered(tmp_path):
+    files, build, _ = _project(tmp_path)
+    builder = PchBuilder("21.1.0", root=tmp_path / "cache")
+    with patch(
+        "cpp_linter_hooks.pch.run_process", return_value=(1, "error: boom")
+    ) as mock_run:
+        assert builder.prepare(files, build) == {}
+        assert builder.prepare(files, build) == {}
+    assert mock_run.call_count == 1
+    assert "error: boom" in builder.messages[0]
+
+
+def test_explicit_header_is_precompiled(tmp_path):
+    files, build, header = _project(tmp_path)
+    pch_header = tmp_path / "pch.h"
+    pch_header.write_text("#include <vector>\n")
+    builder = PchBuilder("21.1.0", str(pch_header), root=tmp_path / "cache")
+    with patch(
+        "cpp_linter_hooks.pch.run_process", side_effect=_fake_compiler(header)
+    ) as mock_run:
+        builder.prepare(files, build)
+    prefix = mock_run.call_args.args[0][mock_run.call_args.args[0].index("-o") - 1]
+    assert Path(prefix).read_text() == f'#include "{pch_header}"\n'
@@ -0,0 +1,100 @@
+"""Tests for cpp_linter_hooks.process -- cancellable child processes."""
+
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from cpp_linter_hooks.output import PatternScanner
+from cpp_linter_hooks.process import (
+    CancelScope,
+    JobCancelled,
+    JobTimedOut,
+    _terminate,
+    run_process,
+)
+
+
+def test_run_process_returns_stdout_then_stderr():
+    retval, output = run_process(
+        [
+            sys.executable,
+            "-c",
+            "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)",
+        ]
+    )
+    assert retval == 3
+    assert output.replace("\r\n", "\n") == "out\nerr\n"
+
+
+def test_run_process_in_scope_runs_normally():
+    scope = CancelScope()
+    retval, output = run_process([sys.executable, "-c", "print('ok')"], scope)
+    assert retval == 0
+    assert output.strip() == "ok"
+
+
+def test_cancelled_scope_does_not_spawn():
+    scope = CancelScope()
+    scope.cancel()
+    with pytest.raises(JobCancelled):
+        run_process([sys.executable, "-c", "print('never')"], scope)
+
+
+def test_cancel_terminates_running_process():
+    scope = CancelScope()
+    outcome = {}
+
+    def target():
+        try:
+            run_process([sys.executable, "-c", "import time; time.sleep(30)"], scope)
+        except JobCancelled:
+            outcome["cancelled"] = True
+
+    thread = threading.Thread(target=target)
+    start = time.monotonic()
+    thread.start()
+    while not scope._running and time.monotonic() - start < 10:
+        time.sleep(0.01)
+    scope.cancel()
+    thread.join(10)
+
+    assert outcome == {"cancelled": True}
+    assert time.monotonic() - start < 10
+
+
+def test_run_process_kills_command_after_timeout():
+    start = time.monotonic()
+    with pytest.raises(JobTimedOut):
+        run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+    assert time.monotonic() - start < 10
+
+
+def test_run_process_caps_output_but_scans_all_of_it():
+    scanner = PatternScanner(["error:"])
+    script = "import sys; print('x\\n' * 100000); print('error: late', file=sys.stderr)"
+    retval, output = run_process(
+        [sys.executable, "-c", script], max_output=10, scanners=(scanner,)
+    )
+    assert retval == 0
+    assert output.replace("\r\n", "\n").startswith("x\nx\nx\nx\nx\n[")
+    assert "more bytes of output not shown" in output
+    assert scanner.found == {"error:"}
+
+
+def test_run_process_caps_output_by_default(monkeypatch):
+    monkeypatch.setattr("cpp_linter_hooks.process.DEFAULT_MAX_OUTPUT", 10)
+    script = "print('x\\n' * 100000)"
+    _, output = run_process([sys.executable, "-c", script])
+    assert output.replace("\r\n", "\n").startswith("x\nx\nx\nx\nx\n[")
+
+
+def test_reaped_process_is_never_signalled():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    with patch("cpp_linter_hooks.process.os.killpg") as mock_killpg:
+        _terminate(process)
+    mock_killpg.assert_not_called()
@@ -0,0 +1,101 @@
+"""Tests for cpp_linter_hooks.scheduler -- streaming execution and progress."""
+
+import io
+import threading
+
+from cpp_linter_hooks.process import CancelScope, JobCancelled
+from cpp_linter_hooks.scheduler import COMPLETION, ORDERED, Progress, iter_results
+
+
+def _gated_run(release_order):
+    """Return a run function whose items finish in the given order."""
+    events = {item: threading.Event() for item in release_order}
+
+    def run(item):
+        position = release_order.index(item)
+        if position:
+            events[release_order[position - 1]].wait(5)
+        events[item].set()
+        return item.upper()
+
+    return run
+
+
+def test_iter_results_completion_order():
+    # Each item waits until the consumer has seen the item released before it.
+    release_order = ["c", "a", "b"]
+    seen = {item: threading.Event() for item in release_order}
+
+    def run(item):
+        position = release_order.index(item)
+        if position:
+            seen[release_order[position - 1]].wait(5)
+        return item.upper()
+
+    results = []
+    for idx, result in iter_results(run, ["a", "b", "c"], jobs=3, order=COMPLETION):
+        results.append((idx, result))
+        seen[result.lower()].set()
+    assert results == [(2, "C"), (0, "A"), (1, "B")]
+
+
+def test_iter_results_ordered_keeps_input_order():
+    run = _gated_run(["c", "a", "b"])
+    results = list(iter_results(run, ["a", "b", "c"], jobs=3, order=ORDERED))
+    assert results == [(0, "A"), (1, "B"), (2, "C")]
+
+
+def test_iter_results_streams_before_slow_job_finishes():
+    release = threading.Event()
+
+    def run(item):
+        if item == "slow":
+            release.wait(5)
+        return item
+
+    results = iter_results(run, ["fast", "slow"], jobs=2, order=ORDERED)
+    assert next(results) == (0, "fast")
+    release.set()
+    assert list(results) == [(1, "slow")]
+
+
+def test_iter_results_no_items():
+    assert list(iter_results(str, [], jobs=4)) == []
+
+
+class _Tty(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_progress_draws_and_clears_on_terminals():
+    stream = _Tty()
+    progress = Progress(4, stream)
+    progress.advance()
+    progress.advance()
+    assert "[2/4] 50% ETA" in stream.getvalue()
+    progress.finish()
+    assert stream.getvalue().endswith("\r\033[K")
+
+
+def test_progress_is_silent_when_not_a_terminal():
+    stream = io.StringIO()
+    progress = Progress(2, stream)
+    progress.advance()
+    progress.finish()
+    assert stream.getvalue() == ""
+
+
+def test_iter_results_skips_cancelled_jobs():
+    scope = CancelScope()
+
+    def run(item):
+        if scope.cancelled:
+            raise JobCancelled(item)
+        return item
+
+    results = []
+    for idx, result in iter_results(run, ["a", "b", "c"], jobs=1, scope=scope):
+        results.append((idx, result))
+        scope.cancel()
+    assert results == [(0, "a")]
@@ -0,0 +1,63 @@
+"""Tests for cpp_linter_hooks.shard -- splitting runs across CI nodes."""
+
+from argparse import ArgumentTypeError
+
+import pytest
+
+from cpp_linter_hooks.history import RunHistory
+from cpp_linter_hooks.shard import (
+    main,
+    merge_reports,
+    parse_shard,
+    partition,
+    select_shard,
+    write_report,
+)
+
+
+def test_parse_shard():
+    assert parse_shard("2/3") == (2, 3)
+    for value in ("0/3", "4/3", "1/0", "a/b", "3"):
+        with pytest.raises(ArgumentTypeError):
+            parse_shard(value)
+
+
+def test_partition_without_history_balances_file_counts():
+    files = [f"f{idx}.cpp" for idx in range(7)]
+    shards = partition(files, 3)
+    assert sorted(len(shard) for shard in shards) == [2, 2, 3]
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    assert partition(list(reversed(files)), 3) == [
+        list(reversed(shard)) for shard in shards
+    ]
+
+
+def test_partition_balances_recorded_durations(tmp_path):
+    history = RunHistory(tmp_path / "history.json")
+    for name, duration in (("big.cpp", 9.0), ("a.cpp", 3.0), ("b.cpp", 3.0)):
+        history.record_file(name, duration)
+    files = ["a.cpp", "b.cpp", "big.cpp", "c.cpp"]
+
+    # c.cpp has no history and is assumed to take the average of 5 seconds.
+    assert partition(files, 2, history) == [["big.cpp"], ["a.cpp", "b.cpp", "c.cpp"]]
+    assert select_shard(files, (2, 2), history) == ["a.cpp", "b.cpp", "c.cpp"]
+
+
+def test_merge_reports_combines_shards(tmp_path, capsys):
+    warning = "/src/shared.h:1:1: warning: bad [check]"
+    write_report(str(tmp_path / "1.json"), (1, 2), (1, warning), {"a.cpp": 1.5})
+    write_report(str(tmp_path / "2.json"), (2, 2), (1, warning), {"b.cpp": 2.5})
+    paths = [str(tmp_path / "1.json"), str(tmp_path / "2.json")]
+
+    assert merge_reports(paths) == (1, warning, {"a.cpp": 1.5, "b.cpp": 2.5})
+
+    history_path = tmp_path / "history.json"
+    assert main(paths + ["--history", str(history_path)]) == 1
+    assert capsys.readouterr().out == warning + "\n"
+    assert RunHistory.load(history_path).file_stats("b.cpp")["duration"] == 2.5
+
+
+def test_main_reports_unreadable_reports(tmp_path, capsys):
+    (tmp_path / "bad.json").write_text("{")
+    assert main([str(tmp_path / "bad.json")]) == 1
+    assert "Could not read shard report" in capsys.readouterr().err
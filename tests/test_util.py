@@ -7,6 +7,7 @@ import subprocess
 import sys
 
 from cpp_linter_hooks.util import (
+    atomic_write,
     _get_pypi_versions,
     _resolve_version_from_pypi,
     _detect_installed_version,
@@ -477,3 +478,18 @@ def test_resolve_install_with_diagnostics_verbose_latest(capsys):
         "Using latest clang-format Python wheel version 22.1.5"
         in capsys.readouterr().err
     )
+
+
+def test_atomic_write_keeps_mode_and_cleans_up(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("old")
+    path.chmod(0o640)
+    atomic_write(path, "new")
+    assert path.read_text() == "new"
+    assert path.stat().st_mode & 0o777 == 0o640
+
+    with patch("cpp_linter_hooks.util.os.replace", side_effect=OSError):
+        with pytest.raises(OSError):
+            atomic_write(path, b"lost")
+    assert path.read_text() == "new"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt"]
@@ -0,0 +1,177 @@
+"""Tests for cpp_linter_hooks.watch -- re-checking files as they change."""
+
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from cpp_linter_hooks.watch import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_DELETE,
+    IN_ISDIR,
+    IN_Q_OVERFLOW,
+    Inotify,
+    SourceTree,
+    run_watch,
+)
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+
+
+class FakeInotify:
+    def __init__(self):
+        self.watched = []
+
+    def add_watch(self, directory):
+        self.watched.append(directory)
+
+    def close(self):
+        pass
+
+
+def _project(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "util.h").write_text("int f();\n")
+    (tmp_path / "src" / "a.cpp").write_text('#include "util.h"\n')
+    (tmp_path / "src" / "b.cpp").write_text("int b;\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "gen.cpp").write_text("int g;\n")
+    _write_db(tmp_path, ["-DA"])
+    return tmp_path
+
+
+def _write_db(tmp_path, flags):
+    entries = [
+        {
+            "directory": str(tmp_path / "build"),
+            "arguments": ["c++", *flags, "-c", str(tmp_path / "src" / name)],
+            "file": str(tmp_path / "src" / name),
+        }
+        for name in ("a.cpp", "b.cpp")
+    ]
+    (tmp_path / "build" / "compile_commands.json").write_text(json.dumps(entries))
+
+
+def test_tree_skips_build_and_hidden_directories(tmp_path):
+    _project(tmp_path)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "x.cpp").write_text("")
+    inotify = FakeInotify()
+    tree = SourceTree([str(tmp_path)], inotify)
+    assert sorted(inotify.watched) == [
+        str(tmp_path),
+        str(tmp_path / "build"),
+        str(tmp_path / "src"),
+    ]
+    assert sorted(tree.sources) == [
+        str(tmp_path / "src" / name) for name in ("a.cpp", "b.cpp", "util.h")
+    ]
+    assert list(tree.flags) == [str(tmp_path / "build")]
+
+
+def test_saved_header_rechecks_its_includers(tmp_path):
+    _project(tmp_path)
+    tree = SourceTree([str(tmp_path)], FakeInotify())
+    header = str(tmp_path / "src" / "util.h")
+    to_format, to_tidy = tree.update(
+        [(header, IN_CREATE), (header, IN_CLOSE_WRITE), (header, IN_CLOSE_WRITE)]
+    )
+    assert to_format == {header}
+    assert to_tidy == {header, str(tmp_path / "src" / "a.cpp")}
+    # Sources in build directories are never checked.
+    assert tree.update([(str(tmp_path / "build" / "gen.cpp"), IN_CLOSE_WRITE)]) == (
+        set(),
+        set(),
+    )
+
+
+def test_config_and_compile_db_changes(tmp_path):
+    _project(tmp_path)
+    tree = SourceTree([str(tmp_path)], FakeInotify())
+    sources = {str(tmp_path / "src" / n) for n in ("a.cpp", "b.cpp", "util.h")}
+    (tmp_path / "src" / ".clang-format").write_text("BasedOnStyle: LLVM\n")
+    assert tree.update([(str(tmp_path / "src" / ".clang-format"), IN_CLOSE_WRITE)]) == (
+        sources,
+        set(),
+    )
+    assert tree.update([(str(tmp_path / ".clang-tidy"), IN_CLOSE_WRITE)]) == (
+        set(),
+        sources,
+    )
+
+    entries = json.loads((tmp_path / "build" / "compile_commands.json").read_text())
+    entries[1]["arguments"].insert(1, "-DB")
+    (tmp_path / "build" / "compile_commands.json").write_text(json.dumps(entries))
+    db = str(tmp_path / "build" / "compile_commands.json")
+    assert tree.update([(db, IN_CLOSE_WRITE)]) == (
+        set(),
+        {str(tmp_path / "src" / "b.cpp")},
+    )
+
+
+def test_directory_events_and_overflow(tmp_path):
+    _project(tmp_path)
+    inotify = FakeInotify()
+    tree = SourceTree([str(tmp_path)], inotify)
+    new_dir = tmp_path / "lib"
+    new_dir.mkdir()
+    (new_dir / "c.cpp").write_text("int c;\n")
+    to_format, _ = tree.update([(str(new_dir), IN_CREATE | IN_ISDIR)])
+    assert to_format == {str(new_dir / "c.cpp")}
+    assert str(new_dir) in inotify.watched
+
+    tree.update([(str(tmp_path / "src"), IN_DELETE | IN_ISDIR)])
+    assert tree.sources == {str(new_dir / "c.cpp")}
+    to_format, _ = tree.update([("", IN_Q_OVERFLOW)])
+    assert len(to_format) == 4
+
+
+@linux_only
+def test_inotify_reports_saved_files(tmp_path):
+    inotify = Inotify()
+    try:
+        inotify.add_watch(str(tmp_path))
+        (tmp_path / "a.cpp").write_text("int a;\n")
+        events = inotify.wait(0.05)
+    finally:
+        inotify.close()
+    assert (str(tmp_path / "a.cpp"), IN_CLOSE_WRITE) in [
+        (path, mask & IN_CLOSE_WRITE) for path, mask in events
+    ]
+
+
+def test_run_watch_checks_only_affected_files(tmp_path, monkeypatch, capsys):
+    _project(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    source = str(tmp_path / "src" / "b.cpp")
+    batches = iter([[(source, IN_CLOSE_WRITE)]])
+
+    def fake_wait(self, debounce):
+        for events in batches:
+            return events
+        raise KeyboardInterrupt
+
+    with (
+        patch("cpp_linter_hooks.watch.resolve_tools", return_value=None),
+        patch("cpp_linter_hooks.watch.Inotify.add_watch"),
+        patch("cpp_linter_hooks.watch.Inotify.wait", fake_wait),
+        patch(
+            "cpp_linter_hooks.clang_format.format_files",
+            return_value=(1, "src/b.cpp:1:1: warning: code should be clang-formatted"),
+        ) as mock_format,
+        patch(
+            "cpp_linter_hooks.clang_tidy.check_files", return_value=(0, "")
+        ) as mock_tidy,
+    ):
+        assert run_watch(["--format-arg=--style=LLVM", "-p", "build"]) == 0
+
+    _, format_args = mock_format.call_args.args
+    assert format_args == ["--dry-run", "--style=LLVM", "src/b.cpp"]
+    tidy_hook_args, tidy_args = mock_tidy.call_args.args
+    assert tidy_hook_args.stream
+    assert tidy_args == ["-p", "build", "src/b.cpp"]
+    assert "code should be clang-formatted" in capsys.readouterr().out